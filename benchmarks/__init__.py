@@ -0,0 +1,10 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Standalone benchmarks for the bot's hot paths.
+
+Each module can be run from the repository root, for example:
+    python -m benchmarks.prefix_dispatch
+
+"""
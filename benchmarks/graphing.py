@@ -0,0 +1,298 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Measures the Graphing cog's render functions across input sizes.
+
+Each render function runs in this process, set up the same way as a
+render worker, and every stage it reports (compute, figure, draw,
+encode) is measured for wall time, CPU time and peak memory. Peak
+memory comes from tracemalloc, which sees Python and NumPy allocations
+but not the buffers matplotlib's Agg renderer allocates in C++.
+
+Tracing memory slows rendering down noticeably, so compare timings
+from runs with --no-trace-memory. Results are written as JSON so runs
+can be compared across changes, and a summary table is printed to stderr.
+
+Usage:
+    python -m benchmarks.graphing [--text-sizes N,...] [--periods N,...]
+        [--frames N,...] [--repeat N] [--only NAME,...]
+        [--no-trace-memory] [-o FILE]
+
+"""
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+from decimal import Decimal
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import matplotlib
+import numpy as np
+
+from benchmarks.textstats import make_text
+from bot.cogs.graphing import animate, executor, figures, plots
+from bot.cogs.graphing.output import OutputOptions
+from bot.cogs.graphing.textstats import TextStats
+
+COLOR = '#ffd700'
+NAME = 'Benchmark'
+SIMULATION_BUDGET = 10_000_000
+# The same as the Graphing cog's default budget
+
+
+@contextlib.contextmanager
+def traced_peak():
+    """Measure the peak memory traced inside the block, if tracemalloc
+    is running. The result is appended to the yielded list.
+    """
+    result = []
+    if not tracemalloc.is_tracing():
+        yield result
+        return
+
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    try:
+        yield result
+    finally:
+        result.append(tracemalloc.get_traced_memory()[1] - baseline)
+
+
+class ProfilingTimings(figures.RenderTimings):
+    """Records the wall time, CPU time and peak traced memory of each stage."""
+    __slots__ = ('cpu', 'peak_memory')
+
+    def __init__(self):
+        super().__init__()
+        self.cpu: dict[str, float] = {}
+        self.peak_memory: dict[str, int] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        with traced_peak() as peak:
+            cpu_start = time.process_time()
+            try:
+                with super().stage(name):
+                    yield
+            finally:
+                cpu = time.process_time() - cpu_start
+                self.cpu[name] = self.cpu.get(name, 0.) + cpu
+
+        if peak:
+            self.peak_memory[name] = max(self.peak_memory.get(name, 0), peak[0])
+
+
+@dataclasses.dataclass
+class Case:
+    benchmark: str
+    params: dict[str, Any]
+    func: Callable[[], Any]
+
+
+def measure(case: Case) -> dict:
+    """Run one case and return its measurements."""
+    timings = figures.reset_timings(ProfilingTimings())
+
+    with traced_peak() as peak:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        case.func()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+    stages = {
+        name: {
+            'wall': timings.stages[name],
+            'cpu': timings.cpu.get(name, 0.),
+            'peak_memory': timings.peak_memory.get(name)
+        }
+        for name in timings.stages
+    }
+    stages['total'] = {
+        'wall': wall, 'cpu': cpu, 'peak_memory': peak[0] if peak else None
+    }
+    return {'stages': stages, 'output_size': timings.output_size}
+
+
+def text_stats(text: str) -> TextStats:
+    """Compute a text's statistics as the cog does before rendering."""
+    with figures.stage('compute'):
+        return TextStats.from_text(text)
+
+
+def word_count_pie(text: str, output: OutputOptions):
+    stats = text_stats(text)
+    return plots.word_count_pie(
+        stats.words.most_common(15), stats.total_words, len(stats.words),
+        NAME, COLOR, output=output
+    )
+
+
+def render_animation(frames: int, fmt: animate.AnimationFormat):
+    """Render an animation with every batch run in this process."""
+    async def runner(func, *args):
+        return func(*args)
+
+    return asyncio.run(animate.render_animation(
+        runner,
+        plots.test_bar_graphs_3d_frames,
+        (COLOR, plots.test_bar_graphs_3d_data()),
+        plots.test_bar_graphs_3d_azimuths(frames),
+        fmt=fmt,
+        duration=100,
+        batch_size=5,
+        max_batches=1,
+        max_size=1 << 31
+    ))
+
+
+def make_cases(args: argparse.Namespace) -> list[Case]:
+    output = OutputOptions(
+        fmt=args.output_format, quantize=args.quantize, max_bytes=args.max_bytes
+    )
+    cases = []
+
+    # The term is fixed so the growth stays finite at any number of periods
+    for periods in args.periods:
+        cases.append(Case(
+            'interest_stackplot', {'periods': periods},
+            lambda periods=periods: plots.interest_stackplot(
+                Decimal(1000), Decimal('0.05'), 10, periods // 10, COLOR,
+                Decimal(10), output=output
+            )
+        ))
+        cases.append(Case(
+            'amortization_stackplot', {'periods': periods},
+            lambda periods=periods: plots.amortization_stackplot(
+                Decimal(200000), Decimal('0.04'), 10, periods // 10, COLOR,
+                output=output
+            )
+        ))
+        if periods <= SIMULATION_BUDGET // 100:
+            cases.append(Case(
+                'interest_simulation', {'periods': periods},
+                lambda periods=periods: plots.interest_simulation(
+                    Decimal(1000), Decimal('0.05'), Decimal('0.1'),
+                    10, periods // 10, COLOR, Decimal(10),
+                    paths=min(2000, SIMULATION_BUDGET // periods), output=output
+                )
+            ))
+
+    for size in args.text_sizes:
+        text = make_text(size)
+        cases.append(Case(
+            'frequency_analysis', {'text_size': size},
+            lambda text=text: plots.frequency_analysis(
+                text_stats(text).letters.tolist(), NAME, COLOR, output=output)
+        ))
+        cases.append(Case(
+            'word_count_pie', {'text_size': size},
+            lambda text=text: word_count_pie(text, output)
+        ))
+
+    cases.append(Case(
+        'test_bar_graphs_3d_image', {},
+        lambda: plots.test_bar_graphs_3d_image(COLOR, 30, 60, output=output)
+    ))
+
+    for frames in args.frames:
+        for fmt in animate.ANIMATION_FORMATS:
+            cases.append(Case(
+                'animation', {'frames': frames, 'format': fmt},
+                lambda frames=frames, fmt=fmt: render_animation(frames, fmt)
+            ))
+
+    if args.only:
+        cases = [c for c in cases if c.benchmark in args.only]
+    return cases
+
+
+def get_metadata(args: argparse.Namespace) -> dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'matplotlib': matplotlib.__version__,
+        'numpy': np.__version__,
+        'repeat': args.repeat,
+        'trace_memory': not args.no_trace_memory,
+        'output': {
+            'format': args.output_format,
+            'quantize': args.quantize,
+            'max_bytes': args.max_bytes
+        }
+    }
+
+
+def int_list(s: str) -> list[int]:
+    return [int(x.replace('_', '')) for x in s.split(',') if x]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--text-sizes', type=int_list, default=[10_000, 300_000, 3_000_000])
+    parser.add_argument('--periods', type=int_list, default=[120, 12_000, 1_200_000])
+    parser.add_argument('--frames', type=int_list, default=[10, 30])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', type=lambda s: s.split(','), default=None,
+                        help='comma-separated names of benchmarks to run')
+    parser.add_argument('--output-format', choices=('png', 'webp'), default='png')
+    parser.add_argument('--quantize', action='store_true')
+    parser.add_argument('--max-bytes', type=int, default=0)
+    parser.add_argument('--no-trace-memory', action='store_true',
+                        help="skip measuring peak memory, which slows down rendering")
+    parser.add_argument('-o', '--out', type=argparse.FileType('w'), default=sys.stdout,
+                        help='where to write the JSON results (default: stdout)')
+    args = parser.parse_args()
+
+    executor._init_worker()
+    cases = make_cases(args)
+
+    if not args.no_trace_memory:
+        tracemalloc.start()
+    results = []
+    for case in cases:
+        measure(case)  # warm up the figure pool and caches
+        runs = [measure(case) for _ in range(args.repeat)]
+        results.append({
+            'benchmark': case.benchmark,
+            'params': case.params,
+            'runs': runs
+        })
+
+        total = statistics.median(r['stages']['total']['wall'] for r in runs)
+        stages = ', '.join(
+            '{} {:.1f}ms'.format(
+                name, statistics.median(r['stages'][name]['wall'] for r in runs) * 1000
+            )
+            for name in runs[0]['stages'] if name != 'total'
+        )
+        params = ' '.join(f'{k}={v}' for k, v in case.params.items())
+        print(
+            f'{case.benchmark:<24} {params:<28} {total * 1000:>9.1f}ms  {stages}',
+            file=sys.stderr
+        )
+    tracemalloc.stop()
+
+    json.dump({'metadata': get_metadata(args), 'results': results}, args.out, indent=2)
+    args.out.write('\n')
+
+
+if __name__ == '__main__':
+    main()
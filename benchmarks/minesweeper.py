@@ -0,0 +1,148 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Measures the minesweeper engine's clicks and rendering on the
+largest boards it supports.
+
+Clicks are measured on a board with the default number of mines and
+on a nearly empty board, where the first click floods the whole board.
+Every other operation is measured on a game in progress. Rendering
+caches each row, so repeated renders only measure the rows that
+changed in between.
+
+Usage:
+    python -m benchmarks.minesweeper [--sizes XxY,...] [--repeat N]
+
+"""
+import argparse
+import random
+import time
+from typing import Callable
+
+from bot.cogs.games.minesweeper import MSGame
+
+
+def measure(name: str, setup: Callable[[], MSGame], func: Callable[[MSGame], object],
+            repeat: int, number: int):
+    """Print the best time of `number` calls to func across `repeat` runs,
+    each on a new game from setup.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        game = setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func(game)
+        best = min(best, (time.perf_counter() - start) / number)
+    print(f'{name:<32} {best * 1_000_000:>12,.1f} us')
+
+
+def new_game(y_size: int, x_size: int, n_mines: int = 0, *, seed=0) -> MSGame:
+    random.seed(seed)
+    return MSGame(y_size, x_size, n_mines)
+
+
+def game_in_progress(y_size: int, x_size: int, *, seed=0) -> MSGame:
+    """Return a game where the first click has been made
+    and some mines have been flagged.
+    """
+    game = new_game(y_size, x_size, seed=seed)
+    game.click(y_size // 2, x_size // 2)
+    for i, cell in enumerate(game.yield_cells()):
+        if cell.value == 1 and i % 2:
+            game.flag(*divmod(i, x_size))
+    return game
+
+
+def board_size(s: str) -> tuple[int, int]:
+    x, y = s.lower().split('x')
+    return int(y), int(x)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=lambda s: [board_size(x) for x in s.split(',')],
+                        default=[(10, 24), (26, 26)])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for y_size, x_size in args.sizes:
+        print(f'{x_size}x{y_size} board')
+        center = (y_size // 2, x_size // 2)
+
+        measure(
+            'first click (default mines)',
+            lambda: new_game(y_size, x_size),
+            lambda game: game.click(*center),
+            args.repeat, 1
+        )
+        measure(
+            'first click (flood fill)',
+            lambda: new_game(y_size, x_size, 1),
+            lambda game: game.click(*center),
+            args.repeat, 1
+        )
+
+        def click_all(game: MSGame):
+            for y in range(y_size):
+                for x in range(x_size):
+                    if game.click(y, x, simulate=True):
+                        game.click(y, x)
+
+        measure(
+            'click every safe cell',
+            lambda: game_in_progress(y_size, x_size),
+            click_all, args.repeat, 1
+        )
+        measure(
+            'render',
+            lambda: game_in_progress(y_size, x_size),
+            lambda game: game.render(),
+            args.repeat, 100
+        )
+        measure(
+            'render (highlighted column)',
+            lambda: game_in_progress(y_size, x_size),
+            lambda game: game.render(highlighted_column=center[1]),
+            args.repeat, 100
+        )
+        measure(
+            'flag + render (one dirty row)',
+            lambda: game_in_progress(y_size, x_size),
+            lambda game: (game.flag(0, 0), game.render()),
+            args.repeat, 100
+        )
+        measure(
+            'get_status',
+            lambda: game_in_progress(y_size, x_size),
+            lambda game: game.get_status(),
+            args.repeat, 100
+        )
+        measure(
+            'n_flags',
+            lambda: game_in_progress(y_size, x_size),
+            lambda game: game.n_flags,
+            args.repeat, 100
+        )
+        measure(
+            'board[y][x] (every cell)',
+            lambda: game_in_progress(y_size, x_size),
+            lambda game: [
+                game.board[y][x]
+                for y in range(y_size)
+                for x in range(x_size)
+            ],
+            args.repeat, 100
+        )
+        measure(
+            'yield_chordable_pos',
+            lambda: game_in_progress(y_size, x_size),
+            lambda game: list(game.yield_chordable_pos()),
+            args.repeat, 100
+        )
+        print()
+
+
+if __name__ == '__main__':
+    main()
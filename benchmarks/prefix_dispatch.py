@@ -0,0 +1,102 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Measures how many messages per second pass through the command
+dispatch path of TheGameBot.process_commands().
+
+Usage:
+    python -m benchmarks.prefix_dispatch [-n MESSAGES] [--command-ratio R]
+
+"""
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+import discord
+from discord.ext import commands
+
+from bot.cogs.prefix import Prefix
+from main import TheGameBot
+
+USER_ID = 123456789012345678
+GUILD_IDS = range(1, 51)
+PREFIX = ';'
+
+
+def make_messages(n: int, command_ratio: float) -> list[SimpleNamespace]:
+    author = SimpleNamespace(bot=False)
+    messages = []
+    for _ in range(n):
+        if random.random() < command_ratio:
+            content = f'{PREFIX}nonexistentcommand argument'
+        else:
+            content = 'just a regular message in some channel'
+        guild = SimpleNamespace(id=random.choice(GUILD_IDS))
+        messages.append(SimpleNamespace(
+            author=author, guild=guild, content=content
+        ))
+    return messages
+
+
+async def legacy_get_prefix(bot: TheGameBot, message):
+    """The get_prefix() implementation before prefix matchers."""
+    cog = bot.get_cog('Prefix')
+    prefix = await cog.fetch_prefix(message.guild.id)
+    return commands.when_mentioned_or(prefix)(bot, message)
+
+
+async def legacy_dispatch(bot: TheGameBot, message):
+    prefixes = await legacy_get_prefix(bot, message)
+    # get_context() always ran, so at minimum this check happened
+    message.content.startswith(tuple(prefixes))
+
+
+async def matcher_dispatch(bot: TheGameBot, message):
+    matcher = await bot.get_prefix_matcher(message)
+    matcher.matches(message.content)
+
+
+async def measure(name: str, func, bot, messages) -> float:
+    start = time.perf_counter()
+    for m in messages:
+        await func(bot, m)
+    elapsed = time.perf_counter() - start
+    rate = len(messages) / elapsed
+    print(f'{name:<20} {rate:>14,.0f} msg/s')
+    return rate
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--messages', type=int, default=200_000)
+    parser.add_argument('--command-ratio', type=float, default=0.05)
+    args = parser.parse_args()
+
+    bot = TheGameBot(intents=discord.Intents.none())
+    bot._connection.user = SimpleNamespace(id=USER_ID)
+
+    cog = Prefix(bot)
+    await bot.add_cog(cog)
+    for guild_id in GUILD_IDS:
+        cog.cache[guild_id] = PREFIX
+
+    messages = make_messages(args.messages, args.command_ratio)
+
+    legacy = await measure('legacy get_prefix', legacy_dispatch, bot, messages)
+    new = await measure('prefix matcher', matcher_dispatch, bot, messages)
+    print(f'speedup: {new / legacy:.2f}x')
+
+    # Non-command messages should be rejected without building a context
+    non_commands = [m for m in messages if not m.content.startswith(PREFIX)]
+    await measure(
+        'process_commands', TheGameBot.process_commands, bot, non_commands
+    )
+
+    await bot.session.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,461 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Simulates the Reminders cog with many pending reminders on a virtual clock.
+
+The cog runs unmodified on an event loop whose clock jumps forward
+whenever every task is waiting on a timer, so hours of reminders can
+be simulated in seconds. Discord is replaced with in-memory channels
+and the database with an in-memory SQLite connection using the real
+schema.
+
+The run fails with a non-zero exit code if any reminder is lost,
+sent twice, sent early, or sent later than --max-lag seconds,
+or if a delivery worker dies or a channel is left with pending jobs.
+
+--dead-letter-failures makes the first N attempts to dead-letter a job
+fail as if the database was locked. Combine it with --failure-rate so
+that some jobs exhaust their attempts.
+
+Usage:
+    python -m benchmarks.reminder_simulator [-n REMINDERS] [--hours H]
+        [--channels C] [--failure-rate F] [--max-lag SECONDS]
+        [--dead-letter-failures N]
+
+"""
+import argparse
+import asyncio
+import datetime
+import random
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+from unittest import mock
+
+import discord
+
+from bot import database, errors
+from bot.cogs.reminders import Reminders
+
+SCHEMA_PATH = 'data/thegamebot.sql'
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """An event loop that skips ahead to the next timer whenever
+    there are no callbacks ready to run.
+
+    Nothing may wait on real I/O or threads while this loop is running,
+    otherwise the clock would skip past it.
+
+    """
+    def __init__(self):
+        super().__init__()
+        self._virtual_time = 0.0
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def _run_once(self):
+        if not self._ready and self._scheduled:
+            self._virtual_time = max(self._virtual_time, self._scheduled[0]._when)
+        super()._run_once()
+
+
+class VirtualClock:
+    """Maps the loop's virtual time onto aware UTC datetimes."""
+    def __init__(self, loop: asyncio.AbstractEventLoop, start: datetime.datetime):
+        self.loop = loop
+        self.start = start
+
+    def utcnow(self) -> datetime.datetime:
+        return self.start + datetime.timedelta(seconds=self.loop.time())
+
+
+# In-memory database stand-in
+class SyncCursor:
+    """Provides the subset of asqlite's cursor API used by the bot."""
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    async def execute(self, sql, *params):
+        self._cursor.execute(sql, unpack_params(params))
+        return self
+
+    async def fetchone(self):
+        return self._cursor.fetchone()
+
+    async def fetchall(self):
+        return self._cursor.fetchall()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._cursor.close()
+
+
+class SyncQuery:
+    """Allows a query to be awaited or used as an async context manager."""
+    def __init__(self, conn: sqlite3.Connection, sql: str, params):
+        self._cursor = SyncCursor(conn.execute(sql, unpack_params(params)))
+
+    def __await__(self):
+        yield from ()
+        return self._cursor
+
+    async def __aenter__(self):
+        return self._cursor
+
+    async def __aexit__(self, *exc):
+        await self._cursor.__aexit__(*exc)
+
+
+class SyncTransaction:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    async def __aenter__(self):
+        self.conn.execute('BEGIN')
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+
+class SyncConnection:
+    """Provides the subset of asqlite's connection API used by the bot."""
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def execute(self, sql, *params):
+        return SyncQuery(self.conn, sql, params)
+
+    async def executemany(self, sql, params):
+        self.conn.executemany(sql, params)
+
+    async def executescript(self, script):
+        self.conn.executescript(script)
+
+    def cursor(self):
+        return SyncCursor(self.conn.cursor())
+
+    def transaction(self):
+        return SyncTransaction(self.conn)
+
+
+class SyncConnector:
+    def __init__(self, conn: SyncConnection):
+        self.conn = conn
+
+    async def __aenter__(self):
+        return self.conn
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class SyncDatabase(database.Database):
+    """A Database that runs queries synchronously on the event loop
+    so the virtual clock never skips over a pending query.
+    """
+    __slots__ = ('conn',)
+
+    def __init__(self, conn: sqlite3.Connection):
+        super().__init__(None, ':memory:')
+        self.conn = SyncConnection(conn)
+
+    def connect(self, *, writing=False):
+        return SyncConnector(self.conn)
+
+
+def unpack_params(params: tuple):
+    # asqlite accepts parameters either unpacked or as one sequence
+    if len(params) == 1 and isinstance(params[0], (tuple, list, dict)):
+        return params[0]
+    return params
+
+
+def create_database() -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        ':memory:', isolation_level=None,
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+    )
+    conn.row_factory = sqlite3.Row
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    return conn
+
+
+# Discord stand-ins
+class FakeChannel:
+    """A channel that records reminders as they are sent."""
+    def __init__(self, sim: 'Simulation', channel_id: int, guild):
+        self.sim = sim
+        self.id = channel_id
+        self.guild = guild
+
+    async def send(self, content: str):
+        await asyncio.sleep(self.sim.send_latency)
+        if random.random() < self.sim.failure_rate:
+            raise discord.HTTPException(
+                SimpleNamespace(status=500, reason='Simulated failure'),
+                'simulated failure'
+            )
+        self.sim.record_message(content)
+
+
+class FakeBot:
+    def __init__(self, sim: 'Simulation', db: SyncDatabase):
+        self.db = db
+        self.sim = sim
+
+    async def wait_until_ready(self):
+        pass
+
+    def get_channel(self, channel_id: int):
+        return self.sim.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id: int):
+        raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), '')
+
+    def get_settings(self):
+        raise errors.SettingsNotFound()
+
+
+class Simulation:
+    def __init__(self, args: argparse.Namespace, clock: VirtualClock):
+        self.args = args
+        self.clock = clock
+        self.failure_rate = args.failure_rate
+        self.send_latency = args.latency
+
+        guild = SimpleNamespace(get_member=lambda user_id: SimpleNamespace(id=user_id))
+        self.channels = {
+            channel_id: FakeChannel(self, channel_id, guild)
+            for channel_id in range(1, args.channels + 1)
+        }
+
+        self.due: dict[int, datetime.datetime] = {}
+        self.deliveries: dict[int, list[datetime.datetime]] = {}
+        self.sweep_times: list[float] = []
+        self.bytes_per_reminder: float | None = None
+        self.dead_letter_failures = 0
+        self.dead_workers = 0
+        self.stuck_channels = 0
+
+    def record_message(self, content: str):
+        now = self.clock.utcnow()
+        for line in content.split('\n'):
+            if line.startswith('reminder #'):
+                reminder_id = int(line.removeprefix('reminder #'))
+                self.deliveries.setdefault(reminder_id, []).append(now)
+
+    def populate(self, conn: sqlite3.Connection):
+        args = self.args
+        start = self.clock.utcnow()
+        span = args.hours * 3600
+
+        users = range(1, args.users + 1)
+        conn.executemany('INSERT INTO user (user_id) VALUES (?)', [(u,) for u in users])
+
+        rows = []
+        for reminder_id in range(1, args.reminders + 1):
+            due = start + datetime.timedelta(seconds=random.uniform(60, span))
+            self.due[reminder_id] = due
+            rows.append((
+                reminder_id, random.choice(users),
+                random.randint(1, args.channels),
+                due.replace(tzinfo=None), f'reminder #{reminder_id}'
+            ))
+
+        conn.execute('BEGIN')
+        conn.executemany(
+            'INSERT INTO reminder (reminder_id, user_id, channel_id, due, content) '
+            'VALUES (?, ?, ?, ?, ?)', rows
+        )
+        conn.execute('COMMIT')
+
+    async def sweep(self, cog: Reminders):
+        """Drives the send_reminders loop on the virtual clock."""
+        first = True
+        while True:
+            if first:
+                # Measure the memory taken by each scheduled reminder
+                tracemalloc.start()
+                before = tracemalloc.get_traced_memory()[0]
+                await cog.send_reminders()
+                after = tracemalloc.get_traced_memory()[0]
+                tracemalloc.stop()
+                if cog.scheduled:
+                    self.bytes_per_reminder = (after - before) / len(cog.scheduled)
+                first = False
+            else:
+                start = time.perf_counter()
+                await cog.send_reminders()
+                self.sweep_times.append(time.perf_counter() - start)
+
+            await asyncio.sleep(cog.send_reminders.minutes * 60)
+
+    async def run(self, conn: sqlite3.Connection) -> Reminders:
+        bot = FakeBot(self, SyncDatabase(conn))
+        cog = Reminders(bot)  # type: ignore
+        self.patch_dead_letter(cog)
+        await cog.cog_load()
+        # The sweep is driven manually since discord.ext.tasks
+        # schedules its iterations using the real clock
+        cog.send_reminders.cancel()
+
+        sweeper = asyncio.create_task(self.sweep(cog))
+
+        end = max(self.due.values()) + datetime.timedelta(hours=1)
+        while self.clock.utcnow() < end:
+            if len(self.deliveries) + cog.metrics.dead_lettered >= len(self.due):
+                break
+            await asyncio.sleep(1)
+
+        sweeper.cancel()
+        self.dead_workers = sum(task.done() for task in cog.workers)
+        self.stuck_channels = len(cog.channel_jobs)
+        cog.cog_unload()
+        return cog
+
+    def patch_dead_letter(self, cog: Reminders):
+        """Makes the first --dead-letter-failures calls to
+        _dead_letter() raise a database error.
+        """
+        dead_letter = cog._dead_letter
+
+        async def failing_dead_letter(job):
+            if self.dead_letter_failures < self.args.dead_letter_failures:
+                self.dead_letter_failures += 1
+                raise sqlite3.OperationalError('database is locked')
+            await dead_letter(job)
+
+        cog._dead_letter = failing_dead_letter
+
+
+def check_scheduling(cog: Reminders, clock: VirtualClock) -> list[str]:
+    """Checks that _check_reminder() only schedules reminders near due."""
+    problems = []
+    now = clock.utcnow()
+    entry = {'user_id': 1, 'channel_id': 1, 'content': ''}
+
+    far = dict(entry, reminder_id=-1, due=now + cog.NEAR_DUE * 2)
+    if cog._check_reminder(far, now=now):
+        problems.append('_check_reminder() scheduled a reminder outside NEAR_DUE')
+
+    near = dict(entry, reminder_id=-2, due=now + cog.NEAR_DUE / 2)
+    if not cog._check_reminder(near, now=now):
+        problems.append('_check_reminder() did not schedule a reminder within NEAR_DUE')
+    elif cog._check_reminder(near, now=now):
+        problems.append('_check_reminder() scheduled the same reminder twice')
+    cog.cancel_reminder(-2)
+
+    return problems
+
+
+def report(sim: Simulation, cog: Reminders, conn: sqlite3.Connection,
+           elapsed: float) -> list[str]:
+    problems = []
+    lags = []
+    for reminder_id, due in sim.due.items():
+        sends = sim.deliveries.get(reminder_id, [])
+        if len(sends) > 1:
+            problems.append(f'reminder {reminder_id} was sent {len(sends)} times')
+        for sent_at in sends:
+            lag = (sent_at - due).total_seconds()
+            if lag < 0:
+                problems.append(f'reminder {reminder_id} was sent {-lag:.1f}s early')
+            lags.append(lag)
+
+    missing = len(sim.due) - len(sim.deliveries) - cog.metrics.dead_lettered
+    if missing > 0:
+        problems.append(f'{missing:,} reminders were never delivered')
+
+    remaining = conn.execute('SELECT COUNT(*) FROM reminder').fetchone()[0]
+    if remaining:
+        problems.append(f'{remaining:,} reminder rows were left in the database')
+
+    if sim.dead_workers:
+        problems.append(f'{sim.dead_workers} delivery worker(s) died')
+    if sim.stuck_channels:
+        problems.append(f'{sim.stuck_channels} channel(s) were left with pending jobs')
+
+    n = len(sim.due)
+    print(f'reminders:            {n:,}')
+    print(f'delivered:            {len(sim.deliveries):,}')
+    print(f'dead-lettered:        {cog.metrics.dead_lettered:,}')
+    print(f'failed attempts:      {cog.metrics.failures:,}')
+    if sim.args.dead_letter_failures:
+        print(f'failed dead-letters:  {sim.dead_letter_failures:,}')
+    print(f'wall time:            {elapsed:.2f}s ({elapsed / n * 1e6:.1f}us per reminder)')
+    if sim.sweep_times:
+        print('sweep time:           mean {:.2f}ms, max {:.2f}ms over {} sweeps'.format(
+            statistics.fmean(sim.sweep_times) * 1000,
+            max(sim.sweep_times) * 1000, len(sim.sweep_times)
+        ))
+    if sim.bytes_per_reminder is not None:
+        print(f'memory per pending:   {sim.bytes_per_reminder:,.0f} bytes')
+    if lags:
+        quantiles = statistics.quantiles(lags, n=100)
+        print('delivery lag:         p50 {:.3f}s, p95 {:.3f}s, p99 {:.3f}s, max {:.3f}s'.format(
+            quantiles[49], quantiles[94], quantiles[98], max(lags)
+        ))
+        if sim.failure_rate == 0 and max(lags) > sim.args.max_lag:
+            problems.append(
+                f'maximum delivery lag of {max(lags):.3f}s '
+                f'exceeded {sim.args.max_lag}s'
+            )
+
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--reminders', type=int, default=100_000)
+    parser.add_argument('--hours', type=float, default=2,
+                        help='The time span that reminders are due over.')
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--channels', type=int, default=500)
+    parser.add_argument('--failure-rate', type=float, default=0,
+                        help='The probability of a message failing to send.')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='The simulated time taken to send a message.')
+    parser.add_argument('--max-lag', type=float, default=5,
+                        help='The maximum lag allowed without send failures.')
+    parser.add_argument('--dead-letter-failures', type=int, default=0,
+                        help='The number of dead-letter writes that fail.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    loop = VirtualClockLoop()
+    asyncio.set_event_loop(loop)
+    clock = VirtualClock(loop, discord.utils.utcnow().replace(microsecond=0))
+    sim = Simulation(args, clock)
+
+    conn = create_database()
+    sim.populate(conn)
+
+    with mock.patch('discord.utils.utcnow', clock.utcnow):
+        start = time.perf_counter()
+        cog = loop.run_until_complete(sim.run(conn))
+        elapsed = time.perf_counter() - start
+
+        problems = check_scheduling(cog, clock)
+    problems.extend(report(sim, cog, conn, elapsed))
+    loop.close()
+
+    for p in problems[:20]:
+        print('FAIL:', p)
+    if problems:
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Compares the text statistics used by the frequencyanalysis and
+wordcount commands against the per-letter and per-character loops
+they replaced, on generated text the size of a large attachment.
+
+Usage:
+    python -m benchmarks.textstats [--megabytes MB] [--repeat N]
+
+"""
+import argparse
+import collections
+import random
+import string
+import time
+
+from bot.cogs.graphing import textstats
+
+WORDS = (
+    'the of and to in is you that it he was for on are as with his they '
+    "i at be this have from or one had by word but not what all were we "
+    "when your can said there use an each which she do how their if don't "
+    "café naïve résumé über straße 日本語 привет it's o'clock"
+).split()
+PUNCTUATION = ' ' * 12 + '\n,.!?'
+
+
+def make_text(size: int) -> str:
+    """Generate roughly `size` characters of word-like text."""
+    parts = []
+    length = 0
+    while length < size:
+        word = random.choice(WORDS)
+        if random.random() < 0.05:
+            word = word.capitalize()
+        parts.append(word)
+        parts.append(random.choice(PUNCTUATION))
+        length += len(word) + 1
+    return ''.join(parts)
+
+
+def legacy_letters(text: str) -> list[int]:
+    text = text.lower()
+    return [text.count(c) for c in string.ascii_lowercase]
+
+
+def legacy_words(text: str) -> collections.Counter:
+    text = text.lower()
+
+    alphabet = frozenset(string.ascii_lowercase)
+    chars_after_start = frozenset("'")
+    words = collections.Counter()
+
+    last_i = 0
+    reading_word = False
+    for i, c in enumerate(text):
+        if c in alphabet or reading_word and c in chars_after_start:
+            reading_word = True
+        else:
+            if reading_word:
+                words[text[last_i:i]] += 1
+            last_i = i + 1
+            reading_word = False
+    else:
+        if reading_word:
+            words[text[last_i:]] += 1
+
+    return words
+
+
+def measure(name: str, func, text: str, repeat: int):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - start)
+    rate = len(text) / best / 1_000_000
+    print(f'{name:<28} {best * 1000:>10,.1f} ms {rate:>10,.1f} Mchar/s')
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--megabytes', type=float, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_text(int(args.megabytes * 1_000_000))
+    print(f'{len(text):,} characters, {len(text.encode()):,} bytes')
+
+    old, old_letters = measure('legacy letters', legacy_letters, text, args.repeat)
+    new, new_letters = measure(
+        'letter_histogram', textstats.letter_histogram, text, args.repeat
+    )
+    assert list(new_letters) == old_letters
+    print(f'letters speedup: {old / new:.1f}x')
+
+    old, old_words = measure('legacy words', legacy_words, text, args.repeat)
+    new, stats = measure(
+        'TextStats(words)', textstats.TextStats.from_text, text, args.repeat
+    )
+    assert stats.words == old_words
+    print(f'words speedup: {old / new:.1f}x')
+
+    def everything(text):
+        return textstats.TextStats.from_text(
+            text, bigrams=True, unicode_letters=True
+        )
+
+    measure('TextStats(all options)', everything, text, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,28 +3,103 @@
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at http://mozilla.org/MPL/2.0/.
 import asyncio
+import collections
+import datetime
 import logging
-from typing import Any
+import time
+from typing import Collection
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 
-from bot import utils
+from bot import errors
 from main import TheGameBot
 
 logger = logging.getLogger('discord')
 
 
 class DatabaseEvents(commands.Cog):
-    """Event listeners managing the database."""
+    """Event listeners managing the database.
+
+    Guild and member removals are applied as they happen. Anything missed
+    while the bot was offline is caught by a periodic sweep which pages
+    through a bounded chunk of rows at a time, remembering which tag
+    authors were verified in the `member_check` table so they are not
+    re-checked until `recheck_days` have passed.
+
+    Member removals are buffered per guild for `removal_debounce` seconds
+    and applied together, so a prune does not issue several writes
+    for every member that left.
+
+    """
+
+    SWEEP_INTERVAL = 10
+    SWEEP_CHUNK_SIZE = 200
+    SWEEP_TIME_BUDGET = 5
+    RECHECK_DAYS = 7
+
+    MEMBER_QUERY_BATCH = 100  # the gateway's limit for user_ids
+    MEMBER_QUERY_CONCURRENCY = 4
+    # Request the whole member list instead of querying in batches
+    # when at least this fraction of a guild's members need resolving
+    CHUNK_THRESHOLD = 0.1
+
+    REMOVAL_DEBOUNCE = 2
 
     def __init__(self, bot: TheGameBot):
         self.bot = bot
+        # The last guild ID checked by check_guild_tables()
+        self.guild_cursor = 0
+        # The last (guild_id, user_id) paged by check_tag_tables()
+        self.author_cursor = (0, 0)
+        # guild_id -> user IDs waiting to be un-authored
+        self.pending_removals: dict[int, set[int]] = {}
+        self.removal_tasks: dict[int, asyncio.Task] = {}
+
+    async def cog_load(self):
+        async with self.bot.db.connect(writing=True) as conn:
+            await conn.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS member_check (
+                    guild_id   INTEGER   NOT NULL
+                                         REFERENCES guild (guild_id) ON DELETE CASCADE,
+                    user_id    INTEGER   NOT NULL,
+                    checked_at TIMESTAMP NOT NULL,
+                    PRIMARY KEY (guild_id, user_id)
+                )
+                '''
+            )
+            await conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_tag_guild_user '
+                'ON tag (guild_id, user_id)'
+            )
 
-        # cleanup_tables() requires bot to be ready, however
-        # doing so in the cog_load() method would deadlock the
-        # loading process, so we use a task here
-        asyncio.create_task(self.cleanup_tables())
+        self.sweep.change_interval(
+            minutes=self.get_setting('sweep_interval', self.SWEEP_INTERVAL)
+        )
+        self.sweep.start()
+
+    async def cog_unload(self):
+        self.sweep.cancel()
+
+        for task in self.removal_tasks.values():
+            task.cancel()
+        self.removal_tasks.clear()
+
+        # Apply any removals still inside their debounce window
+        pending, self.pending_removals = self.pending_removals, {}
+        for guild_id, user_ids in pending.items():
+            await self.remove_member_authorship(guild_id, user_ids)
+
+    def get_setting(self, key: str, default):
+        """Gets a setting from the dbevents section, or the default
+        if the setting or the Settings cog is unavailable.
+        """
+        try:
+            settings = self.bot.get_settings()
+        except errors.SettingsNotFound:
+            return default
+        return settings.get('dbevents', key, default)
 
     async def delete_many(self, table_name: str, column: str, ids: list[int]):
         async with self.bot.db.connect(writing=True) as conn:
@@ -33,22 +108,31 @@ class DatabaseEvents(commands.Cog):
             )
             await conn.execute(query)
 
-    async def check_guild_tables(self) -> list[int]:
-        """Remove any guilds that the bot is no longer a part of.
+    async def check_guild_tables(self, limit: int) -> list[int]:
+        """Remove any guilds that the bot is no longer a part of,
+        checking up to `limit` guilds after the last one checked.
 
         This assumes that the bot is not sharded and
         the guilds intent is enabled.
 
         """
         to_remove = []
+        n_rows = 0
 
         async with self.bot.db.connect() as conn:
-            async with conn.execute(f'SELECT guild_id FROM guild') as c:
+            query = 'SELECT guild_id FROM guild WHERE guild_id > ? ORDER BY guild_id LIMIT ?'
+            async with conn.execute(query, self.guild_cursor, limit) as c:
                 while row := await c.fetchone():
+                    n_rows += 1
                     guild_id = row['guild_id']
+                    self.guild_cursor = guild_id
                     if self.bot.get_guild(guild_id) is None:
                         to_remove.append(guild_id)
 
+        if n_rows < limit:
+            # Reached the end of the table; start over next sweep
+            self.guild_cursor = 0
+
         logger.debug('Removing %d guilds from database', len(to_remove))
 
         if to_remove:
@@ -56,74 +140,334 @@ class DatabaseEvents(commands.Cog):
 
         return to_remove
 
-    async def check_tag_tables(self, cog) -> list[tuple[int, int]]:
+    async def query_author_page(
+        self, limit: int
+    ) -> list[tuple[int, int, datetime.datetime | None]]:
+        """Return up to `limit` tag and alias authors after the author
+        cursor in (guild_id, user_id) order, along with the time each
+        author was last verified.
+
+        Both tables are read through their (guild_id, user_id) indexes,
+        so each page costs the same no matter how many authors exist.
+
+        """
+        query = """
+        SELECT a.guild_id, a.user_id, m.checked_at FROM (
+            SELECT guild_id, user_id FROM tag
+            WHERE user_id IS NOT NULL AND (guild_id, user_id) > (?, ?)
+            UNION
+            SELECT guild_id, user_id FROM tag_alias
+            WHERE user_id IS NOT NULL AND (guild_id, user_id) > (?, ?)
+            ORDER BY guild_id, user_id
+            LIMIT ?
+        ) AS a
+        LEFT JOIN member_check AS m USING (guild_id, user_id)
+        ORDER BY a.guild_id, a.user_id
+        """
+        guild_id, user_id = self.author_cursor
+        async with self.bot.db.connect() as conn:
+            async with conn.execute(query, guild_id, user_id, guild_id, user_id, limit) as c:
+                return [
+                    (row['guild_id'], row['user_id'], row['checked_at'])
+                    for row in await c.fetchall()
+                ]
+
+    def advance_author_cursor(
+        self, page: list[tuple[int, int, datetime.datetime | None]],
+        limit: int, skipped: Collection[tuple[int, int]]
+    ):
+        """Move the author cursor past a page of authors.
+
+        If some authors in the page were skipped, e.g. because the sweep
+        ran out of time, the cursor stops just before the first of them
+        so the next sweep picks them up. The cursor always moves forward
+        though, so an author that can never be resolved cannot stall it.
+
+        """
+        keys = [(guild_id, user_id) for guild_id, user_id, _ in page]
+        if skipped:
+            first = keys.index(min(skipped))
+            if first > 0:
+                self.author_cursor = keys[first - 1]
+                return
+
+        if len(page) < limit:
+            # Reached the end of the tables; start over next sweep
+            self.author_cursor = (0, 0)
+        else:
+            self.author_cursor = keys[-1]
+
+    @staticmethod
+    def time_left(deadline: float | None) -> float | None:
+        """Return the seconds left until a `time.monotonic()` deadline,
+        or None if there is no deadline.
+        """
+        if deadline is None:
+            return None
+        return max(0., deadline - time.monotonic())
+
+    async def resolve_members(
+        self, guild: discord.Guild, user_ids: list[int],
+        *, deadline: float | None = None
+    ) -> tuple[set[int], set[int]]:
+        """Determine which users are members of a guild using as few
+        gateway requests as possible.
+
+        Users that cannot be resolved, e.g. because a member query
+        timed out or the deadline passed, are left out of both sets.
+
+        :param deadline:
+            The `time.monotonic()` time at which any requests still
+            in progress are abandoned.
+        :returns: A tuple of the user IDs that are members
+            and the user IDs that are not.
+
+        """
+        present = {user_id for user_id in user_ids if guild.get_member(user_id)}
+        missing = [user_id for user_id in user_ids if user_id not in present]
+        if not missing:
+            return present, set()
+
+        if not guild.chunked and len(missing) >= (guild.member_count or 0) * self.CHUNK_THRESHOLD:
+            try:
+                await asyncio.wait_for(guild.chunk(), self.time_left(deadline))
+            except asyncio.TimeoutError:
+                logger.debug('Ran out of time chunking guild %d', guild.id)
+                return present, set()
+
+        if guild.chunked:
+            # The member cache is complete, so anyone missing has left
+            present.update(user_id for user_id in missing if guild.get_member(user_id))
+            return present, set(missing) - present
+
+        absent = set()
+        batch_size = self.MEMBER_QUERY_BATCH
+        for i in range(0, len(missing), batch_size):
+            batch = missing[i:i + batch_size]
+            try:
+                members = await asyncio.wait_for(
+                    guild.query_members(user_ids=batch, limit=len(batch)),
+                    self.time_left(deadline)
+                )
+            except asyncio.TimeoutError:
+                if self.time_left(deadline) == 0:
+                    logger.debug(
+                        'Ran out of time querying members in guild %d '
+                        '(%d left unresolved)', guild.id, len(missing) - i
+                    )
+                    break
+                logger.warning(
+                    'Timed out querying %d members in guild %d',
+                    len(batch), guild.id
+                )
+                continue
+
+            found = {m.id for m in members}
+            present.update(found)
+            absent.update(user_id for user_id in batch if user_id not in found)
+
+        return present, absent
+
+    async def check_tag_tables(
+        self, limit: int, deadline: float
+    ) -> list[tuple[int, int]]:
         """Remove user IDs from tags where the user is
         no longer a part of the guild.
+
+        Up to `limit` authors are paged through after the last sweep,
+        and the ones not verified within `recheck_days` are resolved
+        grouped by guild so that members can be resolved in bulk. Once `time.monotonic()` passes
+        the given deadline, any member requests in progress are abandoned
+        and the authors not yet resolved are left for the next sweep.
+        The results gathered so far are still written, which is bounded
+        by `limit` rather than the deadline.
+
         """
-        authors = set()
-        authors_to_remove = []
+        if self.time_left(deadline) == 0:
+            return []
 
-        # Iterate through authors of tags/aliases and find
-        # which authors are no longer in the guild
-        async with self.bot.db.connect() as conn:
-            async with conn.execute(
-                    f'SELECT DISTINCT guild_id, user_id FROM tag') as c:
-                while row := await c.fetchone():
-                    authors.add((row['guild_id'], row['user_id']))
+        now = discord.utils.utcnow().replace(tzinfo=None)
+        recheck = datetime.timedelta(
+            days=self.get_setting('recheck_days', self.RECHECK_DAYS)
+        )
 
-            async with conn.execute(
-                    f'SELECT DISTINCT guild_id, user_id FROM tag_alias') as c:
-                while row := await c.fetchone():
-                    authors.add((row['guild_id'], row['user_id']))
+        page = await self.query_author_page(limit)
+        before = now - recheck
+        guild_authors: dict[int, list[int]] = collections.defaultdict(list)
+        for guild_id, user_id, checked_at in page:
+            if checked_at is None or checked_at < before:
+                guild_authors[guild_id].append(user_id)
 
-        for guild_id, user_id in authors:
-            if user_id is None:  # un-claimed tag
-                continue
+        authors_to_remove = []
+        verified = []
+        skipped = {
+            (guild_id, user_id)
+            for guild_id, user_ids in guild_authors.items()
+            for user_id in user_ids
+        }
+        semaphore = asyncio.Semaphore(self.get_setting(
+            'member_query_concurrency', self.MEMBER_QUERY_CONCURRENCY
+        ))
 
+        async def verify_guild(guild_id: int, user_ids: list[int]):
             guild = self.bot.get_guild(guild_id)
             if guild is None:
-                # NOTE: this shouldn't happen after checking guild table
-                continue
+                # NOTE: left for check_guild_tables() to remove
+                skipped.difference_update((guild_id, user_id) for user_id in user_ids)
+                return
 
-            member = await utils.getch_member(guild, user_id)
-            if member is None:
-                authors_to_remove.append((guild_id, user_id))
+            async with semaphore:
+                if self.time_left(deadline) == 0:
+                    return
 
-        for key in authors_to_remove:
-            await cog.tags.unauthor_tags(*key)
-            await cog.tags.unauthor_aliases(*key)
+                start = time.perf_counter()
+                present, absent = await self.resolve_members(
+                    guild, user_ids, deadline=deadline
+                )
+                logger.debug(
+                    'Verified %d tag authors in guild %d in %.3fs (%d left)',
+                    len(present) + len(absent), guild_id,
+                    time.perf_counter() - start, len(absent)
+                )
+
+            verified.extend((guild_id, user_id, now) for user_id in present)
+            authors_to_remove.extend((guild_id, user_id) for user_id in absent)
+            skipped.difference_update((guild_id, user_id) for user_id in present | absent)
+
+        await asyncio.gather(*(
+            verify_guild(guild_id, user_ids)
+            for guild_id, user_ids in guild_authors.items()
+        ))
+
+        if verified:
+            async with self.bot.db.connect(writing=True) as conn:
+                await conn.executemany(
+                    'INSERT OR REPLACE INTO member_check '
+                    '(guild_id, user_id, checked_at) VALUES (?, ?, ?)',
+                    verified
+                )
+
+        guild_removals: dict[int, list[int]] = collections.defaultdict(list)
+        for guild_id, user_id in authors_to_remove:
+            guild_removals[guild_id].append(user_id)
+        for guild_id, user_ids in guild_removals.items():
+            await self.remove_member_authorship(guild_id, user_ids)
+
+        self.advance_author_cursor(page, limit, skipped)
+
+        logger.debug(
+            'Verified %d tag authors, %d no longer in their guild',
+            len(verified), len(authors_to_remove)
+        )
 
         return authors_to_remove
 
-    async def cleanup_tables(self):
-        """Update the tables to match guild/member changes."""
-        await self.bot.wait_until_ready()
+    async def remove_member_authorship(self, guild_id: int, user_ids: Collection[int]):
+        """Un-author several members' tags and aliases in a guild
+        and forget that they were verified.
 
-        # Make sure this only happens once on startup
-        if self.bot.dbevents_cleaned_up:
-            return
+        This has the same effect as calling `unauthor_tags()` and
+        `unauthor_aliases()` for each member, but is done with
+        one set-based statement per table.
+
+        """
+        async with self.bot.db.connect(writing=True) as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    'CREATE TEMP TABLE IF NOT EXISTS removed_member '
+                    '(user_id INTEGER PRIMARY KEY)'
+                )
+                await conn.executemany(
+                    'INSERT OR IGNORE INTO temp.removed_member (user_id) VALUES (?)',
+                    [(int(user_id),) for user_id in user_ids]
+                )
+
+                for table in ('tag', 'tag_alias'):
+                    await conn.execute(
+                        f"""
+                        UPDATE {table} SET user_id = NULL WHERE guild_id = ?
+                        AND user_id IN (SELECT user_id FROM temp.removed_member)
+                        """,
+                        guild_id
+                    )
+                await conn.execute(
+                    """
+                    DELETE FROM member_check WHERE guild_id = ?
+                    AND user_id IN (SELECT user_id FROM temp.removed_member)
+                    """,
+                    guild_id
+                )
+
+                await conn.execute('DELETE FROM temp.removed_member')
+
+    async def flush_removals_later(self, guild_id: int):
+        """Wait for the debounce window to pass before
+        applying a guild's buffered member removals.
+        """
+        await asyncio.sleep(self.get_setting('removal_debounce', self.REMOVAL_DEBOUNCE))
+
+        # Removals arriving after this point start a new window
+        del self.removal_tasks[guild_id]
+        user_ids = self.pending_removals.pop(guild_id)
+
+        try:
+            await self.remove_member_authorship(guild_id, user_ids)
+        except Exception:
+            logger.exception(
+                'Failed to un-author %d removed members in guild %d',
+                len(user_ids), guild_id
+            )
+        else:
+            logger.debug(
+                'Un-authored %d removed members in guild %d',
+                len(user_ids), guild_id
+            )
+
+    @tasks.loop(minutes=SWEEP_INTERVAL)
+    async def sweep(self):
+        """Reconcile a chunk of the tables with guild/member changes
+        that may have been missed while the bot was offline.
+
+        Errors are logged instead of being raised, since an uncaught
+        error would stop every later sweep.
+
+        """
+        limit = self.get_setting('sweep_chunk_size', self.SWEEP_CHUNK_SIZE)
+        budget = self.get_setting('sweep_time_budget', self.SWEEP_TIME_BUDGET)
+        # Includes the time spent checking guilds
+        deadline = time.monotonic() + budget
 
-        deleted = False
         intents = self.bot.intents
-        if intents.guilds:
-            logger.debug('Cleaning up guild tables')
-            deleted = bool(await self.check_guild_tables()) or deleted
-        if intents.guilds and intents.members:
-            cog: Any = self.bot.get_cog('Tags')
-            if cog is not None:
-                logger.debug('Cleaning up tag tables')
-                deleted = bool(await self.check_tag_tables(cog)) or deleted
-
-        self.bot.dbevents_cleaned_up = True
-        if deleted:
-            await self.bot.db.vacuum()
+        try:
+            if intents.guilds:
+                logger.debug('Sweeping guild tables')
+                await self.check_guild_tables(limit)
+            if intents.guilds and intents.members:
+                if self.bot.get_cog('Tags') is not None:
+                    logger.debug('Sweeping tag tables')
+                    await self.check_tag_tables(limit, deadline)
+        except Exception:
+            logger.exception('Failed to sweep the database; retrying next sweep')
+
+    @sweep.before_loop
+    async def before_sweep(self):
+        await self.bot.wait_until_ready()
+
+    @commands.Cog.listener('on_guild_remove')
+    async def remove_guild(self, guild: discord.Guild):
+        await self.delete_many('guild', 'guild_id', [guild.id])
 
     @commands.Cog.listener('on_member_remove')
     async def update_tags_on_removed_member(self, member: discord.Member):
-        cog: Any = self.bot.get_cog('Tags')
-        if cog is not None:
-            await cog.tags.unauthor_tags(member.guild.id, member.id)
-            await cog.tags.unauthor_aliases(member.guild.id, member.id)
+        if self.bot.get_cog('Tags') is None:
+            return
+
+        guild_id = member.guild.id
+        self.pending_removals.setdefault(guild_id, set()).add(member.id)
+        if guild_id not in self.removal_tasks:
+            self.removal_tasks[guild_id] = asyncio.create_task(
+                self.flush_removals_later(guild_id)
+            )
 
 
 async def setup(bot: TheGameBot):
@@ -47,6 +47,23 @@ class MSCell(enum.Flag):
         return ' '
 
 
+_MINE = MSCell.MINE.value
+_VISIBLE = MSCell.VISIBLE.value
+_FAIL = MSCell.FAIL.value
+_FLAG = MSCell.FLAG.value
+_HIDDEN_MASK = _VISIBLE | _FLAG
+# Cells with neither bit set can be clicked
+
+_CELLS = tuple(MSCell(n) for n in range(8))
+# Maps each cell's value back to its enum member
+_SYMBOLS = tuple(
+    str(cell) if str(cell) != ' ' else str(n or ' ')
+    for n in range(9) for cell in _CELLS
+)
+# Maps each cell's value plus 8 times its neighboring mines
+# to the symbol it is rendered with
+
+
 class MSStatus(enum.Enum):
     START = enum.auto()
     ONGOING = enum.auto()
@@ -61,6 +78,17 @@ class MSStatus(enum.Enum):
 class MSGame:
     """A standard minesweeper game.
 
+    The board is stored as a flat bytearray of :class:`MSCell` values
+    in row-major order, alongside the number of mines neighboring each
+    cell which is computed once when the mines are placed.
+
+    Every change to a cell goes through :meth:`_set()`, which keeps
+    the game's counters up to date along with the frontier, i.e. the
+    revealed cells that still have clickable neighbors. This lets the
+    status, flag count and mass reveal be checked without scanning
+    the whole board. It also clears the cached rendering of the cell's
+    row, so each render only redraws the rows changed since the last.
+
     Args:
         y_size (int)
         x_size (int): The size of the board (positive only).
@@ -77,29 +105,59 @@ class MSGame:
         elif x_size > len(self.X_COORDS):
             raise ValueError('x_size exceeds number of labels available')
 
-        self._board: list[list[MSCell]] = [
-            [MSCell.EMPTY] * x_size for _ in range(y_size)
-        ]
+        self._y_size = y_size
+        self._x_size = x_size
+        self._cells = bytearray(y_size * x_size)
+        self._counts = bytearray(y_size * x_size)
+        self._neighbors: tuple[tuple[int, ...], ...] = tuple(
+            tuple(
+                ny * x_size + nx
+                for ny, nx in self.yield_neighbors_pos(y, x)
+            )
+            for y in range(y_size) for x in range(x_size)
+        )
+        self._started = False
+        self._exploded = False
         self.n_mines = n_mines or self.optimal_mine_count(y_size, x_size)
 
+        self._n_revealed = 0
+        self._n_flagged = 0
+        self._n_clickable = len(self._cells)
+        self._n_hidden_safe = len(self._cells) - self.n_mines
+        # The number of hidden cells without a mine, set once mines are placed
+
+        self._neighbor_flags = bytearray(len(self._cells))
+        self._neighbor_clickable = bytearray(map(len, self._neighbors))
+        self._frontier: set[int] = set()
+        self._chordable: set[int] = set()
+        # Frontier cells where the neighboring flags match the neighboring mines
+
+        self._rows: list[Optional[str]] = [None] * y_size
+        # The rendered symbols of each row, or None if the row changed
+        self._board_rows: list[Optional[tuple[MSCell, ...]]] = [None] * y_size
+        self._board: Optional[tuple[tuple[MSCell, ...], ...]] = None
+        # The cells of each row and the whole board, or None if they changed
+
     def yield_cells(self) -> Generator[MSCell, None, None]:
         """Yield each cell in the board in left-to-right, top-to-bottom order."""
-        for row in self._board:
-            for cell in row:
-                yield cell
+        cells = _CELLS
+        for value in self._cells:
+            yield cells[value]
 
     def yield_cells_with_pos(self) -> Generator[tuple[Coordinate, MSCell], None, None]:
         """Yield each coordinate and corresponding cell in the board
         in left-to-right, top-to-bottom order.
         """
-        for y, row in enumerate(self._board):
-            for x, cell in enumerate(row):
-                yield (y, x), cell
+        cells = _CELLS
+        for i, value in enumerate(self._cells):
+            yield divmod(i, self._x_size), cells[value]
+
+    def get_cell(self, y: int, x: int) -> MSCell:
+        """Return the cell at a given coordinate."""
+        return _CELLS[self._cells[y * self._x_size + x]]
 
     def can_click(self, y: int, x: int) -> bool:
-        cell = self._board[y][x]
-        return not cell & MSCell.VISIBLE and not cell & MSCell.FLAG
-        
+        return not self._cells[y * self._x_size + x] & _HIDDEN_MASK
 
     def click(self, y: int, x: int, *, simulate: bool = False) -> bool:
         """Reveal a cell and potentially its neighbors (i.e. left-clicking).
@@ -115,24 +173,30 @@ class MSGame:
             bool: True if a mine was NOT revealed, False otherwise.
 
         """
-        def reveal(y: int, x: int) -> bool:
-            if not self.can_click(y, x):
-                return True
+        i = y * self._x_size + x
+        if simulate:
+            return not self._cells[i] & _MINE
+        elif not self._started:
+            self.start(y, x)
 
-            cell = self._board[y][x]
-            self._board[y][x] |= MSCell.VISIBLE
+        if self._cells[i] & _HIDDEN_MASK:
+            return True
 
-            no_mine = not cell & MSCell.MINE
-            if no_mine and self.neighboring_mines(y, x) == 0:
-                for neighbor in self.yield_neighbors_pos(y, x):
-                    reveal(*neighbor)
-            return no_mine
+        cells, counts, neighbors = self._cells, self._counts, self._neighbors
+        self._set(i, cells[i] | _VISIBLE)
+        if cells[i] & _MINE:
+            return False
 
-        if simulate:
-            return not self._board[y][x] & MSCell.MINE
-        elif self.get_status() == MSStatus.START:
-            self.start(y, x)
-        return reveal(y, x)
+        # Flood fill outwards from cells without any neighboring mines
+        stack = [i] if not counts[i] else []
+        while stack:
+            for n in neighbors[stack.pop()]:
+                if not cells[n] & _HIDDEN_MASK:
+                    # Cells next to an empty cell can't be mines
+                    self._set(n, cells[n] | _VISIBLE)
+                    if not counts[n]:
+                        stack.append(n)
+        return True
 
     def click_neighbors(self, y: int, x: int, *, simulate: bool = False) -> bool:
         """Reveal the neighboring cells of a given coordinate
@@ -152,13 +216,14 @@ class MSGame:
 
         """
         neighbors = [
-            coords for coords in self.yield_neighbors_pos(y, x)
-            if self.can_click(*coords)
+            divmod(n, self._x_size)
+            for n in self._neighbors[y * self._x_size + x]
+            if not self._cells[n] & _HIDDEN_MASK
         ]
 
         # If there is a mine, only click that cell
         for ny, nx in neighbors:
-            if self._board[ny][nx] & MSCell.MINE:
+            if self._cells[ny * self._x_size + nx] & _MINE:
                 return self.click(ny, nx, simulate=simulate)
 
         for coords in neighbors:
@@ -167,45 +232,96 @@ class MSGame:
 
     def flag(self, y: int, x: int):
         """Add or remove a flag on a cell (i.e. right-clicking)."""
-        self._board[y][x] ^= MSCell.FLAG
+        i = y * self._x_size + x
+        self._set(i, self._cells[i] ^ _FLAG)
 
     def get_status(self) -> MSStatus:
         """Return the game's current status."""
-        all_found = True
-        has_mines = False
-
-        for cell in self.yield_cells():
-            if cell == MSCell.FAIL:
-                return MSStatus.FAIL
-            elif cell & MSCell.MINE:
-                has_mines = True
-            elif not cell & MSCell.VISIBLE:
-                all_found = False
-
-        if all_found:
-            return MSStatus.PASS
-        elif has_mines:
+        if self._exploded:
+            return MSStatus.FAIL
+        elif not self._started:
+            return MSStatus.START
+        elif self._n_hidden_safe:
             return MSStatus.ONGOING
-        return MSStatus.START
+        return MSStatus.PASS
+
+    def yield_chordable_pos(self) -> Generator[Coordinate, None, None]:
+        """Yield the coordinates of revealed cells that have as many
+        neighboring flags as neighboring mines and still have clickable
+        neighbors, in left-to-right, top-to-bottom order.
+
+        These are the cells where :meth:`click_neighbors()` would
+        reveal something without hitting a correctly flagged mine.
+
+        """
+        for i in sorted(self._chordable):
+            yield divmod(i, self._x_size)
+
+    def yield_frontier_pos(self) -> Generator[Coordinate, None, None]:
+        """Yield the coordinates of revealed cells that still have
+        clickable neighbors, in left-to-right, top-to-bottom order.
+        """
+        for i in sorted(self._frontier):
+            yield divmod(i, self._x_size)
+
+    def _set(self, i: int, value: int):
+        """Change the value of a cell, updating the counters
+        and frontier affected by the change.
+        """
+        old = self._cells[i]
+        changed = old ^ value
+        if not changed:
+            return
+        self._cells[i] = value
+
+        y = i // self._x_size
+        self._rows[y] = None
+        self._board_rows[y] = None
+        self._board = None
+
+        if changed & value & _VISIBLE:
+            self._n_revealed += 1
+            if value & _MINE:
+                self._exploded = True
+            else:
+                self._n_hidden_safe -= 1
+
+        flag_delta = 0
+        if changed & _FLAG:
+            flag_delta = 1 if value & _FLAG else -1
+            self._n_flagged += flag_delta
+
+        clickable_delta = (not value & _HIDDEN_MASK) - (not old & _HIDDEN_MASK)
+        self._n_clickable += clickable_delta
+
+        if flag_delta or clickable_delta:
+            for n in self._neighbors[i]:
+                self._neighbor_flags[n] += flag_delta
+                self._neighbor_clickable[n] += clickable_delta
+                self._update_frontier(n)
+        self._update_frontier(i)
+
+    def _update_frontier(self, i: int):
+        if self._cells[i] & _VISIBLE and self._neighbor_clickable[i]:
+            self._frontier.add(i)
+            flags = self._neighbor_flags[i]
+            if flags and flags == self._counts[i]:
+                self._chordable.add(i)
+            else:
+                self._chordable.discard(i)
+        else:
+            self._frontier.discard(i)
+            self._chordable.discard(i)
 
     def neighboring_mines(self, y: int, x: int) -> int:
         """Return the number of mines neighboring a given coordinate."""
-        return sum(
-            bool(self.board[y][x] & MSCell.MINE)
-            for y, x in self.yield_neighbors_pos(y, x)
-        )
+        return self._counts[y * self._x_size + x]
 
     def render(
         self, y_bounds: Optional[tuple[int, int]] = None,
         x_bounds: Optional[tuple[int, int]] = None,
         highlighted_column: Optional[int] = None
     ) -> str:
-        def highlighted_render(y, x):
-            char = self.render_cell(y, x)
-            if x == highlighted_column and char == MSCell.EMPTY:
-                char = '-'
-            return char
-
         if y_bounds is None:
             y_bounds = (0, self.y_size)
         if x_bounds is None:
@@ -218,37 +334,65 @@ class MSGame:
             ' '.join(self.X_COORDS[slice(*x_bounds)]),
             header_padding
         )]
-        for y, row in enumerate(itertools.islice(self._board, *y_bounds)):
+        x_start, x_end = x_bounds
+        for y in range(*y_bounds):
+            # Each symbol is followed by a space
+            row = self._render_row(y)[x_start * 2:x_end * 2 - 1]
+            if highlighted_column is not None \
+                    and x_start <= highlighted_column < x_end:
+                i = (highlighted_column - x_start) * 2
+                if row[i] == '_':
+                    row = row[:i] + '-' + row[i + 1:]
+
             y_name = self.Y_COORDS[y]
             lines.append(
                 '{}|{}|{}'.format(
                     f'{y_name:<{padding}}',
-                    ' '.join(
-                        [highlighted_render(y, x) for x in range(*x_bounds)]
-                    ),
+                    row,
                     f'{y_name:>{padding}}'
                 )
             )
         lines.append(lines[0])
         return '\n'.join(lines)
 
+    def _render_row(self, y: int) -> str:
+        """Return the symbols of an entire row separated by spaces,
+        re-rendering it only if it changed.
+        """
+        row = self._rows[y]
+        if row is None:
+            start = y * self._x_size
+            cells = self._cells[start:start + self._x_size]
+            counts = self._counts[start:start + self._x_size]
+            row = self._rows[y] = ' '.join([
+                _SYMBOLS[value | count << 3]
+                for value, count in zip(cells, counts)
+            ])
+        return row
+
     def render_cell(self, y: int, x: int) -> str:
         """Return the symbol for a given coordinate.
         Takes the number of neighboring mines into consideration.
         """
-        cell = str(self.board[y][x])
-        if cell == ' ':
-            cell = str(self.neighboring_mines(y, x) or ' ')
-        return cell
+        i = y * self._x_size + x
+        return _SYMBOLS[self._cells[i] | self._counts[i] << 3]
 
     def start(self, y: int, x: int):
         """Distribute mines across the board.
         This is automatically called on the first click.
         """
-        cells = [coord for coord, _ in self.yield_cells_with_pos()]
-        cells.remove((y, x))
-        for y, x in random.sample(cells, self.n_mines):
-            self._board[y][x] = MSCell.MINE
+        first = y * self._x_size + x
+        cells = [i for i in range(len(self._cells)) if i != first]
+        for i in random.sample(cells, self.n_mines):
+            # Mines don't affect whether a cell can be clicked,
+            # so this doesn't need to go through _set()
+            self._cells[i] |= _MINE
+            for n in self._neighbors[i]:
+                self._counts[n] += 1
+        self._started = True
+        self._rows = [None] * self._y_size
+        self._board_rows = [None] * self._y_size
+        self._board = None
 
     def yield_neighbors_pos(self, y: int, x: int) -> Generator[Coordinate, None, None]:
         """Return the coordinates of cells neighboring a given coordinate."""
@@ -259,24 +403,54 @@ class MSGame:
                 yield neighbor
 
     @property
-    def board(self) -> list[list[MSCell]]:
-        return self._board
+    def board(self) -> tuple[tuple[MSCell, ...], ...]:
+        """A read-only snapshot of the board's cells as a tuple of rows.
+
+        The snapshot is cached until a cell changes, after which only
+        the rows that changed are rebuilt. Use :meth:`get_cell` to read
+        single cells while the game is being modified.
+
+        """
+        board = self._board
+        if board is None:
+            cells, x_size, rows = _CELLS, self._x_size, self._board_rows
+            for y, row in enumerate(rows):
+                if row is None:
+                    start = y * x_size
+                    rows[y] = tuple([
+                        cells[value]
+                        for value in self._cells[start:start + x_size]
+                    ])
+            board = self._board = tuple(rows)
+        return board
+
+    @property
+    def n_clickable(self) -> int:
+        """The number of hidden cells without a flag."""
+        return self._n_clickable
 
     @property
     def n_flags(self) -> int:
         """The number of flags remaining that can be placed down."""
-        return self.n_mines - sum(
-            bool(cell & MSCell.FLAG)
-            for cell in self.yield_cells()
-        )
+        return self.n_mines - self._n_flagged
+
+    @property
+    def n_flagged(self) -> int:
+        """The number of flags that have been placed down."""
+        return self._n_flagged
+
+    @property
+    def n_revealed(self) -> int:
+        """The number of cells that have been revealed."""
+        return self._n_revealed
 
     @property
     def x_size(self) -> int:
-        return len(self._board[0])
+        return self._x_size
 
     @property
     def y_size(self) -> int:
-        return len(self._board)
+        return self._y_size
 
     @staticmethod
     def optimal_mine_count(y_size: int, x_size: int) -> int:
@@ -321,80 +495,64 @@ class CoordinateSelect(discord.ui.Select['MSView'], MSItem):
     def update(self):
         """Determine the axis that the user should input
         and update the available options.
+
+        Only the cells inside the view's viewport are considered.
         """
-        def make_option(label: str, cell: Optional[MSCell]) -> discord.SelectOption:
+        def make_option(label: str, y: Optional[int], x: int) -> discord.SelectOption:
             kwargs = {}
-            if cell is not None and cell & MSCell.FLAG:
+            if y is not None and game.get_cell(y, x) & MSCell.FLAG:
                 kwargs['emoji'] = '\N{TRIANGULAR FLAG ON POST}'
             return discord.SelectOption(label=label, **kwargs)
 
+        def is_valid(y: int, x: int) -> bool:
+            if game.get_cell(y, x) & MSCell.FLAG:
+                return view.flagging
+            return not flags_only and game.can_click(y, x)
+
         def get_x_options() -> list[discord.SelectOption]:
-            x_coords = range(*view.viewport[1])
-            min_y, max_y = view.viewport[0]
             choices = []
-            for x in x_coords:
-                # Count the number of cells that can be selected
-                n_valid = 0
-                last_y = last_cell = None
-                for y, row in enumerate(
-                        itertools.islice(view.game.board, min_y, max_y),
-                        start=min_y):
-                    cell = row[x]
-                    if str(cell) in valid:
-                        n_valid += 1
-                        last_y, last_cell = y, cell
-
-                if n_valid < 1:
-                    continue
-                elif n_valid == 1:
+            for x, rows in columns.items():
+                if len(rows) == 1:
                     # Column only has one selectable cell; use full coordinate
-                    label = MSGame.X_COORDS[x] + MSGame.Y_COORDS[last_y]
+                    label = MSGame.X_COORDS[x] + MSGame.Y_COORDS[rows[0]]
+                    choices.append(make_option(label, rows[0], x))
                 else:
                     # User needs to input Y axis afterwards
-                    label = MSGame.X_COORDS[x]
-                    last_cell = None
-                choices.append(make_option(label, last_cell))
-
+                    choices.append(make_option(MSGame.X_COORDS[x], None, x))
             return choices
 
         def get_y_options() -> list[discord.SelectOption]:
-            # pre-req: x_coord is not None
-            min_y, max_y = view.viewport[0]
-            x_name = MSGame.X_COORDS[view.x_coord]
-            choices = []
-            for y, row in enumerate(
-                    itertools.islice(view.game.board, min_y, max_y),
-                    start=min_y):
-                cell = row[view.x_coord]
-                if str(cell) in valid:
-                    label = x_name + MSGame.Y_COORDS[y]
-                    choices.append(make_option(label, cell))
-            return choices
+            x = view.x_coord
+            x_name = MSGame.X_COORDS[x]
+            return [
+                make_option(x_name + MSGame.Y_COORDS[y], y, x)
+                for y in columns.get(x, ())
+            ]
 
         def get_full_options() -> list[discord.SelectOption]:
-            choices = []
-            for x in range(*view.viewport[1]):
-                for y in range(*view.viewport[0]):
-                    cell = view.game.board[y][x]
-                    if str(cell) in valid:
-                        label = MSGame.X_COORDS[x] + MSGame.Y_COORDS[y]
-                        choices.append(make_option(label, cell))
-            return choices
+            return [
+                make_option(MSGame.X_COORDS[x] + MSGame.Y_COORDS[y], y, x)
+                for x, rows in columns.items()
+                for y in rows
+            ]
 
         view = self.view
+        game = view.game
 
-        # NOTE: cells are rendered before checking membership
-        # to make the logic more succinct
-        # (e.g. non-visible cells should be valid, empty or not)
-        valid = (MSCell.EMPTY,)
-        if view.flagging:
-            if view.game.n_flags <= 0:
-                valid = (MSCell.FLAG,)
-            else:
-                valid = (MSCell.EMPTY, MSCell.FLAG)
+        # Flagged cells can be selected to remove their flag,
+        # and hidden cells can be selected unless no flags are left
+        flags_only = view.flagging and game.n_flags <= 0
+
+        # Find the selectable rows of each column in the viewport
+        (min_y, max_y), (min_x, max_x) = view.viewport
+        columns: dict[int, list[int]] = {}
+        for x in range(min_x, max_x):
+            rows = [y for y in range(min_y, max_y) if is_valid(y, x)]
+            if rows:
+                columns[x] = rows
 
         prepend_cancel = False
-        if sum(str(cell) in valid for cell in view.game.yield_cells()) <= 25:
+        if sum(map(len, columns.values())) <= 25:
             # Enough select options for full coordinates
             axis = 'XY'
             options = get_full_options()
@@ -406,9 +564,10 @@ class CoordinateSelect(discord.ui.Select['MSView'], MSItem):
                 # caused the previous Y options to be invalidated
                 axis = 'X'
                 options = get_x_options()
+                view.x_coord = None
             else:
                 axis = 'Y'
-                options = y_options or get_y_options()
+                options = y_options
                 prepend_cancel = True
 
         bounds = ''
@@ -428,6 +587,11 @@ class CoordinateSelect(discord.ui.Select['MSView'], MSItem):
             )
 
         self.placeholder = f'Input {axis}-coordinate' + bounds
+        self.disabled = not options
+        if not options:
+            # Select menus need at least one option
+            self.placeholder = 'No cells to select here'
+            options = [discord.SelectOption(label='Cancel')]
         self.options = options
 
 
@@ -459,7 +623,7 @@ class MassRevealButton(discord.ui.Button['MSView'], MSItem):
         super().__init__(emoji='\N{BROOM}', style=discord.ButtonStyle.danger)
 
     async def callback(self, interaction: discord.Interaction):
-        valid = tuple(self.yield_valid_cells_pos())
+        valid = tuple(self.view.game.yield_chordable_pos())
 
         # If there is a mine, only click that cell
         for y, x in valid:
@@ -473,51 +637,89 @@ class MassRevealButton(discord.ui.Button['MSView'], MSItem):
         await self.view.update(interaction)
 
     def update(self):
-        n_valid = 0
-        maybe_valid: set[Coordinate] = set()
-        for coords in self.yield_valid_cells_pos():
-            maybe_valid.update(self.view.game.yield_neighbors_pos(*coords))
-        for coords in maybe_valid:
-            n_valid += self.view.game.can_click(*coords)
+        game = self.view.game
+        clickable: set[Coordinate] = set()
+        for coords in game.yield_chordable_pos():
+            clickable.update(
+                neighbor for neighbor in game.yield_neighbors_pos(*coords)
+                if game.can_click(*neighbor)
+            )
 
-        self.disabled = not n_valid
-        self.label = str(n_valid)
+        self.disabled = not clickable
+        self.label = str(len(clickable))
 
-    def yield_valid_cells_pos(self) -> Generator[Coordinate, None, None]:
-        board_copy = tuple(self.view.game.yield_cells_with_pos())
-        for coords, cell in board_copy:
-            if not cell & MSCell.VISIBLE:
-                continue
 
-            n_mines = n_flags = n_clickable = 0
-            for ny, nx in self.view.game.yield_neighbors_pos(*coords):
-                nc = self.view.game.board[ny][nx]
-                n_mines += bool(nc & MSCell.MINE)
-                n_flags += bool(nc & MSCell.FLAG)
-                n_clickable += self.view.game.can_click(ny, nx)
+class PanButton(discord.ui.Button['MSView'], MSItem):
+    """Move the viewport across a board that doesn't fit in it."""
 
-            if n_flags and n_clickable and n_mines == n_flags:
-                yield coords
+    def __init__(self, emoji: str, dy: int, dx: int):
+        super().__init__(emoji=emoji, style=discord.ButtonStyle.secondary, row=2)
+        self.dy = dy
+        self.dx = dx
+
+    async def callback(self, interaction: discord.Interaction):
+        self.view.pan(self.dy, self.dx)
+        await self.view.update(interaction)
+
+    def update(self):
+        (min_y, max_y), (min_x, max_x) = self.view.viewport
+        self.disabled = (
+            self.dy < 0 and min_y == 0
+            or self.dy > 0 and max_y == self.view.game.y_size
+            or self.dx < 0 and min_x == 0
+            or self.dx > 0 and max_x == self.view.game.x_size
+        )
 
 
 class MSView(TimeoutView, EditViewMixin):
     children: list[MSItem]
     message: discord.Message
 
+    VIEWPORT_HEIGHT = 10
+    # Constrain lines to keep message compact
+    VIEWPORT_WIDTH = 24
+    # 25 select options - 1 for Y-axis cancel button
+
     def __init__(self, player_ids: Optional[tuple[int]], *args, timeout, **kwargs):
         super().__init__(timeout=timeout)
         self.player_ids = player_ids
         self.start_time: datetime.datetime = discord.utils.utcnow()
 
         self.game = MSGame(*args, **kwargs)
-        self.viewport: tuple[tuple[int, int], tuple[int, int]] \
-            = ((0, self.game.y_size), (0, self.game.x_size))
+        self.viewport: tuple[tuple[int, int], tuple[int, int]] = (
+            (0, min(self.game.y_size, self.VIEWPORT_HEIGHT)),
+            (0, min(self.game.x_size, self.VIEWPORT_WIDTH))
+        )
         self.x_coord: Optional[int] = None
         self.flagging: bool = False
 
         self.add_item(CoordinateSelect())
         self.add_item(ClickToggle())
         self.add_item(MassRevealButton())
+        if self.game.y_size > self.VIEWPORT_HEIGHT:
+            self.add_item(PanButton('\N{UPWARDS BLACK ARROW}', -1, 0))
+            self.add_item(PanButton('\N{DOWNWARDS BLACK ARROW}', 1, 0))
+        if self.game.x_size > self.VIEWPORT_WIDTH:
+            self.add_item(PanButton('\N{LEFTWARDS BLACK ARROW}', 0, -1))
+            self.add_item(PanButton('\N{BLACK RIGHTWARDS ARROW}', 0, 1))
+
+    def pan(self, dy: int, dx: int):
+        """Move the viewport by half its size in the given directions,
+        stopping at the edges of the board.
+        """
+        def move(bounds: tuple[int, int], direction: int, size: int) -> tuple[int, int]:
+            start, end = bounds
+            length = end - start
+            start += direction * max(1, length // 2)
+            start = max(0, min(start, size - length))
+            return start, start + length
+
+        y_bounds, x_bounds = self.viewport
+        self.viewport = (
+            move(y_bounds, dy, self.game.y_size),
+            move(x_bounds, dx, self.game.x_size)
+        )
+        self.x_coord = None
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.bot:
@@ -607,14 +809,18 @@ class BoardSizeConverter(commands.Converter[tuple[int, int]]):
 
         x, y = (int(n) for n in m.groups())
 
-        if x > 24:
-            # 25 select options - 1 for Y-axis cancel button
+        # Boards larger than the viewport can be panned across,
+        # so the only limit is the number of coordinate labels
+        if not 0 < x <= len(MSGame.X_COORDS):
             raise commands.BadArgument(
-                'The board can only be up to 24 cells wide!')
-        elif y > 10:
-            # Constrain lines to keep message compact
+                'The board can only be 1 to {} cells wide!'.format(
+                    len(MSGame.X_COORDS)))
+        elif not 0 < y <= len(MSGame.Y_COORDS):
             raise commands.BadArgument(
-                'The board can only be up to 10 cells tall!')
+                'The board can only be 1 to {} cells tall!'.format(
+                    len(MSGame.Y_COORDS)))
+        elif x * y < 2:
+            raise commands.BadArgument('The board must have at least 2 cells!')
         return y, x
 
 
@@ -634,7 +840,8 @@ class _Minesweeper(commands.Cog):
         """Starts a game of minesweeper.
 
 players: A list of members that can play the game or "everyone".
-size: The size of the board (default: 15x10). Maximum size is 24x10."""
+size: The size of the board (default: 15x10). Maximum size is 26x26.
+Boards larger than 24x10 can be scrolled with the arrow buttons."""
         y_size, x_size = flags.size
         if 'everyone' in flags.players:
             player_ids = None
@@ -0,0 +1,11 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+# NOTE: render workers import the submodules of this package, so the
+# cog (and by extension main) is only imported when the extension is set up
+
+
+async def setup(bot):
+    from .cog import Graphing
+    await bot.add_cog(Graphing(bot))
@@ -0,0 +1,307 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Animations rendered across the render workers.
+
+Frames are rendered and compressed as still images in batches by the
+render workers. As each batch finishes, its frames are spliced into an
+animated PNG or WebP container in order, so only the compressed frames
+of the batches in flight are ever held in memory.
+
+Both formats store each frame with the same compressed data as a still
+image, so splicing only has to rewrite the chunk headers:
+
+- APNG: https://wiki.mozilla.org/APNG_Specification
+- WebP: https://developers.google.com/speed/webp/docs/riff_container
+
+"""
+import asyncio
+import collections
+import io
+import struct
+from typing import Any, Awaitable, Callable, Iterator, Literal, Sequence
+import zlib
+
+AnimationFormat = Literal['webp', 'apng']
+ANIMATION_FORMATS: tuple[AnimationFormat, ...] = ('webp', 'apng')
+
+FRAME_FORMATS: dict[AnimationFormat, str] = {'webp': 'webp', 'apng': 'png'}
+# The still image format each frame should be encoded with
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class AnimationTooLarge(Exception):
+    """Raised when an animation exceeds one of its budgets."""
+
+
+def iter_png_chunks(data: bytes) -> Iterator[tuple[bytes, bytes]]:
+    """Yield the type and data of each chunk in a PNG file."""
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError('not a PNG file')
+
+    i = len(PNG_SIGNATURE)
+    while i < len(data):
+        length, = struct.unpack_from('>I', data, i)
+        yield data[i + 4:i + 8], data[i + 8:i + 8 + length]
+        i += length + 12
+
+
+def iter_riff_chunks(data: bytes) -> Iterator[tuple[bytes, bytes]]:
+    """Yield the type and data of each chunk in a WebP file."""
+    if data[:4] != b'RIFF' or data[8:12] != b'WEBP':
+        raise ValueError('not a WebP file')
+
+    i = 12
+    while i < len(data):
+        length, = struct.unpack_from('<I', data, i + 4)
+        yield data[i:i + 4], data[i + 8:i + 8 + length]
+        i += 8 + length + length % 2
+
+
+class AnimationWriter:
+    """The base class for writing frames into an animation as they arrive.
+
+    :param fp: The binary file to write to. Must be seekable.
+    :param num_frames: The number of frames that will be written.
+    :param duration: The duration of each frame in milliseconds.
+    :param loop: The number of times to play the animation, or 0 to loop forever.
+
+    """
+    def __init__(self, fp: io.BufferedIOBase, num_frames: int, duration: int, loop=0):
+        self.fp = fp
+        self.num_frames = num_frames
+        self.duration = duration
+        self.loop = loop
+        self.frames_written = 0
+
+    @property
+    def size(self) -> int:
+        """The number of bytes written so far."""
+        return self.fp.tell()
+
+    def write_frame(self, data: bytes):
+        """Append a frame encoded as a still image."""
+        if self.frames_written >= self.num_frames:
+            raise ValueError(f'expected only {self.num_frames} frames')
+        self._write_frame(data)
+        self.frames_written += 1
+
+    def close(self):
+        """Finish writing the animation."""
+        if self.frames_written != self.num_frames:
+            raise ValueError(
+                f'expected {self.num_frames} frames but '
+                f'{self.frames_written} were written'
+            )
+        self._close()
+
+    def _write_frame(self, data: bytes):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+class APNGWriter(AnimationWriter):
+    """Writes PNG frames into an animated PNG."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.header: bytes | None = None
+        self.sequence = 0
+
+    def _write_chunk(self, type_: bytes, data: bytes):
+        self.fp.write(struct.pack('>I', len(data)))
+        self.fp.write(type_)
+        self.fp.write(data)
+        self.fp.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(type_))))
+
+    def _next_sequence(self) -> bytes:
+        sequence = struct.pack('>I', self.sequence)
+        self.sequence += 1
+        return sequence
+
+    def _write_frame(self, data: bytes):
+        chunks = list(iter_png_chunks(data))
+        header = chunks[0][1]
+        if self.header is None:
+            self.header = header
+            self.fp.write(PNG_SIGNATURE)
+            self._write_chunk(b'IHDR', header)
+            self._write_chunk(
+                b'acTL', struct.pack('>II', self.num_frames, self.loop)
+            )
+        elif header != self.header:
+            raise ValueError('every frame must have the same size and color type')
+
+        width, height = struct.unpack_from('>II', header)
+        self._write_chunk(b'fcTL', self._next_sequence() + struct.pack(
+            '>IIIIHHBB', width, height, 0, 0, self.duration, 1000, 0, 0
+        ))
+
+        for type_, chunk in chunks:
+            if type_ != b'IDAT':
+                continue
+            elif self.frames_written == 0:
+                # The first frame doubles as the default image
+                self._write_chunk(b'IDAT', chunk)
+            else:
+                self._write_chunk(b'fdAT', self._next_sequence() + chunk)
+
+    def _close(self):
+        self._write_chunk(b'IEND', b'')
+
+
+class WebPWriter(AnimationWriter):
+    """Writes WebP frames into an animated WebP."""
+    FRAME_CHUNKS = frozenset((b'ALPH', b'VP8 ', b'VP8L'))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.canvas: tuple[int, int] | None = None
+
+    def _write_chunk(self, type_: bytes, data: bytes):
+        self.fp.write(type_)
+        self.fp.write(struct.pack('<I', len(data)))
+        self.fp.write(data)
+        if len(data) % 2:
+            self.fp.write(b'\0')
+
+    @staticmethod
+    def _get_size(chunks: list[tuple[bytes, bytes]]) -> tuple[int, int]:
+        type_, data = chunks[0]
+        if type_ == b'VP8X':
+            width = int.from_bytes(data[4:7], 'little') + 1
+            height = int.from_bytes(data[7:10], 'little') + 1
+        elif type_ == b'VP8 ':
+            width, height = struct.unpack_from('<HH', data, 6)
+            width, height = width & 0x3FFF, height & 0x3FFF
+        elif type_ == b'VP8L':
+            bits, = struct.unpack_from('<I', data, 1)
+            width = (bits & 0x3FFF) + 1
+            height = (bits >> 14 & 0x3FFF) + 1
+        else:
+            raise ValueError(f'unexpected WebP chunk {type_!r}')
+        return width, height
+
+    def _write_frame(self, data: bytes):
+        chunks = list(iter_riff_chunks(data))
+        width, height = size = self._get_size(chunks)
+        if self.canvas is None:
+            self.canvas = size
+            self.fp.write(b'RIFF\0\0\0\0WEBP')  # size is filled in on close
+            self._write_chunk(b'VP8X', struct.pack(
+                '<I3s3s', 0x12,  # animation and alpha flags
+                (width - 1).to_bytes(3, 'little'),
+                (height - 1).to_bytes(3, 'little')
+            ))
+            self._write_chunk(b'ANIM', struct.pack('<IH', 0, self.loop))
+        elif size != self.canvas:
+            raise ValueError('every frame must have the same size')
+
+        frame = io.BytesIO()
+        frame.write(struct.pack(
+            '<3s3s3s3s3sB',
+            (0).to_bytes(3, 'little'), (0).to_bytes(3, 'little'),
+            (width - 1).to_bytes(3, 'little'),
+            (height - 1).to_bytes(3, 'little'),
+            self.duration.to_bytes(3, 'little'),
+            0b10  # don't blend with the previous frame
+        ))
+        for type_, chunk in chunks:
+            if type_ in self.FRAME_CHUNKS:
+                frame.write(type_)
+                frame.write(struct.pack('<I', len(chunk)))
+                frame.write(chunk)
+                if len(chunk) % 2:
+                    frame.write(b'\0')
+        self._write_chunk(b'ANMF', frame.getvalue())
+
+    def _close(self):
+        end = self.fp.tell()
+        self.fp.seek(4)
+        self.fp.write(struct.pack('<I', end - 8))
+        self.fp.seek(end)
+
+
+WRITERS: dict[AnimationFormat, type[AnimationWriter]] = {
+    'webp': WebPWriter,
+    'apng': APNGWriter
+}
+
+
+async def render_animation(
+    runner: Callable[..., Awaitable[list[bytes]]],
+    func: Callable[..., list[bytes]],
+    args: tuple,
+    frames: Sequence[Any],
+    *,
+    fmt: AnimationFormat,
+    duration: int,
+    batch_size: int,
+    max_batches: int,
+    max_size: int
+) -> io.BytesIO:
+    """Render an animation in batches and stream it into a file.
+
+    :param runner:
+        The function to render batches with, e.g. `RenderExecutor.run`.
+    :param func:
+        The render function. It is called as
+        `func(*args, batch, frame_format)` and should return
+        each frame in the batch as an encoded still image.
+    :param args: The arguments to pass to the render function.
+    :param frames: The parameters of each frame, e.g. the camera angle.
+    :param fmt: The animation format.
+    :param duration: The duration of each frame in milliseconds.
+    :param batch_size: The number of frames to render in each job.
+    :param max_batches:
+        The maximum number of batches to render concurrently.
+        Should be at least the number of render workers.
+    :param max_size: The maximum size of the animation in bytes.
+    :raises AnimationTooLarge:
+        The animation grew past `max_size` before it was finished.
+        Any batches still rendering are cancelled.
+
+    """
+    f = io.BytesIO()
+    writer = WRITERS[fmt](f, len(frames), duration)
+    frame_format = FRAME_FORMATS[fmt]
+
+    batches = iter(
+        frames[i:i + batch_size] for i in range(0, len(frames), batch_size)
+    )
+    pending: collections.deque[asyncio.Task[list[bytes]]] = collections.deque()
+
+    def submit_next():
+        batch = next(batches, None)
+        if batch is not None:
+            pending.append(asyncio.create_task(
+                runner(func, *args, batch, frame_format)
+            ))
+
+    try:
+        for _ in range(max(1, max_batches)):
+            submit_next()
+
+        while pending:
+            # Frames must be written in order, so wait on the oldest batch
+            for data in await pending[0]:
+                writer.write_frame(data)
+            pending.popleft()
+
+            if writer.size > max_size:
+                raise AnimationTooLarge(
+                    f'animation exceeded {max_size:,} bytes after '
+                    f'{writer.frames_written:,} frames'
+                )
+
+            submit_next()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    writer.close()
+    f.seek(0)
+    return f
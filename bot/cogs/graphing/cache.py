@@ -0,0 +1,252 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+import asyncio
+import collections
+import dataclasses
+import hashlib
+import logging
+import os
+from pathlib import Path
+import pickle
+from typing import Any, Awaitable, Callable, TypeVar
+
+T = TypeVar('T')
+
+logger = logging.getLogger('discord')
+
+
+@dataclasses.dataclass
+class RenderCacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.misses + self.coalesced
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of requests that did not need a new render."""
+        if not self.requests:
+            return 0.
+        return (self.hits + self.coalesced) / self.requests
+
+
+class RenderCache:
+    """A content-addressed cache for the results of deterministic renders.
+
+    Results are pickled and stored under a hash of the render function
+    and its inputs, first in an LRU memory tier and optionally in
+    a directory on disk. Both tiers evict their least recently used
+    entries once they exceed their size in bytes.
+
+    Concurrent requests for the same key are coalesced so that only
+    the first caller renders and the rest wait for its result.
+
+    :param max_memory: The maximum size of the memory tier in bytes.
+    :param disk_path:
+        The directory to store the disk tier in,
+        or None to disable the disk tier.
+    :param max_disk: The maximum size of the disk tier in bytes.
+
+    """
+    VERSION = 3
+    # Bump this when render output changes so old disk entries are ignored
+
+    def __init__(
+        self, max_memory: int,
+        disk_path: str | os.PathLike | None = None,
+        max_disk: int = 0
+    ):
+        self.max_memory = max_memory
+        self.memory: collections.OrderedDict[str, bytes] = collections.OrderedDict()
+        self.memory_size = 0
+
+        self.disk_path = Path(disk_path) if disk_path and max_disk > 0 else None
+        self.max_disk = max_disk
+        self.disk_index: collections.OrderedDict[str, int] = collections.OrderedDict()
+        self.disk_size = 0
+        if self.disk_path is not None:
+            self._load_disk_index()
+
+        self.in_flight: dict[str, asyncio.Future[bytes]] = {}
+        self.stats = RenderCacheStats()
+
+    @classmethod
+    def make_key(cls, func: Callable, *args, **kwargs) -> str:
+        """Return the key for a call to a render function."""
+        data = pickle.dumps(
+            (cls.VERSION, func.__module__, func.__qualname__,
+             args, sorted(kwargs.items())),
+            protocol=4
+        )
+        return hashlib.sha256(data).hexdigest()
+
+    async def get_or_render(self, key: str, render: Callable[[], Awaitable[T]]) -> T:
+        """Return the cached result for a key, calling the given
+        coroutine function to render it if it is not cached.
+        """
+        while True:
+            data = self._get_memory(key)
+            if data is None and self.disk_path is not None:
+                data = await self._read_disk(key)
+                if data is not None:
+                    self.stats.disk_hits += 1
+                    self._put_memory(key, data)
+            if data is not None:
+                self.stats.hits += 1
+                return pickle.loads(data)
+
+            fut = self.in_flight.get(key)
+            if fut is None:
+                break
+
+            try:
+                data = await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if fut.cancelled():
+                    # The caller rendering this was cancelled; try again
+                    continue
+                raise
+            self.stats.coalesced += 1
+            return pickle.loads(data)
+
+        self.stats.misses += 1
+        fut = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = fut
+        try:
+            result = await render()
+            data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # waiters may not exist; don't log it as unretrieved
+            raise
+        finally:
+            del self.in_flight[key]
+
+        fut.set_result(data)
+        self._put_memory(key, data)
+        if self.disk_path is not None:
+            await self._write_disk(key, data)
+
+        return result
+
+    async def run(
+        self, runner: Callable[..., Awaitable[T]],
+        func: Callable[..., Any], *args, **kwargs
+    ) -> T:
+        """A shorthand for rendering `func(*args, **kwargs)`
+        through `runner` (e.g. `RenderExecutor.run`) with caching.
+        """
+        key = self.make_key(func, *args, **kwargs)
+        return await self.get_or_render(key, lambda: runner(func, *args, **kwargs))
+
+    def _get_memory(self, key: str) -> bytes | None:
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory.move_to_end(key)
+        return data
+
+    def _put_memory(self, key: str, data: bytes):
+        if len(data) > self.max_memory:
+            return
+
+        old = self.memory.pop(key, None)
+        if old is not None:
+            self.memory_size -= len(old)
+
+        self.memory[key] = data
+        self.memory_size += len(data)
+        while self.memory_size > self.max_memory:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_size -= len(evicted)
+
+    def _get_disk_file(self, key: str) -> Path:
+        return self.disk_path / f'{key}.pickle'
+
+    def _load_disk_index(self):
+        self.disk_path.mkdir(parents=True, exist_ok=True)
+
+        entries = []
+        for entry in os.scandir(self.disk_path):
+            if entry.is_file() and entry.name.endswith('.pickle'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name.removesuffix('.pickle'), stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self.disk_index[key] = size
+            self.disk_size += size
+
+        self._unlink_files(self._evict_disk())
+
+    async def _read_disk(self, key: str) -> bytes | None:
+        if key not in self.disk_index:
+            return None
+
+        def read():
+            data = path.read_bytes()
+            os.utime(path)
+            return data
+
+        path = self._get_disk_file(key)
+        try:
+            data = await asyncio.to_thread(read)
+        except OSError:
+            if key in self.disk_index:
+                self.disk_size -= self.disk_index.pop(key)
+            return None
+
+        if key in self.disk_index:
+            self.disk_index.move_to_end(key)
+        return data
+
+    async def _write_disk(self, key: str, data: bytes):
+        if len(data) > self.max_disk:
+            return
+
+        def write():
+            # Write to a temporary file first so readers never see partial data
+            tmp = path.with_suffix('.tmp')
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+
+        path = self._get_disk_file(key)
+        try:
+            await asyncio.to_thread(write)
+        except OSError as e:
+            logger.warning('Could not write render cache entry %s: %s', key, e)
+            return
+
+        self.disk_size -= self.disk_index.pop(key, 0)
+        self.disk_index[key] = len(data)
+        self.disk_size += len(data)
+
+        evicted = self._evict_disk()
+        if evicted:
+            await asyncio.to_thread(self._unlink_files, evicted)
+
+    def _evict_disk(self) -> list[Path]:
+        """Remove the least recently used entries from the disk index
+        until it fits, returning the files that should be deleted.
+        """
+        evicted = []
+        while self.disk_size > self.max_disk and self.disk_index:
+            key, size = self.disk_index.popitem(last=False)
+            self.disk_size -= size
+            evicted.append(self._get_disk_file(key))
+        return evicted
+
+    @staticmethod
+    def _unlink_files(paths: list[Path]):
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError:
+                pass
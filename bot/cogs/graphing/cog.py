@@ -0,0 +1,879 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+import asyncio
+import contextlib
+import dataclasses
+import datetime
+import decimal
+from decimal import Decimal
+import time
+from typing import Literal
+
+import aiohttp
+import discord
+from discord.ext import commands
+import humanize
+import matplotlib
+from matplotlib.axes import Axes
+from matplotlib import dates as mdates
+
+from bot import errors
+from main import Context, TheGameBot
+from . import plots
+from .animate import AnimationTooLarge, render_animation
+from .cache import RenderCache
+from .executor import (
+    RenderExecutor, RenderJobTooLarge, RenderTimingStats, format_stages
+)
+from .ingest import AttachmentTooLarge, read_attachment, read_history
+from .interest import round_dollars
+from .output import OutputOptions
+from .textstats import TextStats
+
+
+class DollarConverter(commands.Converter):
+    """A :class:`decimal.Decimal` converter that strips leading dollar signs
+    and can round to the nearest cent.
+    """
+
+    def __init__(self, *, nearest_cent=True):
+        super().__init__()
+        self.nearest_cent = nearest_cent
+
+    async def convert(self, ctx, arg):
+        arg = arg.lower()
+        thousands = 1000 if arg.endswith('k') else 1
+        arg = arg.replace(',', '').lstrip('$').rstrip('k')
+        try:
+            d = Decimal(arg) * thousands
+        except decimal.InvalidOperation:
+            raise commands.BadArgument(f'Dollar syntax error: {arg!r}')
+        return round_dollars(d) if self.nearest_cent else d
+
+
+class PercentConverter(commands.Converter):
+    """A Decimal converter that supports specifying percentages."""
+    async def convert(self, ctx, arg):
+        try:
+            if arg.endswith('%'):
+                arg = arg.rstrip('%')
+                return Decimal(arg) / 100
+            return Decimal(arg)
+        except decimal.InvalidOperation:
+            raise commands.BadArgument(f'Decimal syntax error: {arg!r}')
+
+
+@dataclasses.dataclass(frozen=True)
+class HistoryScope:
+    """The channel history to read for a text analysis command.
+
+    :param limit:
+        The number of recent messages to read,
+        or None to read as many as allowed.
+    :param author: If given, only messages from this user are counted.
+
+    """
+    limit: int | None = None
+    author: discord.User | discord.Member | None = None
+
+    def combine(self, other: 'HistoryScope') -> 'HistoryScope':
+        """Return a scope with the options given in either scope,
+        preferring the other scope's options.
+        """
+        return HistoryScope(
+            limit=other.limit if other.limit is not None else self.limit,
+            author=other.author if other.author is not None else self.author
+        )
+
+
+class HistoryScopeConverter(commands.Converter):
+    """Converts either "last:N" to read the last N messages,
+    or "from:USER" to only count messages from a given user.
+    """
+    async def convert(self, ctx, arg) -> HistoryScope:
+        kind, sep, value = arg.partition(':')
+        kind = kind.lower()
+        if not sep or not value:
+            raise commands.BadArgument(f'History scope syntax error: {arg!r}')
+
+        if kind == 'last':
+            try:
+                limit = int(value.replace(',', ''))
+            except ValueError:
+                raise commands.BadArgument(f'Integer syntax error: {value!r}')
+            if limit < 1:
+                raise commands.BadArgument('The number of messages must be positive.')
+            return HistoryScope(limit=limit)
+        elif kind == 'from':
+            user = await commands.UserConverter().convert(ctx, value)
+            return HistoryScope(author=user)
+
+        raise commands.BadArgument(f'Unknown history scope: {kind!r}')
+
+
+class Graphing(commands.Cog):
+    """Commands for graphing things.
+Most of the text-related commands can support obtaining text using:
+the "text" parameter; file attachment; replying to a message;
+or using the last message that was sent.
+They can also read this channel's history with "last:N" to use the
+last N messages, and/or "from:USER" to only use messages from one user."""
+    qualified_name = 'Graphing'
+
+    TEXT_ANALYSIS_FILESIZE_LIMIT = 300_000
+    # Maximum file size allowed for client_frequencyanalysis in number of bytes
+
+    HISTORY_MAX_MESSAGES = 5000
+    # Maximum number of messages read for a history scope
+    HISTORY_PROGRESS_INTERVAL = 2
+    # Seconds between each update of the progress message
+
+    TEXT_CACHE_MEMORY = 4_000_000
+    # Maximum size in bytes of the decoded attachments kept around
+    # so that several commands on the same file only download it once
+
+    WORD_COUNT_NUM_TO_SHOW = 15
+    # Number of words to be included in the graph; the rest are aggregated
+    # into one entry
+
+    MAX_INTEREST_PERIODS = 10_000_000
+    # Maximum number of compounding periods (term * periods) for
+    # the interest and amortization commands; the plotted series
+    # are downsampled so this only bounds the exact totals
+
+    SIMULATION_PATHS = 2000
+    SIMULATION_MAX_PATHS = 10_000
+    SIMULATION_MIN_PATHS = 100
+    SIMULATION_BUDGET = 10_000_000
+    # Maximum number of rates drawn for one simulation (paths * periods);
+    # the number of paths is reduced to fit, down to the minimum
+
+    ANIMATION_MAX_FRAMES = 120
+    ANIMATION_MAX_PIXELS = 40_000_000
+    # Budgets for animations, checked before any frames are rendered;
+    # the pixel budget is the total number of pixels across all frames
+    ANIMATION_BATCH_SIZE = 5
+    # Number of frames each render job draws and encodes
+
+    OUTPUT_FORMAT = 'png'
+    OUTPUT_DPI = 100
+    OUTPUT_QUANTIZE = True
+    OUTPUT_MAX_BYTES = 1_000_000
+    # How graphs are encoded; images over the byte budget are
+    # quantized, reduced in quality, and scaled down until they fit
+
+    RENDER_WORKERS = 2
+    RENDER_MAX_JOB_SIZE = 1_000_000
+    # Maximum size of a render job's pickled inputs in bytes
+
+    RENDER_CACHE_MEMORY = 32_000_000
+    RENDER_CACHE_DISK = 0
+    # Maximum sizes of the render cache tiers in bytes;
+    # the disk tier is disabled by default
+    RENDER_CACHE_PATH = 'data/render_cache'
+
+    def __init__(self, bot: TheGameBot):
+        self.bot = bot
+        self.renderer = RenderExecutor(
+            self.get_setting('render_workers', self.RENDER_WORKERS),
+            self.get_setting('render_max_job_size', self.RENDER_MAX_JOB_SIZE)
+        )
+        self.cache = RenderCache(
+            self.get_setting('render_cache_memory', self.RENDER_CACHE_MEMORY),
+            self.get_setting('render_cache_path', self.RENDER_CACHE_PATH),
+            self.get_setting('render_cache_disk', self.RENDER_CACHE_DISK)
+        )
+        self.text_cache = RenderCache(
+            self.get_setting('text_cache_memory', self.TEXT_CACHE_MEMORY)
+        )
+
+    async def cog_load(self):
+        await self.renderer.start()
+
+    async def cog_unload(self):
+        self.renderer.shutdown()
+
+    async def cog_command_error(self, ctx: Context, error):
+        error = getattr(error, 'original', error)
+
+        if isinstance(error, RenderJobTooLarge):
+            await ctx.send('Sorry, but that is too much data for me to graph.')
+            ctx.handled = True
+        elif isinstance(error, AnimationTooLarge):
+            await ctx.send('Unfortunately the file is too large to upload.')
+            ctx.handled = True
+
+    def get_setting(self, key: str, default):
+        """Gets a setting from the graphing section, or the default
+        if the setting or the Settings cog is unavailable.
+        """
+        try:
+            settings = self.bot.get_settings()
+        except errors.SettingsNotFound:
+            return default
+        return settings.get('graphing', key, default)
+
+    def get_bot_color(self) -> str:
+        """Returns the bot's color as a hex string for matplotlib."""
+        return '#{:06x}'.format(self.bot.get_bot_color())
+
+    def get_output(self) -> OutputOptions:
+        """Returns the output options configured in the settings."""
+        return OutputOptions(
+            fmt=self.get_setting('output_format', self.OUTPUT_FORMAT),
+            dpi=self.get_setting('output_dpi', self.OUTPUT_DPI),
+            quantize=self.get_setting('output_quantize', self.OUTPUT_QUANTIZE),
+            max_bytes=self.get_setting('output_max_bytes', self.OUTPUT_MAX_BYTES)
+        )
+
+    def render_cached(self, func, *args, **kwargs):
+        """Render a deterministic function in the render pool,
+        reusing the result of any identical render.
+        """
+        return self.cache.run(self.renderer.run, func, *args, **kwargs)
+
+    def RelativeDateFormatter(
+            self, now=None, unit=None, when_absolute=None,
+            absolute_fmt='%Y-%m-d'):
+        """Format a matplotlib date as a relative time.
+
+        Args:
+            now (Optional[datetime.datetime]):
+                The current time. Works with timezones.
+            unit (Optional[str]): The unit of time to use for relative formatting.
+                Can be one of 'second', 'minute', 'hour', 'day', or None
+                to use automatic units (may result in duplicate tick labels).
+            when_absolute (Optional[int]): Formats datetimes as absolute when
+                the difference from now is greater than this number of seconds.
+            absolute_fmt (str): The format to use for absolute datetimes.
+
+        """
+        units_mapping = {
+            'day': 86400,
+            'hour': 3600,
+            'minute': 60,
+            'second': 1
+        }
+        now = now or datetime.datetime.now().astimezone(datetime.timezone.utc)
+        if now.tzinfo != datetime.timezone.utc:
+            now = now.astimezone(datetime.timezone.utc)
+
+        def actual_relative_formatter(x, pos):
+            def get_unit():
+                n = units_mapping.get(unit)
+                if n is not None:
+                    return unit, n
+
+                for name, n in units_mapping.items():
+                    if seconds // n:
+                        return name, n
+
+                return 'second', 1
+
+            def format_relative():
+                name, n = get_unit()
+                converted = int(seconds // n)
+                return '{:,d} {}{}\nago'.format(
+                    converted,
+                    name,
+                    's' if n != 1 else ''
+                )
+
+            dt = mdates.num2date(x)
+            seconds = (now - dt).total_seconds()
+
+            if when_absolute is not None and seconds > when_absolute:
+                return dt.strftime(absolute_fmt)
+
+            return format_relative()
+
+        return actual_relative_formatter
+
+    async def read_attachment(
+        self, attachment: discord.Attachment
+    ) -> tuple[str, TextStats]:
+        """Downloads and decodes a text attachment along with its
+        statistics, reusing the text of any attachment read before.
+
+        :raises AttachmentTooLarge:
+            The attachment was larger than the text analysis limit.
+        :raises aiohttp.ClientError:
+            The attachment could not be downloaded.
+
+        """
+        stats = TextStats()
+        text = await self.text_cache.get_or_render(
+            f'attachment:{attachment.id}',
+            lambda: read_attachment(
+                self.bot.session, attachment,
+                limit=self.TEXT_ANALYSIS_FILESIZE_LIMIT,
+                stats=stats
+            )
+        )
+
+        if not stats.finished:
+            # The text came from the cache, so it wasn't streamed into stats
+            stats = await asyncio.to_thread(TextStats.from_text, text)
+
+        return text, stats
+
+    async def get_text_stats(
+        self, ctx: Context, text: str, *, message: discord.Message = None
+    ) -> tuple[bool, TextStats | str]:
+        """Obtains text from the user, either in an attachment or from
+        the text argument, and computes its statistics.
+
+        Lookup strategy::
+            1. Check the invoker's attachments for downloadable text files
+            2. Check the invoker's content
+            3. Check the referenced message's attachments (if available)
+            4. Check the referenced message's content
+            5. Check the last message's attachments (before the invokation)
+            6. Check the last message's content
+        Note that steps 3-6 are done via recursion.
+
+        :param ctx: The command context.
+        :param text: The text argument passed to the command.
+            If this is not empty, it is simply used as the result.
+        :param message: The message to read text from, used when recursing.
+        :returns:
+            A boolean indicating whether it was successful at getting
+            the input, along with either the statistics of the retrieved
+            content or a failure message.
+
+        """
+        too_large = (
+            'Unfortunately I cannot analyse files over {} in size.'.format(
+                humanize.naturalsize(self.TEXT_ANALYSIS_FILESIZE_LIMIT)
+            )
+        )
+
+        if text:
+            return self._check_text_stats(TextStats.from_text(text))
+
+        using_ctx_message = message is None
+        message = message or ctx.message
+
+        if message.attachments:
+            a = message.attachments[0]
+
+            if a.width is not None:
+                # Image/video file
+                return False, 'Attachment must be a text file.'
+
+            if a.size >= self.TEXT_ANALYSIS_FILESIZE_LIMIT:
+                return False, too_large
+
+            try:
+                text, stats = await self.read_attachment(a)
+            except AttachmentTooLarge:
+                return False, too_large
+            except aiohttp.ClientError:
+                return False, 'I could not download that attachment.'
+
+            if text:
+                return self._check_text_stats(stats)
+
+        if not text and not using_ctx_message:
+            # message argument was passed; check the message content
+            # and if that is empty, keep it at one level of recursion
+            text = message.content
+            if not text:
+                return False, 'There is no text to analyse.'
+
+        ref = ctx.message.reference
+
+        if not text and ref is not None:
+            # Try recursing into the message the user replied to
+            message = ref.resolved
+
+            if isinstance(message, discord.DeletedReferencedMessage):
+                return False, 'The given message was deleted.'
+            elif message is None:
+                return False, 'Could not resolve your replied message.'
+            else:
+                return await self.get_text_stats(ctx, text, message=message)
+
+        if not text and ctx.bot_permissions.read_message_history:
+            # Try recursing into the last message sent
+            message = await anext(
+                ctx.channel.history(limit=1, before=ctx.message)
+            )
+
+            if message is not None:
+                success, last_stats = await self.get_text_stats(
+                    ctx, text, message=message)
+                if success:
+                    return success, last_stats
+
+        if not text:
+            response = 'There is no text to analyse.'
+            if not ctx.bot_permissions.read_message_history:
+                if ref is not None:
+                    response = (
+                        'I need the Read Message History permission to '
+                        'read the message you replied to.'
+                    )
+                else:
+                    response = (
+                        'I need the Read Message History permission to '
+                        'read the last message that was sent.'
+                    )
+            return False, response
+
+        return self._check_text_stats(TextStats.from_text(text))
+
+    async def get_history_stats(
+        self, ctx: Context, scope: HistoryScope
+    ) -> tuple[bool, TextStats | str]:
+        """Reads the channel's history before the invoking message
+        and computes the statistics of every message in scope.
+
+        While reading, a progress message is sent and periodically
+        updated, then deleted once finished.
+
+        :param ctx: The command context.
+        :param scope: The messages to read.
+        :returns:
+            A boolean indicating whether it was successful at getting
+            the input, along with either the statistics of the retrieved
+            content or a failure message.
+
+        """
+        max_messages = self.get_setting(
+            'history_max_messages', self.HISTORY_MAX_MESSAGES)
+        limit = scope.limit if scope.limit is not None else max_messages
+
+        if limit > max_messages:
+            return False, f'I can only read up to {max_messages:,} messages.'
+        elif not ctx.bot_permissions.read_message_history:
+            return False, (
+                'I need the Read Message History permission to '
+                "read this channel's history."
+            )
+        elif not ctx.permissions.read_message_history:
+            return False, (
+                'You need the Read Message History permission to '
+                "read this channel's history."
+            )
+
+        progress: discord.Message | None = None
+        last_update = time.monotonic()
+
+        async def report(read: int, counted: int):
+            nonlocal progress, last_update
+            now = time.monotonic()
+            if now - last_update < self.HISTORY_PROGRESS_INTERVAL:
+                return
+            last_update = now
+
+            content = 'Reading messages... ({:,}/{:,})'.format(read, limit)
+            if progress is None:
+                progress = await ctx.send(content)
+            else:
+                await progress.edit(content=content)
+
+        stats = TextStats()
+        try:
+            counted = await read_history(
+                ctx.channel.history(limit=limit, before=ctx.message),
+                stats, author=scope.author, on_progress=report
+            )
+        finally:
+            if progress is not None:
+                with contextlib.suppress(discord.HTTPException):
+                    await progress.delete()
+
+        if not counted:
+            return False, 'There are no messages with text to analyse.'
+        return self._check_text_stats(stats)
+
+    async def get_command_stats(
+        self, ctx: Context, scopes: list[HistoryScope], text: str
+    ) -> tuple[bool, TextStats | str, str]:
+        """Obtains the statistics for a text analysis command, either
+        from the channel history if any scopes were given,
+        or through :meth:`get_text_stats()`.
+
+        :returns:
+            The same results as :meth:`get_text_stats()`,
+            along with the name to title the graph with.
+
+        """
+        if not scopes:
+            success, stats = await self.get_text_stats(ctx, text)
+            return success, stats, ctx.author.display_name
+        elif text:
+            return False, 'Text cannot be given along with a history scope.', ''
+
+        scope = HistoryScope()
+        for other in scopes:
+            scope = scope.combine(other)
+
+        if scope.author is not None:
+            name = scope.author.display_name
+        else:
+            name = f'#{ctx.channel}'
+
+        success, stats = await self.get_history_stats(ctx, scope)
+        return success, stats, name
+
+    @staticmethod
+    def _check_text_stats(stats: TextStats) -> tuple[bool, TextStats | str]:
+        if not stats.total_letters:
+            return False, 'There are no english letters in this text.'
+        return True, stats
+
+    @staticmethod
+    def set_axes_aspect(ax: Axes, ratio: int | float, *args, **kwargs):
+        """Set an Axes's aspect ratio.
+
+        This is based off of https://www.statology.org/matplotlib-aspect-ratio/.
+
+        :param ax: The Axes to set the aspect ratio for.
+        :type ax: matplotlib.axes.Axes
+        :param ratio: The ratio of height to width,
+            i.e. a ratio of 2 will make the height 2 times the width.
+
+        Extra arguments are passed through to `ax.set_aspect()`.
+
+        """
+        x_left, x_right = ax.get_xlim()
+        y_low, y_high = ax.get_ylim()
+        x_size = x_right - x_left
+        y_size = y_low - y_high
+        current_ratio = abs(x_size / y_size)
+        ax.set_aspect(
+            current_ratio * ratio,  # type: ignore # aspect can be a float
+            *args, **kwargs
+        )
+
+    @commands.group(name='interest', invoke_without_command=True)
+    @commands.cooldown(3, 60, commands.BucketType.channel)
+    @commands.max_concurrency(3, wait=True)
+    async def graph_interest(
+        self, ctx: Context,
+        principal: DollarConverter,
+        rate: PercentConverter,
+        term: int,
+        periods: int = 1,
+        contribution: DollarConverter = Decimal()
+    ):
+        """Calculate simple and compound interest.
+
+principal: The initial investment.
+rate: The interest rate. Can be specified as a percentage.
+term: The number of terms.
+periods: The number of compounding periods in each term.
+contribution: An amount deposited at the end of each compounding period."""
+        principal: Decimal
+        rate: Decimal
+        contribution: Decimal
+        if not 0 < rate <= 100:
+            return await ctx.send(
+                'The interest rate must be between 0% and 100,000%.')
+        elif principal < 0 or contribution < 0:
+            return await ctx.send(
+                'The principal and contribution cannot be negative.')
+        elif not 0 < term * periods <= self.MAX_INTEREST_PERIODS:
+            return await ctx.send(
+                'The term/periods must be positive and multiply '
+                'to at most {:,}.'.format(self.MAX_INTEREST_PERIODS)
+            )
+
+        output = self.get_output()
+        async with ctx.typing():
+            f, content = await self.render_cached(
+                plots.interest_stackplot,
+                principal, rate, term, periods, self.get_bot_color(),
+                contribution, output=output
+            )
+
+        await ctx.send(
+            content, file=discord.File(f, f'Interest.{output.extension}'))
+
+    @graph_interest.command(name='simulate', aliases=('sim',))
+    @commands.cooldown(2, 60, commands.BucketType.channel)
+    @commands.max_concurrency(2, wait=True)
+    async def graph_interest_simulation(
+        self, ctx: Context,
+        principal: DollarConverter,
+        rate: PercentConverter,
+        volatility: PercentConverter,
+        term: int,
+        periods: int = 12,
+        contribution: DollarConverter = Decimal(),
+        paths: int = SIMULATION_PATHS
+    ):
+        """Simulate compound interest with a rate that varies each period.
+
+principal: The initial investment.
+rate: The average interest rate. Can be specified as a percentage.
+volatility: The standard deviation of the rate over each term.
+term: The number of terms.
+periods: The number of compounding periods in each term.
+contribution: An amount deposited at the end of each compounding period.
+paths: The number of simulations to run. This may be reduced for long terms."""
+        principal: Decimal
+        rate: Decimal
+        volatility: Decimal
+        contribution: Decimal
+        budget = self.get_setting('simulation_budget', self.SIMULATION_BUDGET)
+        if not -1 < rate <= 100:
+            return await ctx.send(
+                'The interest rate must be between -100% and 100,000%.')
+        elif not 0 <= volatility <= 100:
+            return await ctx.send(
+                'The volatility must be between 0% and 10,000%.')
+        elif principal < 0 or contribution < 0:
+            return await ctx.send(
+                'The principal and contribution cannot be negative.')
+        elif not self.SIMULATION_MIN_PATHS <= paths <= self.SIMULATION_MAX_PATHS:
+            return await ctx.send(
+                'The number of paths must be between {:,} and {:,}.'.format(
+                    self.SIMULATION_MIN_PATHS, self.SIMULATION_MAX_PATHS)
+            )
+        elif not 0 < term * periods <= budget // self.SIMULATION_MIN_PATHS:
+            return await ctx.send(
+                'The term/periods must be positive and multiply '
+                'to at most {:,}.'.format(budget // self.SIMULATION_MIN_PATHS)
+            )
+
+        paths = min(paths, budget // (term * periods))
+
+        output = self.get_output()
+        async with ctx.typing():
+            f, content = await self.render_cached(
+                plots.interest_simulation,
+                principal, rate, volatility, term, periods,
+                self.get_bot_color(), contribution, paths=paths, output=output
+            )
+
+        await ctx.send(
+            content, file=discord.File(f, f'Interest Simulation.{output.extension}'))
+
+    @commands.command(name='amortization', aliases=('loan',))
+    @commands.cooldown(3, 60, commands.BucketType.channel)
+    @commands.max_concurrency(3, wait=True)
+    async def graph_amortization(
+        self, ctx: Context,
+        principal: DollarConverter,
+        rate: PercentConverter,
+        term: int,
+        periods: int = 12
+    ):
+        """Calculate the payments needed to pay off a loan.
+
+principal: The amount borrowed.
+rate: The interest rate. Can be specified as a percentage.
+term: The number of terms.
+periods: The number of payments in each term."""
+        principal: Decimal
+        rate: Decimal
+        if not 0 <= rate <= 100:
+            return await ctx.send(
+                'The interest rate must be between 0% and 100,000%.')
+        elif principal <= 0:
+            return await ctx.send('The principal must be positive.')
+        elif not 0 < term * periods <= self.MAX_INTEREST_PERIODS:
+            return await ctx.send(
+                'The term/periods must be positive and multiply '
+                'to at most {:,}.'.format(self.MAX_INTEREST_PERIODS)
+            )
+
+        output = self.get_output()
+        async with ctx.typing():
+            f, content = await self.render_cached(
+                plots.amortization_stackplot,
+                principal, rate, term, periods, self.get_bot_color(),
+                output=output
+            )
+
+        await ctx.send(
+            content, file=discord.File(f, f'Amortization.{output.extension}'))
+
+    @graph_interest.error
+    @graph_interest_simulation.error
+    @graph_amortization.error
+    async def graph_interest_error(self, ctx: Context, error):
+        error = getattr(error, 'original', error)
+
+        if isinstance(error, (decimal.InvalidOperation, decimal.Overflow,
+                              OverflowError)):
+            await ctx.send('The calculations were too large to handle...')
+            ctx.handled = True
+
+    @commands.command(
+        name='frequencyanalysis',
+        aliases=('analyzefrequency', 'analysefrequency')
+    )
+    @commands.cooldown(3, 120, commands.BucketType.channel)
+    @commands.max_concurrency(3, wait=True)
+    async def graph_frequency_analysis(
+        self, ctx: Context,
+        scopes: commands.Greedy[HistoryScopeConverter], *, text=''
+    ):
+        """Do a frequency analysis of a given text in the english alphabet.
+
+To see the different methods you can use to provide text, check the help message for this command's category."""
+        success, stats, name = await self.get_command_stats(ctx, scopes, text)
+        if not success:
+            return await ctx.send(stats)
+
+        output = self.get_output()
+        async with ctx.typing():
+            f = await self.render_cached(
+                plots.frequency_analysis,
+                stats.letters.tolist(), name,
+                self.get_bot_color(), output=output
+            )
+
+        await ctx.send(file=discord.File(
+            f, f'Frequency Analysis.{output.extension}'))
+
+    @commands.command(name='wordcount')
+    @commands.cooldown(3, 120, commands.BucketType.channel)
+    @commands.max_concurrency(3, wait=True)
+    async def graph_word_count(
+        self, ctx: Context,
+        scopes: commands.Greedy[HistoryScopeConverter], *, text=''
+    ):
+        """Count the occurrences of each word in a given text.
+This only processes letters from the english alphabet.
+
+To see the different methods you can use to provide text, check the help message for this command's category."""
+        success, stats, name = await self.get_command_stats(ctx, scopes, text)
+        if not success:
+            return await ctx.send(stats)
+
+        output = self.get_output()
+        async with ctx.typing():
+            f = await self.render_cached(
+                plots.word_count_pie,
+                stats.words.most_common(self.WORD_COUNT_NUM_TO_SHOW),
+                stats.total_words, len(stats.words),
+                name, self.get_bot_color(),
+                output=output
+            )
+
+        await ctx.send(file=discord.File(
+            f, f'Word Count Pie Chart.{output.extension}'))
+
+    @commands.command(name='graphcache', hidden=True)
+    @commands.is_owner()
+    async def graph_cache_stats(self, ctx: Context):
+        """Show the render cache's hit rate and size, along with
+the average render time and image size of each graph."""
+        stats = self.cache.stats
+        embed = discord.Embed(
+            color=ctx.bot.get_bot_color(),
+            title='Render cache'
+        ).add_field(
+            name='Requests',
+            value='{:,} total\n{:.1%} hit rate'.format(stats.requests, stats.hit_rate)
+        ).add_field(
+            name='Results',
+            value='{:,} hits ({:,} from disk)\n{:,} coalesced\n{:,} misses'.format(
+                stats.hits, stats.disk_hits, stats.coalesced, stats.misses
+            )
+        ).add_field(
+            name='Size',
+            value='Memory: {:,} entries, {}\nDisk: {:,} entries, {}'.format(
+                len(self.cache.memory), humanize.naturalsize(self.cache.memory_size),
+                len(self.cache.disk_index), humanize.naturalsize(self.cache.disk_size)
+            )
+        ).add_field(
+            name='Attachments',
+            value='{:,} entries, {}\n{:.1%} hit rate'.format(
+                len(self.text_cache.memory),
+                humanize.naturalsize(self.text_cache.memory_size),
+                self.text_cache.stats.hit_rate
+            )
+        )
+
+        def format_timings(stats: RenderTimingStats):
+            s = format_stages(stats.averages())
+            if stats.average_output_size is not None:
+                s += ', ' + humanize.naturalsize(stats.average_output_size)
+            return s
+
+        timings = '\n'.join(
+            '`{}` ({:,}): {}'.format(name, stats.count, format_timings(stats))
+            for name, stats in sorted(self.renderer.timings.items())
+        )
+        if timings:
+            embed.add_field(
+                name='Average render timings',
+                value=timings[:1024],
+                inline=False
+            )
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name='test3dgraph')
+    @commands.cooldown(3, 120, commands.BucketType.channel)
+    @commands.max_concurrency(3, wait=True)
+    async def graph_3d_test(
+        self, ctx: Context, elevation: int = None, azimuth: int = None
+    ):
+        """Generate a graph with some random data."""
+        output = self.get_output()
+        async with ctx.typing():
+            f = await self.renderer.run(
+                plots.test_bar_graphs_3d_image,
+                self.get_bot_color(), elevation, azimuth, output=output
+            )
+
+        await ctx.send(file=discord.File(
+            f, f'3D Graph Test.{output.extension}'))
+
+    @commands.command(name='test3dgraphanimation')
+    @commands.cooldown(1, 30, commands.BucketType.default)
+    @commands.max_concurrency(1, wait=True)
+    @commands.is_owner()
+    async def graph_3d_animation_test(
+        self, ctx: Context, frames: int = 30, duration: int = 3,
+        fmt: Literal['webp', 'apng'] = 'webp'
+    ):
+        """Generate an animating graph with some random data.
+
+frames: The number of frames to render.
+duration: The length of the animation in seconds.
+fmt: The animation format, either webp or apng."""
+        max_frames = self.get_setting(
+            'animation_max_frames', self.ANIMATION_MAX_FRAMES)
+        max_pixels = self.get_setting(
+            'animation_max_pixels', self.ANIMATION_MAX_PIXELS)
+        width, height = matplotlib.rcParams['figure.figsize']
+        dpi = matplotlib.rcParams['figure.dpi']
+
+        if duration < 1:
+            return await ctx.send('Duration must be at least 1 second.')
+        elif frames < 1:
+            return await ctx.send('There must be at least 1 frame.')
+        elif frames > max_frames:
+            return await ctx.send(
+                f'There can be at most {max_frames:,} frames.')
+        elif frames * width * height * dpi ** 2 > max_pixels:
+            return await ctx.send('That animation would be too large to render.')
+
+        filesize_limit = (ctx.guild.filesize_limit if ctx.guild is not None
+                          else 8_000_000)
+
+        async with ctx.typing():
+            f = await render_animation(
+                self.renderer.run,
+                plots.test_bar_graphs_3d_frames,
+                (self.get_bot_color(), plots.test_bar_graphs_3d_data()),
+                plots.test_bar_graphs_3d_azimuths(frames),
+                fmt=fmt,
+                duration=round(duration * 1000 / frames),
+                batch_size=self.ANIMATION_BATCH_SIZE,
+                max_batches=self.renderer.max_workers * 2,
+                max_size=filesize_limit
+            )
+
+        extension = 'webp' if fmt == 'webp' else 'png'
+        await ctx.send(file=discord.File(f, f'3D Graph Animation Test.{extension}'))
@@ -0,0 +1,177 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""A process pool for rendering graphs outside of the bot's process.
+
+Rendering with matplotlib is mostly GIL-bound, so running it in a thread
+still slows down every other coroutine on the bot. Workers are spawned
+rather than forked, which means they start from a fresh interpreter and
+only import the modules needed for the job they were given.
+
+"""
+import asyncio
+import concurrent.futures
+import dataclasses
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import os
+import pickle
+import time
+from typing import Any, Callable, TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from .figures import RenderTimings
+
+T = TypeVar('T')
+
+logger = logging.getLogger('discord')
+
+MPL_STYLE = ('data/discord.mplstyle', 'fast')
+
+
+class RenderJobTooLarge(Exception):
+    """Raised when the inputs of a render job exceed the executor's limit."""
+    def __init__(self, size: int, limit: int):
+        super().__init__(
+            f'render job is {size:,} bytes which exceeds '
+            f'the limit of {limit:,} bytes'
+        )
+        self.size = size
+        self.limit = limit
+
+
+def _init_worker():
+    """Load matplotlib and its style once for the lifetime of a worker."""
+    import matplotlib
+    import matplotlib.style as mplstyle
+
+    matplotlib.use('Agg')
+    mplstyle.use(list(MPL_STYLE))
+
+    # Import the render functions now so the first job doesn't pay for it
+    from . import plots  # noqa: F401
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _run_pickled(payload: bytes) -> tuple[Any, 'RenderTimings']:
+    from .figures import reset_timings
+
+    start = time.perf_counter()
+    timings = reset_timings()
+    func, args, kwargs = pickle.loads(payload)
+    result = func(*args, **kwargs)
+    timings.stages['total'] = time.perf_counter() - start
+    return result, timings
+
+
+@dataclasses.dataclass
+class RenderTimingStats:
+    """The total time spent in each stage by one render function
+    and the total size of the images it produced.
+    """
+    count: int = 0
+    stages: dict[str, float] = dataclasses.field(default_factory=dict)
+    outputs: int = 0
+    output_size: int = 0
+
+    def add(self, timings: 'RenderTimings'):
+        self.count += 1
+        for name, elapsed in timings.stages.items():
+            self.stages[name] = self.stages.get(name, 0.) + elapsed
+        if timings.output_size is not None:
+            self.outputs += 1
+            self.output_size += timings.output_size
+
+    def averages(self) -> dict[str, float]:
+        return {name: total / self.count for name, total in self.stages.items()}
+
+    @property
+    def average_output_size(self) -> float | None:
+        if self.outputs:
+            return self.output_size / self.outputs
+
+
+class RenderExecutor:
+    """Runs render jobs in a pool of worker processes.
+
+    Jobs are pickled up front so that unpicklable inputs fail fast
+    in the bot's process and oversized jobs can be rejected before
+    they are sent to a worker.
+
+    :param max_workers: The number of worker processes to use.
+    :param max_job_size:
+        The maximum size in bytes that the pickled function
+        and arguments of a job can be.
+
+    """
+    def __init__(self, max_workers: int, max_job_size: int):
+        self.max_workers = max(1, max_workers)
+        self.max_job_size = max_job_size
+        self._executor = self._create_executor()
+        self.timings: dict[str, RenderTimingStats] = {}
+
+    def _create_executor(self):
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        )
+
+    async def start(self):
+        """Spawn every worker and wait for them to finish initializing."""
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _warm_up)
+            for _ in range(self.max_workers)
+        ))
+        logger.debug('Started %d render workers', len(set(pids)))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a function in one of the worker processes.
+
+        The function must be defined at the top level of a module
+        and all arguments must be picklable.
+
+        :raises RenderJobTooLarge:
+            The pickled job exceeded `max_job_size`.
+
+        """
+        payload = pickle.dumps((func, args, kwargs), pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_job_size:
+            raise RenderJobTooLarge(len(payload), self.max_job_size)
+
+        loop = asyncio.get_running_loop()
+        try:
+            result, timings = await loop.run_in_executor(
+                self._executor, _run_pickled, payload
+            )
+        except BrokenProcessPool:
+            # A worker died abruptly; replace the pool so later jobs can run
+            logger.warning('Render pool broke, restarting it')
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._create_executor()
+            raise
+
+        name = getattr(func, '__qualname__', repr(func))
+        self.timings.setdefault(name, RenderTimingStats()).add(timings)
+        logger.debug(
+            'Rendered %s: %s, %s bytes', name,
+            format_stages(timings.stages), timings.output_size
+        )
+
+        return result
+
+
+def format_stages(stages: dict[str, float]) -> str:
+    """Format the timings of each render stage in milliseconds."""
+    return ', '.join(
+        f'{name} {elapsed * 1000:.1f}ms' for name, elapsed in stages.items()
+    )
@@ -0,0 +1,295 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Pooled figures and render timings for the render functions.
+
+Creating a figure and styling every label takes a noticeable fraction
+of a render, so each worker keeps a pool of figures that were already
+styled for a given chart type and color. Between uses only the data
+artists are removed, leaving the axes, labels and tick styling intact.
+
+Tick labels are created lazily as the ticks change, but matplotlib
+copies the properties of the first tick onto every new one, so styling
+the initial tick labels is enough for all of them to keep their colors
+and shadows.
+
+Figures are drawn once with the Agg canvas and cropped to their
+tight bounding box in memory rather than going through
+`savefig(bbox_inches='tight')`, which draws the whole figure twice.
+See the output module for how the drawn images are encoded.
+
+"""
+import collections
+import contextlib
+import io
+import itertools
+import time
+from typing import Callable, Hashable, Iterator
+
+import matplotlib.patheffects as path_effects
+import matplotlib.pyplot as plt
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+from matplotlib.text import Text
+import numpy as np
+from PIL import Image
+
+TEXT_SHADOW_ALPHA = 0.6
+TEXT_SHADOW = (
+    path_effects.withSimplePatchShadow(offset=(1, -1), alpha=TEXT_SHADOW_ALPHA),
+)
+
+AXES_MARGINS = {'left': 0.19, 'right': 0.97, 'bottom': 0.15, 'top': 0.9}
+# Subplot parameters that leave room for the labels of a single axes
+# in the discord style, so it can be drawn without a tight layout
+
+FigureSetup = Callable[[Figure, Axes, str], None]
+
+
+# Render timings
+
+class RenderTimings:
+    """Records how long each stage of a render took in seconds,
+    along with the size of the image it produced.
+    """
+    __slots__ = ('stages', 'output_size')
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+        self.output_size: int | None = None
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.) + elapsed
+
+
+_timings = RenderTimings()
+
+
+def reset_timings(timings: RenderTimings | None = None) -> RenderTimings:
+    """Start recording a new set of timings, returning the new recorder.
+
+    The render executor calls this before each job.
+
+    :param timings:
+        The recorder to use, e.g. a subclass that measures more than
+        wall time. If None, a new :class:`RenderTimings` is created.
+
+    """
+    global _timings
+    _timings = timings if timings is not None else RenderTimings()
+    return _timings
+
+
+def stage(name: str):
+    """A context manager that adds the time spent inside it to a stage
+    of the current render, e.g. compute, draw or encode.
+    """
+    return _timings.stage(name)
+
+
+def record_output_size(size: int):
+    """Record the size in bytes of the image produced by the current render."""
+    _timings.output_size = size
+
+
+# Styling
+
+def style_text(items: Iterator[Text], color: str):
+    """Set the color of each text and give them a drop shadow."""
+    for item in items:
+        item.set_color(color)
+        item.set_path_effects(TEXT_SHADOW)
+
+
+def style_axes(ax: Axes, color: str, *, ticks=True):
+    """Apply the standard text, spine and tick colors to an axes."""
+    style_text(
+        itertools.chain(
+            (ax.title, ax.xaxis.label, ax.yaxis.label),
+            ax.xaxis.get_majorticklabels() if ticks else (),
+            ax.yaxis.get_majorticklabels() if ticks else ()
+        ),
+        color
+    )
+
+    for spine in ax.spines.values():
+        spine.set_color(color)
+    ax.tick_params(colors=color)
+
+
+def use_fixed_layout(fig: Figure):
+    """Reserve enough room for a single axes' labels inside the figure."""
+    fig.subplots_adjust(**AXES_MARGINS)
+
+
+def style_legend(ax: Axes, color: str, **kwargs):
+    """Create a legend with styled text for the current data."""
+    legend = ax.legend(**kwargs)
+    style_text(legend.get_texts(), color)
+    return legend
+
+
+# Pooling
+
+def clear_artists(ax: Axes):
+    """Remove everything that was drawn on an axes while keeping its
+    styling, labels and tick configuration.
+    """
+    for artist in itertools.chain(
+            ax.patches, ax.lines, ax.collections,
+            ax.texts, ax.images, ax.tables):
+        artist.remove()
+    ax.containers.clear()
+
+    if ax.legend_ is not None:
+        ax.legend_.remove()
+
+    ax.set_autoscale_on(True)
+    ax.relim()
+
+    # Start the next plot from the first color again
+    ax.set_prop_cycle(None)
+
+
+class FigurePool:
+    """Keeps styled figures around for reuse by later renders.
+
+    Each render function owns the figures created under its chart type,
+    so the setup given for a chart type must always be the same.
+
+    :param max_figures:
+        The maximum number of idle figures to keep.
+        The least recently used figures are closed first.
+
+    """
+    def __init__(self, max_figures: int = 16):
+        self.max_figures = max_figures
+        self.idle: collections.OrderedDict[
+            Hashable, list[tuple[Figure, Axes]]
+        ] = collections.OrderedDict()
+        self.created = 0
+        self.reused = 0
+
+    def _acquire(
+        self, kind: str, color: str, setup: FigureSetup, subplot_kw: dict
+    ) -> tuple[Figure, Axes]:
+        key = (kind, color)
+        idle = self.idle.get(key)
+        if idle:
+            self.reused += 1
+            fig, ax = idle.pop()
+            if not idle:
+                del self.idle[key]
+            return fig, ax
+
+        self.created += 1
+        fig, ax = plt.subplots(subplot_kw=subplot_kw)
+        setup(fig, ax, color)
+        return fig, ax
+
+    def _release(self, kind: str, color: str, fig: Figure, ax: Axes):
+        try:
+            clear_artists(ax)
+        except Exception:
+            # Don't pool a figure that couldn't be cleaned up
+            plt.close(fig)
+            raise
+
+        key = (kind, color)
+        self.idle.setdefault(key, []).append((fig, ax))
+        self.idle.move_to_end(key)
+
+        while sum(map(len, self.idle.values())) > self.max_figures:
+            _, figures = self.idle.popitem(last=False)
+            for old, _ in figures:
+                plt.close(old)
+
+    @contextlib.contextmanager
+    def figure(
+        self, kind: str, color: str, setup: FigureSetup, **subplot_kw
+    ) -> Iterator[tuple[Figure, Axes]]:
+        """Borrow a styled figure for a chart type and color.
+
+        :param kind: The name of the chart type.
+        :param color: The color passed to the setup function.
+        :param setup:
+            A function that applies the static styling of a new figure.
+            It is only called when no idle figure is available.
+        :param subplot_kw: Keyword arguments used to create the axes.
+
+        """
+        with stage('figure'):
+            fig, ax = self._acquire(kind, color, setup, subplot_kw)
+
+        try:
+            yield fig, ax
+        except BaseException:
+            plt.close(fig)
+            raise
+
+        with stage('figure'):
+            self._release(kind, color, fig, ax)
+
+
+pool = FigurePool()
+
+
+# Output
+
+def draw_image(fig: Figure, *, tight=True) -> np.ndarray | None:
+    """Draw a figure once and return its pixels as an RGBA array.
+
+    :param fig: The figure to draw.
+    :param tight:
+        If True, the image is cropped to the bounding box of
+        everything drawn, like `savefig(bbox_inches='tight', pad_inches=0)`.
+    :returns:
+        The image, or None if `tight` is True and something was drawn
+        outside the figure, in which case cropping cannot include it.
+
+    """
+    with stage('draw'):
+        fig.canvas.draw()
+        image = np.asarray(fig.canvas.buffer_rgba())
+        if not tight:
+            return image
+
+        renderer = fig.canvas.get_renderer()
+        bbox = fig.get_tightbbox(renderer).transformed(fig.dpi_scale_trans)
+        height, width = image.shape[:2]
+        if bbox.x0 < 0 or bbox.y0 < 0 or bbox.x1 > width or bbox.y1 > height:
+            return None
+
+        # Display coordinates start from the bottom left
+        # while the image's rows start from the top
+        return image[
+            height - int(np.ceil(bbox.y1)):height - int(bbox.y0),
+            int(bbox.x0):int(np.ceil(bbox.x1))
+        ]
+
+
+def encode_image(
+    image: np.ndarray | Image.Image, fmt: str = 'png',
+    *, dpi: float = 100, **options
+) -> bytes:
+    """Encode an RGBA array or Pillow image.
+
+    :param image: The image to encode.
+    :param fmt: The name of the image format, e.g. png or webp.
+    :param dpi: The resolution to record in the image's metadata.
+    :param options: Additional options passed to the encoder.
+
+    """
+    f = io.BytesIO()
+    with stage('encode'):
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        image.save(f, fmt, dpi=(dpi, dpi), **options)
+    return f.getvalue()
@@ -0,0 +1,164 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Streams text attachments and channel history into the text
+analysis commands.
+
+Attachments are downloaded in chunks instead of being read into memory
+all at once. Each chunk is decoded with an incremental UTF-8 decoder and
+fed to a :class:`TextStats` in a worker thread, so the event loop only
+ever handles raw bytes. Invalid bytes are replaced instead of failing
+the whole attachment, and multi-byte characters split across two
+chunks are carried over by the decoder.
+
+The size limit is enforced on the bytes actually received, since
+the size reported by discord is only checked before downloading.
+
+Channel history is folded into a :class:`TextStats` a batch of messages
+at a time, so only the running counters are kept no matter how many
+messages are read.
+
+"""
+import asyncio
+import codecs
+from typing import AsyncIterator, Awaitable, Callable
+
+import aiohttp
+import discord
+
+from .textstats import TextStats
+
+ATTACHMENT_CHUNK_SIZE = 1 << 16
+# Number of bytes downloaded and decoded at a time
+HISTORY_BATCH_SIZE = 100
+# Number of messages read before updating the statistics,
+# matching the number of messages discord returns in each page
+
+
+class AttachmentTooLarge(Exception):
+    """Raised when an attachment grows past its size limit while streaming."""
+    def __init__(self, limit: int):
+        super().__init__(f'attachment exceeded {limit:,} bytes')
+        self.limit = limit
+
+
+class StreamDecoder:
+    """Decodes UTF-8 chunks into text, optionally feeding them to a
+    :class:`TextStats`.
+
+    :param stats: The statistics to update with each decoded chunk.
+
+    """
+    def __init__(self, stats: TextStats | None = None):
+        self.stats = stats
+        self.decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        self.parts: list[str] = []
+
+    def feed(self, data: bytes, final=False):
+        """Decode the next chunk of bytes.
+
+        :param data: The chunk to decode.
+        :param final:
+            Whether this is the last chunk. Any incomplete character
+            left over is replaced and the statistics are finished.
+
+        """
+        text = self.decoder.decode(data, final)
+        if text:
+            self.parts.append(text)
+            if self.stats is not None:
+                self.stats.update(text)
+        if final and self.stats is not None:
+            self.stats.finish()
+
+    def getvalue(self) -> str:
+        """Return all of the text decoded so far."""
+        text = ''.join(self.parts)
+        self.parts = [text]
+        return text
+
+
+async def read_attachment(
+    session: aiohttp.ClientSession,
+    attachment: discord.Attachment,
+    *,
+    limit: int,
+    stats: TextStats | None = None,
+    chunk_size: int = ATTACHMENT_CHUNK_SIZE
+) -> str:
+    """Download and decode a text attachment.
+
+    :param session: The session to download the attachment with.
+    :param attachment: The attachment to read.
+    :param limit: The size in bytes at which the download is aborted.
+    :param stats:
+        The statistics to feed the text into as it is decoded.
+        This is finished once the attachment has been read.
+    :param chunk_size: The number of bytes to decode at a time.
+    :returns: The decoded text.
+    :raises AttachmentTooLarge:
+        The attachment reached `limit` bytes while downloading.
+    :raises aiohttp.ClientError: The attachment could not be downloaded.
+
+    """
+    decoder = StreamDecoder(stats)
+    received = 0
+
+    async with session.get(attachment.url, raise_for_status=True) as response:
+        async for data in response.content.iter_chunked(chunk_size):
+            received += len(data)
+            if received >= limit:
+                raise AttachmentTooLarge(limit)
+            await asyncio.to_thread(decoder.feed, data)
+
+    await asyncio.to_thread(decoder.feed, b'', True)
+    return decoder.getvalue()
+
+
+async def read_history(
+    messages: AsyncIterator[discord.Message],
+    stats: TextStats,
+    *,
+    author: discord.abc.Snowflake | None = None,
+    batch_size: int = HISTORY_BATCH_SIZE,
+    on_progress: Callable[[int, int], Awaitable[None]] | None = None
+) -> int:
+    """Fold the content of each message into a set of statistics.
+
+    Attachments and embeds are not read.
+
+    :param messages: The messages to read, e.g. from `channel.history()`.
+    :param stats:
+        The statistics to update. This is finished once every
+        message has been read.
+    :param author: If given, only messages from this user are counted.
+    :param batch_size:
+        The number of messages to read before updating the statistics.
+    :param on_progress:
+        A coroutine function called after each batch with the number
+        of messages read so far and how many of them were counted.
+    :returns: The number of messages that were counted.
+
+    """
+    batch: list[str] = []
+    read = counted = 0
+
+    async for message in messages:
+        read += 1
+        if message.content and (author is None or message.author.id == author.id):
+            batch.append(message.content)
+            counted += 1
+
+        if read % batch_size == 0:
+            if batch:
+                # Separate messages so words don't run into each other
+                await asyncio.to_thread(stats.update, '\n'.join(batch) + '\n')
+                batch.clear()
+            if on_progress is not None:
+                await on_progress(read, counted)
+
+    if batch:
+        await asyncio.to_thread(stats.update, '\n'.join(batch))
+    stats.finish()
+    return counted
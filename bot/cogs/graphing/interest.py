@@ -0,0 +1,277 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Interest calculations for the Graphing cog.
+
+The series that get plotted are computed with float64 NumPy arrays from
+closed-form expressions, so they can be evaluated at only the periods
+that will actually be drawn. The totals reported to the user are
+computed separately with Decimal so they are exact to the cent.
+
+Rates given to these functions are per term, and `n` is the number
+of compounding (or payment) periods in each term.
+
+Simulations draw a rate for every period of every path at once and
+compound them with a cumulative sum of log growth along each row.
+Paths are processed in chunks of rows to bound the size of the
+intermediate matrices, and only the sampled periods of each path
+are kept for computing percentiles.
+
+"""
+import decimal
+from decimal import Decimal
+
+import numpy as np
+
+MAX_PLOT_POINTS = 2000
+# The maximum number of periods that a series will be evaluated at
+DECIMAL_PRECISION = 50
+# The number of significant digits used when computing totals
+
+SIMULATION_PLOT_POINTS = 250
+# The maximum number of periods kept from each simulated path
+SIMULATION_CHUNK_SIZE = 1_000_000
+# The number of rates drawn at a time while simulating
+MIN_PERIOD_RATE = -0.99
+# Simulated rates are clipped so a period can't lose everything
+
+
+def round_dollars(d) -> Decimal:
+    """Rounds a number-like object to the nearest cent."""
+    cent = Decimal('0.01')
+    with decimal.localcontext() as ctx:
+        ctx.prec = DECIMAL_PRECISION
+        return Decimal(d).quantize(cent, rounding=decimal.ROUND_HALF_UP)
+
+
+def format_dollars(dollars: Decimal):
+    dollars = round_dollars(dollars)
+    sign = '-' if dollars < 0 else ''
+    dollar_part = abs(int(dollars))
+    cent_part = abs(int(dollars % 1 * 100))
+    return '{}${:,}.{:02d}'.format(sign, dollar_part, cent_part)
+
+
+def sample_periods(periods: int, max_points: int = MAX_PLOT_POINTS) -> np.ndarray:
+    """Return the period indices from 0 to `periods` inclusive,
+    downsampled to at most `max_points` evenly spaced indices.
+    The first and last periods are always included.
+    """
+    if periods + 1 <= max_points:
+        return np.arange(periods + 1, dtype=np.float64)
+    return np.unique(np.rint(np.linspace(0, periods, max_points)))
+
+
+def _growth(i: float, k: np.ndarray) -> np.ndarray:
+    """Compute (1 + i) ** k for each period in k."""
+    with np.errstate(over='ignore'):
+        growth = np.exp(k * np.log1p(i))
+    if not np.isfinite(growth[-1]):
+        raise OverflowError('compound growth is too large to represent')
+    return growth
+
+
+def interest_series(
+    p: float, r: float, t: int, n: int, contribution: float = 0.,
+    *, max_points: int = MAX_PLOT_POINTS
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Returns the terms and a dictionary mapping the principal,
+    simple interest, and the extra interest from compounding
+    over those terms.
+
+    :param p: The principal.
+    :param r: The interest rate.
+    :param t: The investment term.
+    :param n: The number of compounding periods per term.
+    :param contribution:
+        An amount deposited at the end of each compounding period.
+    :param max_points: The maximum number of terms to return.
+
+    """
+    k = sample_periods(t * n, max_points)
+    i = r / n
+
+    # Each contribution earns simple interest from when it was deposited,
+    # i.e. the j-th contribution earns i * (k - j)
+    deposited = p + contribution * k
+    simple_interest = p * i * k + contribution * i * k * (k - 1) / 2
+
+    growth = _growth(i, k)
+    if i:
+        compound_amount = p * growth + contribution * (growth - 1) / i
+    else:
+        compound_amount = deposited
+
+    return k / n, {
+        'Principal': deposited,
+        'Simple': simple_interest,
+        'Compound': compound_amount - deposited - simple_interest
+    }
+
+
+def interest_totals(
+    p: Decimal, r: Decimal, t: int, n: int, contribution: Decimal = Decimal()
+) -> tuple[Decimal, Decimal, Decimal]:
+    """Returns the exact total deposited, simple amount, and compound
+    amount at the end of an investment.
+
+    Takes the same parameters as :func:`interest_series()`.
+
+    """
+    periods = t * n
+    with decimal.localcontext() as ctx:
+        ctx.prec = DECIMAL_PRECISION
+        i = r / n
+
+        deposited = p + contribution * periods
+        simple_amount = (
+            deposited + p * i * periods
+            + contribution * i * periods * (periods - 1) / 2
+        )
+
+        growth = (1 + i) ** periods
+        if i:
+            compound_amount = p * growth + contribution * (growth - 1) / i
+        else:
+            compound_amount = deposited
+
+    return deposited, simple_amount, compound_amount
+
+
+def amortization_series(
+    p: float, r: float, t: int, n: int,
+    *, max_points: int = MAX_PLOT_POINTS
+) -> tuple[np.ndarray, dict[str, np.ndarray], np.ndarray]:
+    """Returns the terms, a dictionary mapping the cumulative principal
+    and interest paid, and the remaining balance over a loan's term.
+
+    :param p: The amount borrowed.
+    :param r: The interest rate.
+    :param t: The loan's term.
+    :param n: The number of payments per term.
+    :param max_points: The maximum number of terms to return.
+
+    """
+    periods = t * n
+    k = sample_periods(periods, max_points)
+    i = r / n
+
+    if i:
+        growth = _growth(i, k)
+        final_growth = growth[-1]
+        payment = p * i * final_growth / (final_growth - 1)
+        balance = p * growth - payment * (growth - 1) / i
+    else:
+        payment = p / periods
+        balance = p - payment * k
+
+    # Guard against tiny negative balances from rounding
+    balance = np.maximum(balance, 0)
+    principal_paid = p - balance
+    interest_paid = payment * k - principal_paid
+
+    return k / n, {
+        'Principal': principal_paid,
+        'Interest': interest_paid
+    }, balance
+
+
+def amortization_totals(
+    p: Decimal, r: Decimal, t: int, n: int
+) -> tuple[Decimal, Decimal]:
+    """Returns the exact payment per period and the total paid
+    over a loan's term.
+
+    Takes the same parameters as :func:`amortization_series()`.
+
+    """
+    periods = t * n
+    with decimal.localcontext() as ctx:
+        ctx.prec = DECIMAL_PRECISION
+        i = r / n
+        if i:
+            growth = (1 + i) ** periods
+            payment = p * i * growth / (growth - 1)
+        else:
+            payment = p / periods
+
+        return payment, payment * periods
+
+
+def simulate_interest(
+    p: float, r: float, volatility: float, t: int, n: int,
+    contribution: float = 0.,
+    *,
+    paths: int,
+    seed: int = 0,
+    percentiles: tuple[float, ...] = (5, 50, 95),
+    max_points: int = SIMULATION_PLOT_POINTS,
+    chunk_size: int = SIMULATION_CHUNK_SIZE
+) -> tuple[np.ndarray, np.ndarray, float]:
+    """Simulates compound interest where the rate varies every period.
+
+    Each period's rate is drawn from a normal distribution centered
+    on `r / n`, scaled so that the rates over a whole term have a
+    standard deviation of `volatility`.
+
+    :param p: The principal.
+    :param r: The mean interest rate.
+    :param volatility: The standard deviation of the rate over a term.
+    :param t: The investment term.
+    :param n: The number of compounding periods per term.
+    :param contribution:
+        An amount deposited at the end of each compounding period.
+    :param paths: The number of rate paths to simulate.
+    :param seed: The seed for drawing rates.
+    :param percentiles: The percentiles of the amounts to return.
+    :param max_points: The maximum number of terms to return.
+    :param chunk_size:
+        The maximum number of rates to draw at a time.
+        At least one path is always drawn at once.
+    :returns:
+        The terms, an array with the amounts at each percentile over
+        those terms, and the mean amount at the end of the investment.
+    :raises OverflowError:
+        The amount of a path grew too large to represent.
+
+    """
+    periods = t * n
+    k = sample_periods(periods, max_points).astype(np.intp)
+    i = r / n
+    scale = volatility / np.sqrt(n)
+
+    rng = np.random.default_rng(seed)
+    rows = max(1, chunk_size // periods)
+    amounts = np.empty((paths, len(k)))
+    amounts[:, 0] = p
+
+    for start in range(0, paths, rows):
+        stop = min(start + rows, paths)
+        rates = rng.standard_normal((stop - start, periods))
+        rates *= scale
+        rates += i
+        np.maximum(rates, MIN_PERIOD_RATE, out=rates)
+
+        # Compute the growth since the start, G_k, in place
+        with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+            growth = np.log1p(rates, out=rates)
+            np.cumsum(growth, axis=1, out=growth)
+            np.exp(growth, out=growth)
+
+            # The j-th contribution grows by G_k / G_j, so the amount is
+            # G_k * (p + c * sum(1 / G_j for j <= k))
+            sampled = growth[:, k[1:] - 1]
+            if contribution:
+                deposits = np.reciprocal(growth, out=growth)
+                np.cumsum(deposits, axis=1, out=deposits)
+                sampled *= p + contribution * deposits[:, k[1:] - 1]
+            else:
+                sampled *= p
+            amounts[start:stop, 1:] = sampled
+
+    if not np.isfinite(amounts[:, -1]).all():
+        raise OverflowError('simulated growth is too large to represent')
+
+    bands = np.percentile(amounts, percentiles, axis=0)
+    return k / n, bands, float(amounts[:, -1].mean())
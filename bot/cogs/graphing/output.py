@@ -0,0 +1,145 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""The output stage that turns drawn figures into uploadable images.
+
+Images are encoded with a series of increasingly lossy settings until
+one fits in the byte budget: a PNG is first reduced to a 256 color
+palette and then to 64 colors, while a WebP steps down in quality.
+If none of them fit, the image is scaled down and tried again.
+The smallest attempt is returned when nothing fits at all.
+
+"""
+import dataclasses
+import io
+from typing import Iterator, Literal
+
+from matplotlib.figure import Figure
+import numpy as np
+from PIL import Image
+
+from .figures import draw_image, encode_image, record_output_size, stage
+
+OutputFormat = Literal['png', 'webp']
+OUTPUT_FORMATS: tuple[OutputFormat, ...] = ('png', 'webp')
+
+PNG_PALETTE_SIZES = (256, 64)
+WEBP_QUALITIES = (90, 75, 55, 35)
+WEBP_METHOD = 4
+# Higher methods compress better but take longer to encode (0-6)
+
+DOWNSCALE_FACTOR = 0.75
+MIN_DOWNSCALE_SIZE = 240
+# Images won't be scaled down once their smaller side is below this
+
+
+@dataclasses.dataclass(frozen=True)
+class OutputOptions:
+    """How a rendered graph should be encoded.
+
+    :param fmt: The image format, either png or webp.
+    :param dpi: The resolution to draw the figure at.
+    :param quantize:
+        Whether PNGs should always be reduced to a 256 color palette.
+        Otherwise this only happens when the image is over budget.
+    :param max_bytes:
+        The size to aim for in bytes, or 0 for no limit.
+
+    """
+    fmt: OutputFormat = 'png'
+    dpi: float = 100
+    quantize: bool = False
+    max_bytes: int = 0
+
+    def __post_init__(self):
+        if self.fmt not in OUTPUT_FORMATS:
+            raise ValueError(f'unknown output format {self.fmt!r}')
+        elif self.dpi <= 0:
+            raise ValueError('dpi must be positive')
+
+    @property
+    def extension(self) -> str:
+        return self.fmt
+
+
+DEFAULT_OUTPUT = OutputOptions()
+
+
+def _quantize(image: Image.Image, colors: int) -> Image.Image:
+    with stage('encode'):
+        return image.quantize(colors, method=Image.Quantize.FASTOCTREE)
+
+
+def _iter_encodings(image: Image.Image, output: OutputOptions) -> Iterator[bytes]:
+    """Yield the image encoded from the least to the most lossy settings."""
+    if output.fmt == 'webp':
+        for quality in WEBP_QUALITIES:
+            yield encode_image(
+                image, 'webp', dpi=output.dpi,
+                quality=quality, method=WEBP_METHOD
+            )
+        return
+
+    if not output.quantize:
+        yield encode_image(image, 'png', dpi=output.dpi)
+    for colors in PNG_PALETTE_SIZES:
+        yield encode_image(_quantize(image, colors), 'png', dpi=output.dpi)
+
+
+def encode_output(image: np.ndarray, output: OutputOptions = DEFAULT_OUTPUT) -> bytes:
+    """Encode an RGBA image, aiming for the output's byte budget.
+
+    :param image: The image to encode.
+    :param output: The options to encode with.
+    :returns: The encoded image.
+
+    """
+    image = Image.fromarray(image)
+    best: bytes | None = None
+
+    while True:
+        for data in _iter_encodings(image, output):
+            if best is None or len(data) < len(best):
+                best = data
+            if not output.max_bytes or len(data) <= output.max_bytes:
+                return data
+
+        if min(image.size) * DOWNSCALE_FACTOR < MIN_DOWNSCALE_SIZE:
+            return best
+
+        with stage('encode'):
+            image = image.resize(
+                (round(image.width * DOWNSCALE_FACTOR),
+                 round(image.height * DOWNSCALE_FACTOR)),
+                Image.Resampling.LANCZOS
+            )
+
+
+def render_output(
+    fig: Figure, output: OutputOptions = DEFAULT_OUTPUT, *, tight=True
+) -> io.BytesIO:
+    """Draw a figure and encode it with the given output options.
+
+    :param fig: The figure to render.
+    :param output: The options to encode with.
+    :param tight:
+        If True, the image is cropped to the bounding box of
+        everything drawn. When something is drawn outside the figure,
+        this falls back to `savefig()` so that it can expand the image.
+    :returns: The encoded image.
+
+    """
+    fig.set_dpi(output.dpi)
+
+    image = draw_image(fig, tight=tight)
+    if image is None:
+        f = io.BytesIO()
+        with stage('draw'):
+            fig.savefig(f, format='png', bbox_inches='tight', pad_inches=0)
+            # bbox_inches, pad_inches: removes padding around the graph
+            image = np.asarray(Image.open(f).convert('RGBA'))
+
+    data = encode_output(image, output)
+    record_output_size(len(data))
+    return io.BytesIO(data)
@@ -0,0 +1,446 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""The render functions used by the Graphing cog.
+
+These run inside the render worker processes, so they only take
+picklable inputs (numbers, text and colors) and this module must
+not import anything that depends on the bot itself.
+
+"""
+from decimal import Decimal
+import io
+import itertools
+import random
+import string
+from typing import Literal, Sequence
+
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+import matplotlib.pyplot as plt
+from matplotlib.ticker import MaxNLocator
+import numpy as np
+
+from . import interest
+from .figures import (
+    draw_image, encode_image, pool, stage,
+    style_axes, style_legend, style_text, use_fixed_layout
+)
+from .interest import format_dollars
+from .output import DEFAULT_OUTPUT, OutputOptions, render_output
+
+
+def _setup_stackplot(title: str):
+    def setup(fig: Figure, ax: Axes, color: str):
+        ax.set_title(title)
+        ax.set_xlabel('Term')
+        ax.set_ylabel('Amount')
+
+        # Remove the x-axis margins
+        ax.margins(x=0)
+
+        # Force integer ticks
+        ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+
+        style_axes(ax, color)
+        use_fixed_layout(fig)
+
+    return setup
+
+
+_setup_interest = _setup_stackplot('Simple and Compound Interest')
+_setup_amortization = _setup_stackplot('Loan Amortization')
+_setup_interest_simulation = _setup_stackplot('Simulated Compound Interest')
+
+
+def interest_stackplot(
+    p: Decimal, r: Decimal, t: int, n: int, color: str,
+    contribution: Decimal = Decimal(), *, output: OutputOptions = DEFAULT_OUTPUT
+) -> tuple[io.BytesIO, str]:
+    """Graphs the interest of an investment over a given term.
+
+    :param p: The principal.
+    :param r: The interest rate.
+    :param t: The investment term.
+    :param n: The number of compounding periods per term.
+    :param color: The color to use for text and spines.
+    :param contribution:
+        An amount deposited at the end of each compounding period.
+    :param output: The options to encode the image with.
+    :returns: The generated image and a message describing the interest.
+
+    """
+    with stage('compute'):
+        terms, data = interest.interest_series(
+            float(p), float(r), t, n, float(contribution)
+        )
+        deposited, simple_amount, compound_amount = interest.interest_totals(
+            p, r, t, n, contribution
+        )
+
+    with pool.figure('interest', color, _setup_interest) as (fig, ax):
+        with stage('draw'):
+            ax.stackplot(terms, data.values(), labels=data.keys())
+            style_legend(ax, color, loc='upper left')
+
+            # Move y-lim so principal won't take up the majority of the plot
+            minimum = p - p * Decimal('0.05')
+            ax.set_ylim(float(minimum), float(compound_amount))
+
+        f = render_output(fig, output)
+
+    # Create message
+    message = (
+        'Present Value: {}\n'
+        'Future Values: {} simple; {} compound'
+    ).format(format_dollars(p), format_dollars(simple_amount),
+             format_dollars(compound_amount))
+    if contribution:
+        message += '\nTotal Deposited: {}'.format(format_dollars(deposited))
+
+    return f, message
+
+
+def interest_simulation(
+    p: Decimal, r: Decimal, volatility: Decimal, t: int, n: int, color: str,
+    contribution: Decimal = Decimal(), *, paths: int, seed: int = 0,
+    output: OutputOptions = DEFAULT_OUTPUT
+) -> tuple[io.BytesIO, str]:
+    """Graphs the range of outcomes of an investment with a variable rate.
+
+    :param p: The principal.
+    :param r: The mean interest rate.
+    :param volatility: The standard deviation of the rate over a term.
+    :param t: The investment term.
+    :param n: The number of compounding periods per term.
+    :param color: The color to use for text and spines.
+    :param contribution:
+        An amount deposited at the end of each compounding period.
+    :param paths: The number of rate paths to simulate.
+    :param seed: The seed for drawing rates.
+    :param output: The options to encode the image with.
+    :returns: The generated image and a message describing the outcomes.
+
+    """
+    with stage('compute'):
+        terms, (low, median, high), mean = interest.simulate_interest(
+            float(p), float(r), float(volatility), t, n, float(contribution),
+            paths=paths, seed=seed
+        )
+        _, fixed = interest.interest_series(
+            float(p), float(r), t, n, float(contribution),
+            max_points=interest.SIMULATION_PLOT_POINTS
+        )
+        fixed_amount = sum(fixed.values())
+
+    with pool.figure(
+            'interest_simulation', color, _setup_interest_simulation) as (fig, ax):
+        with stage('draw'):
+            ax.fill_between(terms, low, high, alpha=0.4, label='5th-95th percentile')
+            ax.plot(terms, median, label='Median')
+            ax.plot(terms, fixed_amount, color=color, linestyle='--', label='Fixed rate')
+            style_legend(ax, color, loc='upper left')
+
+        f = render_output(fig, output)
+
+    # Create message
+    message = (
+        'Present Value: {}\n'
+        'Future Values over {:,} paths: {} (5th), {} (median), {} (95th)\n'
+        'Mean: {}; Fixed Rate: {}'
+    ).format(format_dollars(p), paths, format_dollars(low[-1]),
+             format_dollars(median[-1]), format_dollars(high[-1]),
+             format_dollars(mean), format_dollars(fixed_amount[-1]))
+
+    return f, message
+
+
+def amortization_stackplot(
+    p: Decimal, r: Decimal, t: int, n: int, color: str,
+    *, output: OutputOptions = DEFAULT_OUTPUT
+) -> tuple[io.BytesIO, str]:
+    """Graphs the payments made towards a loan over its term.
+
+    :param p: The amount borrowed.
+    :param r: The interest rate.
+    :param t: The loan's term.
+    :param n: The number of payments per term.
+    :param color: The color to use for text and spines.
+    :param output: The options to encode the image with.
+    :returns: The generated image and a message describing the payments.
+
+    """
+    with stage('compute'):
+        terms, data, balance = interest.amortization_series(
+            float(p), float(r), t, n
+        )
+        payment, total_paid = interest.amortization_totals(p, r, t, n)
+
+    with pool.figure('amortization', color, _setup_amortization) as (fig, ax):
+        with stage('draw'):
+            # Graph the cumulative payments with the remaining balance on top
+            ax.stackplot(terms, data.values(), labels=data.keys())
+            ax.plot(terms, balance, color=color, label='Balance')
+            style_legend(ax, color, loc='upper left')
+
+        f = render_output(fig, output)
+
+    # Create message
+    message = (
+        'Borrowed: {}\n'
+        'Payments: {} x {:,}\n'
+        'Total Paid: {} ({} interest)'
+    ).format(format_dollars(p), format_dollars(payment), t * n,
+             format_dollars(total_paid), format_dollars(total_paid - p))
+
+    return f, message
+
+
+def _setup_frequency_analysis(fig: Figure, ax: Axes, color: str):
+    # Remove ticks
+    ax.tick_params(axis='x', bottom=False)
+
+    # Add labels
+    ax.set_xlabel('Letter')
+    ax.set_ylabel('Count')
+
+    # Force integer ticks
+    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+
+    style_axes(ax, color)
+    use_fixed_layout(fig)
+
+
+def frequency_analysis(
+    letters: Sequence[int], name: str, color: str,
+    *, output: OutputOptions = DEFAULT_OUTPUT
+):
+    """Creates a frequency analysis graph from a text's letter counts.
+
+    :param letters:
+        The number of occurrences of each letter in the english
+        alphabet, as counted by `TextStats.letters`.
+    :param name: The name of the person the text belongs to.
+    :param color: The color to use for text and spines.
+    :param output: The options to encode the image with.
+    :returns: The generated image as an in-memory file.
+
+    """
+    with stage('compute'):
+        char_count = np.asarray(letters)
+
+        max_char_count = max(char_count.max(), 1)
+        letter_colors = plt.cm.hsv(0.8 * char_count / max_char_count)
+
+    with pool.figure(
+            'frequency_analysis', color, _setup_frequency_analysis) as (fig, ax):
+        with stage('draw'):
+            # Graph bars
+            ax.bar(list(string.ascii_lowercase),
+                   char_count,
+                   color=letter_colors)
+            ax.set_title(f'Frequency Analysis for {name}')
+
+        return render_output(fig, output)
+
+
+def _setup_word_count_pie(fig: Figure, ax: Axes, color: str):
+    ax.title.set_color(color)
+    # Leave room for the two-line title above the pie's labels
+    fig.subplots_adjust(bottom=0.05, top=0.8)
+
+
+def word_count_pie(
+    top_words: Sequence[tuple[str, int]], total_words: int,
+    unique_words: int, name: str, color: str,
+    *, output: OutputOptions = DEFAULT_OUTPUT
+):
+    """Create a pie chart of the most common words in a text.
+
+    :param top_words:
+        The most common words and their counts in descending order,
+        e.g. from `TextStats.words.most_common()`.
+    :param total_words: The number of words in the text.
+    :param unique_words: The number of distinct words in the text.
+    :param name: The name of the person the text belongs to.
+    :param color: The color to use for text.
+    :param output: The options to encode the image with.
+    :returns: The generated image as an in-memory file.
+
+    """
+    with stage('compute'):
+        if not top_words:
+            raise ValueError(
+                'text must have some words using the english alphabet')
+
+        max_word_count = top_words[0][1]
+
+        sizes = [count / max_word_count for word, count in top_words]
+        labels = [f'{word.capitalize()} ({count})'
+                  for word, count in top_words]
+
+        word_colors = plt.cm.hsv([
+            0.8 * i / len(top_words)
+            for i in range(len(sizes), 0, -1)
+        ])
+
+    # if unique_words > len(top_words):
+    #     # Words were left out; add an "other" size
+    #     other_count = total_words - sum(count for word, count in top_words)
+    #     sizes.append(other_count / total_words)
+    #     labels.append(f'Other ({other_count})')
+    #     # Use #808080 (grey)
+    #     word_colors = np.append(word_colors, [[.5, .5, .5, 1]], 0)
+
+    with pool.figure('word_count_pie', color, _setup_word_count_pie) as (fig, ax):
+        with stage('draw'):
+            # Graph pie
+            patches, texts, autotexts = ax.pie(
+                sizes, labels=labels, colors=word_colors, autopct='%1.2g%%',
+                startangle=0
+            )
+            # NOTE: `patches` are the wedges, `texts` are the labels, and
+            # `autotexts` is the autogenerated labels in the wedges from autopct
+
+            ax.axis('equal')  # keeps the pie's size as a circle
+
+            # Add labels
+            if unique_words <= len(top_words):
+                ax.set_title(
+                    f'Word Count ({total_words:,} total)\n'
+                    f'for {name}\n'
+                )
+            else:
+                # Words were left out
+                ax.set_title(
+                    f'Top {len(top_words)} Words '
+                    f'({total_words:,} total)\n'
+                    f'for {name}\n'
+                )
+            # NOTE: newline is appended at the end just to pad it from the labels
+
+            # Set font styles
+            style_text(texts + autotexts, color)
+            for item in texts:
+                item.set_fontsize(16)
+            for item in autotexts:
+                item.set_fontsize(12)
+
+        return render_output(fig, output)
+
+
+def test_bar_graphs_3d_data() -> np.ndarray:
+    """Generates the random heights of each layer for test_bar_graphs_3d."""
+    scale = random.uniform(0.2, 100)
+    return np.random.rand(4, 20) * scale
+
+
+def _setup_bar_graphs_3d(fig: Figure, ax: Axes, color: str):
+    ax.set_xlabel('X')
+    ax.set_ylabel('Y')
+    ax.set_zlabel('Z')
+
+    # Set colors
+    for item in itertools.chain(
+            (ax.xaxis.label, ax.yaxis.label, ax.zaxis.label),
+            ax.get_xticklabels(), ax.get_yticklabels(),
+            ax.get_zticklabels()):
+        item.set_color(color)
+
+    # Set spine and pane colors
+    # NOTE: w_xaxis and friends were removed in matplotlib 3.8
+    for axis in (ax.xaxis, ax.yaxis, ax.zaxis):
+        axis.line.set_color(color)
+        axis.set_pane_color((1, 1, 1, 0.1))
+
+    # Set tick colors
+    ax.tick_params(colors=color)
+
+
+def test_bar_graphs_3d_plot(ax: Axes, data: np.ndarray):
+    """Plots four 2D bar graphs layered in a 3D plot.
+
+    Code from: https://matplotlib.org/3.3.3/gallery/mplot3d/bars3d.html#sphx-glr-gallery-mplot3d-bars3d-py
+
+    :param ax: The 3D axes to plot on.
+    :param data: The heights of each layer from test_bar_graphs_3d_data().
+
+    """
+    colors = ['r', 'g', 'b', 'y']
+    yticks = [3, 2, 1, 0]
+    xs = np.arange(data.shape[1])
+    for c, k, ys in zip(colors, yticks, data):
+        # Plot the bar graph given by xs and ys on the plane y=k
+        # with 80% opacity.
+        ax.bar(xs, ys, zs=k, zdir='y', color=[c] * len(xs), alpha=0.8)
+
+    # On the y axis let's only label the discrete values that
+    # we have data for.
+    ax.set_yticks(yticks)
+
+
+def test_bar_graphs_3d_image(
+    color: str, elevation=None, azimuth=None,
+    *, output: OutputOptions = DEFAULT_OUTPUT
+):
+    """Generates an image from test_bar_graphs_3d."""
+    with pool.figure(
+            'bar_graphs_3d', color, _setup_bar_graphs_3d,
+            projection='3d') as (fig, ax):
+        with stage('draw'):
+            test_bar_graphs_3d_plot(ax, test_bar_graphs_3d_data())
+
+            # Rotate graph projection
+            ax.view_init(elevation, azimuth)
+
+        return render_output(fig, output)
+
+
+def test_bar_graphs_3d_azimuths(
+    frames: int, start=300, direction: Literal[1, -1] = -1
+) -> list[float]:
+    """Generates the azimuths rotating around the graph.
+
+    :param frames: The number of azimuths to generate.
+    :param start: The azimuth to start at.
+    :param direction:
+         1: Rotate right
+        -1: Rotate left
+
+    """
+    step = direction * 360 / frames
+    return [(start + step * i) % 360 for i in range(frames)]
+
+
+def test_bar_graphs_3d_frames(
+    color: str, data: np.ndarray,
+    azimuths: Sequence[float], fmt: str,
+    elevation=30
+) -> list[bytes]:
+    """Renders a batch of frames rotating around test_bar_graphs_3d.
+
+    Every frame is drawn on the full figure so that all frames of
+    an animation have the same size.
+
+    :param color: The color to use for text and spines.
+    :param data: The heights of each layer from test_bar_graphs_3d_data().
+    :param azimuths: The azimuth of each frame.
+    :param fmt: The image format to encode each frame with.
+    :param elevation: The elevation of the camera.
+    :returns: The encoded frames.
+
+    """
+    with pool.figure(
+            'bar_graphs_3d', color, _setup_bar_graphs_3d,
+            projection='3d') as (fig, ax):
+        with stage('draw'):
+            test_bar_graphs_3d_plot(ax, data)
+
+        frames = []
+        for azimuth in azimuths:
+            ax.view_init(elev=elevation, azim=azimuth)
+            image = draw_image(fig, tight=False)
+            frames.append(encode_image(image, fmt, dpi=fig.dpi))
+
+        return frames
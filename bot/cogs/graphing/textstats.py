@@ -0,0 +1,178 @@
+#  Copyright (C) 2022 thegamecracks
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Text statistics shared by the text analysis graphs.
+
+Text is processed in chunks so that large attachments never need more
+than one chunk's worth of intermediate data. Letter histograms are
+computed with a single `np.bincount` over the UTF-8 encoded chunk;
+since every byte of a multi-byte UTF-8 sequence is >= 0x80, counting
+the ASCII byte values gives exactly the number of ASCII letters.
+
+"""
+import collections
+import re
+import string
+from typing import Iterable, Iterator
+
+import numpy as np
+
+ALPHABET = string.ascii_lowercase
+DEFAULT_CHUNK_SIZE = 1 << 20
+# Number of characters processed at a time
+
+WORD_PATTERN = re.compile(r"[a-z][a-z']*")
+# A word starts with a letter and can contain apostrophes after that
+WORD_CHARS = ALPHABET + "'"
+
+_LETTER_INDEX = np.full(256, -1, dtype=np.int16)
+_LETTER_INDEX[np.frombuffer(ALPHABET.encode(), np.uint8)] = np.arange(26)
+_LETTER_INDEX[np.frombuffer(ALPHABET.upper().encode(), np.uint8)] = np.arange(26)
+# Maps each byte value to its letter's index in ALPHABET, or -1
+
+
+def iter_chunks(text: str, size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Yield consecutive slices of text with at most `size` characters."""
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+def _as_bytes(chunk: str) -> np.ndarray:
+    return np.frombuffer(chunk.encode('utf-8', 'surrogatepass'), np.uint8)
+
+
+def letter_histogram(text: str) -> np.ndarray:
+    """Count the occurrences of each letter in the english alphabet,
+    ignoring case.
+
+    :returns: An array of 26 counts in alphabetical order.
+
+    """
+    counts = np.bincount(_as_bytes(text), minlength=256)
+    return counts[ord('a'):ord('z') + 1] + counts[ord('A'):ord('Z') + 1]
+
+
+class TextStats:
+    """Accumulates statistics over text fed to it in chunks.
+
+    Letter counts are always computed. Word counts, letter bigrams and
+    Unicode letter counts are only computed when requested, since they
+    cost more per character.
+
+    Words only consist of letters from the english alphabet and are
+    counted in lowercase. Words split across two chunks are carried
+    over to the next chunk, so :meth:`finish()` must be called after
+    the last chunk.
+
+    :param words: Whether to count words.
+    :param bigrams:
+        Whether to count pairs of adjacent letters in the
+        english alphabet.
+    :param unicode_letters:
+        Whether to count every alphabetic character in lowercase,
+        including those outside the english alphabet.
+
+    """
+    def __init__(
+        self, *, words=True, bigrams=False, unicode_letters=False
+    ):
+        self.letters = np.zeros(26, dtype=np.int64)
+        self.words: collections.Counter[str] | None = (
+            collections.Counter() if words else None
+        )
+        self.bigrams: np.ndarray | None = (
+            np.zeros((26, 26), dtype=np.int64) if bigrams else None
+        )
+        self.unicode_letters: collections.Counter[str] | None = (
+            collections.Counter() if unicode_letters else None
+        )
+
+        self._word_carry = ''
+        self._last_letter = -1
+        self._finished = False
+
+    @classmethod
+    def from_text(
+        cls, text: str | Iterable[str],
+        chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs
+    ) -> 'TextStats':
+        """Compute the statistics of a string or an iterable of chunks.
+
+        Keyword arguments are passed to the constructor.
+
+        """
+        stats = cls(**kwargs)
+        chunks = iter_chunks(text, chunk_size) if isinstance(text, str) else text
+        for chunk in chunks:
+            stats.update(chunk)
+        return stats.finish()
+
+    @property
+    def finished(self) -> bool:
+        """Whether :meth:`finish()` has been called."""
+        return self._finished
+
+    @property
+    def total_letters(self) -> int:
+        return int(self.letters.sum())
+
+    @property
+    def total_words(self) -> int:
+        if self.words is None:
+            raise ValueError('word counting was not enabled')
+        return self.words.total()
+
+    def update(self, chunk: str):
+        """Add the statistics of the next chunk of text."""
+        if self._finished:
+            raise RuntimeError('cannot update after finish() is called')
+        elif not chunk:
+            return
+
+        data = _as_bytes(chunk)
+        counts = np.bincount(data, minlength=256)
+        self.letters += counts[ord('a'):ord('z') + 1]
+        self.letters += counts[ord('A'):ord('Z') + 1]
+
+        if self.bigrams is not None:
+            self._update_bigrams(data)
+
+        if self.words is not None or self.unicode_letters is not None:
+            lowered = chunk.lower()
+            if self.words is not None:
+                self._update_words(lowered)
+            if self.unicode_letters is not None:
+                self.unicode_letters.update(filter(str.isalpha, lowered))
+
+    def _update_bigrams(self, data: np.ndarray):
+        indices = _LETTER_INDEX[data]
+        if self._last_letter != -1:
+            # Include the pair spanning the previous chunk
+            indices = np.concatenate(([self._last_letter], indices))
+        self._last_letter = int(indices[-1])
+
+        first, second = indices[:-1], indices[1:]
+        pairs = (first >= 0) & (second >= 0)
+        flat = first[pairs].astype(np.intp) * 26 + second[pairs]
+        self.bigrams += np.bincount(flat, minlength=26 * 26).reshape(26, 26)
+
+    def _update_words(self, lowered: str):
+        text = self._word_carry + lowered
+        # Hold back the trailing word since it may continue in the next chunk
+        end = len(text.rstrip(WORD_CHARS))
+        self._word_carry = text[end:]
+        self.words.update(WORD_PATTERN.findall(text, 0, end))
+
+    def finish(self) -> 'TextStats':
+        """Flush any word carried over from the last chunk.
+
+        :returns: This object for convenience.
+
+        """
+        if not self._finished:
+            if self.words is not None:
+                self.words.update(WORD_PATTERN.findall(self._word_carry))
+            self._word_carry = ''
+            self._finished = True
+        return self
@@ -6,13 +6,15 @@ import datetime
 import functools
 import itertools
 import sqlite3
-from typing import Sequence, Iterable, cast, AsyncGenerator, Collection
+from typing import Sequence, cast, AsyncGenerator
 
 import asqlite
 import discord
 from discord.ext import commands
 
-from bot.utils import ConfirmationView
+from bot.cogs.tags.querier import fts5_escape
+from bot.database import Database
+from bot.utils import ConfirmationView, paging
 from bot import converters, utils
 from main import Context, TheGameBot
 
@@ -108,10 +110,16 @@ def escape_codeblocks(content: str) -> str:
     return ''.join(parts)
 
 
-def invalid_indices(maximum: int, index: Iterable[int], *, limit=3) -> list[str]:
+def invalid_indices(
+    maximum: int, index: converters.IndexRanges, *, limit=3
+) -> list[str]:
     """Return a list of 1-indexed strings indicating which
     indices are out of bounds."""
-    over = (str(n + 1) for n in index if not 0 < n + 1 <= maximum)
+    over = (
+        str(n + 1)
+        for r in index.ranges
+        for n in range(max(r.start, maximum), r.stop)
+    )
     if limit:
         return list(itertools.islice(over, limit))
     return list(over)
@@ -126,23 +134,197 @@ async def query_note_count(conn: asqlite.Connection, user_id: int, guild_id: int
         return row['length']
 
 
+# Numbers each of a user's notes by their 0-indexed position.
+# Notes are ordered by note_id so positions stay stable between queries.
+NOTE_POSITIONS_QUERY = """
+SELECT *, ROW_NUMBER() OVER (ORDER BY note_id) - 1 AS position
+FROM note WHERE user_id = ? AND guild_id IS ?
+"""
+
+
+def position_predicate(indices: converters.IndexRanges) -> tuple[str, list[int]]:
+    """Return an SQL predicate on the "position" column matching
+    the given indices, along with its parameters."""
+    predicate = ' OR '.join(
+        'position BETWEEN ? AND ?' for _ in indices.ranges
+    )
+    params = [n for r in indices.ranges for n in (r.start, r.stop - 1)]
+    return predicate, params
+
+
 async def yield_notes(
     conn: asqlite.Connection, user_id: int, guild_id: int | None,
-    *, indices: Collection[int] = None, only_ids: bool = False
+    *, indices: converters.IndexRanges = None, only_ids: bool = False
 ) -> AsyncGenerator[sqlite3.Row, None]:
     columns = 'note_id' if only_ids else '*'
-    query = f'SELECT {columns} FROM note WHERE user_id = ? AND guild_id IS ?'
 
-    async with conn.execute(query, user_id, guild_id) as c:
-        if indices is not None:
-            i = 0
-            while row := await c.fetchone():
-                if i in indices:
-                    yield row
-                i += 1
-        else:
-            while row := await c.fetchone():
-                yield row
+    if indices is not None:
+        predicate, params = position_predicate(indices)
+        query = (
+            f'SELECT {columns} FROM ({NOTE_POSITIONS_QUERY}) '
+            f'WHERE {predicate} ORDER BY position'
+        )
+    else:
+        params = []
+        query = (
+            f'SELECT {columns} FROM note WHERE user_id = ? AND guild_id IS ? '
+            'ORDER BY note_id'
+        )
+
+    async with conn.execute(query, user_id, guild_id, *params) as c:
+        while row := await c.fetchone():
+            yield row
+
+
+async def delete_notes(
+    conn: asqlite.Connection, user_id: int, guild_id: int | None,
+    indices: converters.IndexRanges
+):
+    """Delete the notes at the given positions in a single statement."""
+    predicate, params = position_predicate(indices)
+    query = f"""
+    DELETE FROM note WHERE note_id IN (
+        SELECT note_id FROM ({NOTE_POSITIONS_QUERY}) WHERE {predicate}
+    )
+    """
+    await conn.execute(query, user_id, guild_id, *params)
+
+
+# Statements for adding full-text search to databases created
+# before the note_fts5 table was part of the schema
+NOTE_FTS5_MIGRATION = (
+    """
+    CREATE VIRTUAL TABLE note_fts5 USING fts5 (
+        user_id UNINDEXED,
+        guild_id UNINDEXED,
+        content,
+        content=note,
+        content_rowid=note_id,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER note_fts5_ai AFTER INSERT ON note BEGIN
+      INSERT INTO note_fts5
+        (rowid, user_id, guild_id, content) VALUES
+        (new.note_id, new.user_id, new.guild_id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER note_fts5_ad AFTER DELETE ON note BEGIN
+      INSERT INTO note_fts5
+        (note_fts5, rowid, user_id, guild_id, content) VALUES
+        ('delete', old.note_id, old.user_id, old.guild_id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER note_fts5_au
+    AFTER UPDATE OF note_id, user_id, guild_id, content ON note
+    BEGIN
+      INSERT INTO note_fts5
+        (note_fts5, rowid, user_id, guild_id, content) VALUES
+        ('delete', old.note_id, old.user_id, old.guild_id, old.content);
+      INSERT INTO note_fts5
+        (rowid, user_id, guild_id, content) VALUES
+        (new.note_id, new.user_id, new.guild_id, new.content);
+    END
+    """,
+    "INSERT INTO note_fts5 (note_fts5) VALUES ('rebuild')",
+)
+
+# Markers placed around matched terms by snippet() so that highlighting
+# can be applied after the rest of the snippet has been escaped
+SNIPPET_START, SNIPPET_END = '\x02', '\x03'
+
+# Searches a user's notes in one location, continuing after the
+# (rank, note_id) of the last result so each page is a bounded query.
+# Positions are counted through ix_note_user to match NOTE_POSITIONS_QUERY.
+NOTE_SEARCH_QUERY = f"""
+SELECT
+    f.rowid AS note_id, f.rank,
+    (
+        SELECT COUNT(*) FROM note AS n
+        WHERE n.user_id = ?2 AND n.guild_id IS ?3 AND n.note_id < f.rowid
+    ) AS position,
+    snippet(note_fts5, 2, '{SNIPPET_START}', '{SNIPPET_END}', '...', 24) AS snippet
+FROM note_fts5 AS f
+WHERE note_fts5 MATCH 'content : ' || ?1
+    AND f.user_id = ?2 AND f.guild_id IS ?3
+    AND (f.rank > ?4 OR f.rank = ?4 AND f.rowid > ?5)
+ORDER BY f.rank, f.rowid
+LIMIT ?6
+"""
+
+
+def fts5_all_words(s: str) -> str:
+    """Escape each word in the given string so that an FTS5 query
+    only matches documents containing all of them."""
+    return ' AND '.join(fts5_escape(word) for word in s.split())
+
+
+async def search_notes(
+    db: Database, user_id: int, guild_id: int | None, query: str,
+    *, batch_size: int = 10
+) -> AsyncGenerator[sqlite3.Row, None]:
+    """Yield notes matching the given query in order of relevance.
+
+    Results are fetched in batches using keyset pagination, so only
+    the notes that are actually requested get ranked and highlighted.
+
+    """
+    query = fts5_all_words(query)
+    rank, note_id = float('-inf'), -1
+
+    while True:
+        async with db.connect() as conn:
+            async with conn.execute(
+                NOTE_SEARCH_QUERY, query, user_id, guild_id,
+                rank, note_id, batch_size
+            ) as c:
+                rows = await c.fetchall()
+
+        for row in rows:
+            yield row
+
+        if len(rows) < batch_size:
+            return
+        rank, note_id = rows[-1]['rank'], rows[-1]['note_id']
+
+
+def format_snippet(snippet: str) -> str:
+    """Escape a snippet returned by NOTE_SEARCH_QUERY and
+    bold the terms that matched."""
+    snippet = ' '.join(snippet.split())
+    return utils.rawify_content(snippet).replace(
+        SNIPPET_START, '**'
+    ).replace(
+        SNIPPET_END, '**'
+    )
+
+
+class NoteSearchPageSource(
+    paging.AsyncIteratorPageSource[sqlite3.Row, None, paging.PaginatorView]
+):
+    def __init__(self, *args, color: int, title: str, empty_message: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.color = color
+        self.title = title
+        self.empty_message = empty_message
+
+    def format_page(self, view: paging.PaginatorView, page: list[sqlite3.Row]):
+        if not page:
+            return self.empty_message
+
+        lines = [
+            f"**{row['position'] + 1}.** {format_snippet(row['snippet'])}"
+            for row in page
+        ]
+
+        return discord.Embed(
+            color=self.color,
+            description='\n'.join(lines),
+            title=self.title
+        )
 
 
 class NoteView(discord.ui.View):
@@ -180,10 +362,22 @@ class NoteManagement(commands.Cog):
     qualified_name = 'Note Management'
 
     MAX_NOTES_PER_LOCATION = 20
+    SEARCH_PAGE_SIZE = 10
 
     def __init__(self, bot: TheGameBot):
         self.bot = bot
 
+    async def cog_load(self):
+        async with self.bot.db.connect(writing=True) as conn:
+            query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'note_fts5'"
+            async with conn.execute(query) as c:
+                if await c.fetchone() is not None:
+                    return
+
+            async with conn.transaction():
+                for statement in NOTE_FTS5_MIGRATION:
+                    await conn.execute(statement)
+
     def send_invalid_indices(
         self, channel: discord.abc.Messageable,
         out_of_bounds: list[str], location: Location, total: int
@@ -206,7 +400,7 @@ class NoteManagement(commands.Cog):
     @commands.cooldown(2, 5, commands.BucketType.user)
     async def notes(
         self, ctx: Context, location: Location | None,
-        *, index: list[int] = index_converter(default=None)
+        *, index: converters.IndexRanges = index_converter(default=None)
     ):
         """Show your global or server notes.
 
@@ -219,23 +413,29 @@ If nothing is provided, all notes are shown."""
         index: Sequence[int] | None
 
         async with ctx.bot.db.connect() as conn:
-            total = await query_note_count(conn, ctx.author.id, location.id)
-
-            if total == 0:
-                return await ctx.send(f"You don't have any {location.notes_str}.")
-            elif index and (out_of_bounds := invalid_indices(total, index)):
-                return await self.send_invalid_indices(ctx, out_of_bounds, location, total)
-
             if index is None:
+                # Listing every note, so the count comes for free
+                note_list = [
+                    row
+                    async for row in yield_notes(conn, ctx.author.id, location.id)
+                ]
+                total = len(note_list)
                 index = range(total)
+            else:
+                total = await query_note_count(conn, ctx.author.id, location.id)
+                if total and (out_of_bounds := invalid_indices(total, index)):
+                    return await self.send_invalid_indices(ctx, out_of_bounds, location, total)
 
-            note_list = [
-                row
-                async for row in yield_notes(
-                    conn, ctx.author.id,
-                    location.id, indices=index
-                )
-            ]
+                note_list = [
+                    row
+                    async for row in yield_notes(
+                        conn, ctx.author.id,
+                        location.id, indices=index
+                    )
+                ]
+
+        if total == 0:
+            return await ctx.send(f"You don't have any {location.notes_str}.")
 
         color = ctx.author.color.value or ctx.bot.get_bot_color()
 
@@ -344,25 +544,49 @@ To see the indices for your notes, use the "notes" command."""
                 return await self.send_invalid_indices(ctx, [str(index)], location, total)
 
             query = """
-            SELECT note_id FROM note WHERE user_id = ? AND guild_id IS ?
-            LIMIT 1 OFFSET ?
-            """
-            async with conn.execute(query, ctx.author.id, location.id, index - 1) as c:
-                row = await c.fetchone()
-                note_id: int = row['note_id']
-
-            await conn.execute(
-                'UPDATE note SET content = ? WHERE note_id = ?',
-                content, note_id
+            UPDATE note SET content = ? WHERE note_id = (
+                SELECT note_id FROM note WHERE user_id = ? AND guild_id IS ?
+                ORDER BY note_id LIMIT 1 OFFSET ?
             )
+            """
+            await conn.execute(query, content, ctx.author.id, location.id, index - 1)
 
         await ctx.send(f"{location.note} #{index} successfully edited!".capitalize())
 
+    @notes.command(name='search')
+    @commands.cooldown(2, 5, commands.BucketType.user)
+    @commands.max_concurrency(1, commands.BucketType.member)
+    async def notes_search(self, ctx: Context, location: Location | None, *, query: str):
+        """Search through your global or server notes.
+
+Examples:
+notes search groceries  (search notes for your current location)
+notes search global bank account  (search global notes containing both words)
+Results are sorted by relevance and show each note's index."""
+        location = cast(Location, location or Location(ctx.guild))
+
+        view = paging.PaginatorView(
+            sources=NoteSearchPageSource(
+                search_notes(
+                    ctx.bot.db, ctx.author.id, location.id, query,
+                    batch_size=self.SEARCH_PAGE_SIZE
+                ),
+                color=ctx.author.color.value or ctx.bot.get_bot_color(),
+                title=f'Search results in your {location.notes_str}',
+                empty_message=f'None of your {location.notes_str} matched your search.',
+                page_size=self.SEARCH_PAGE_SIZE
+            ),
+            allowed_users={ctx.author.id},
+            timeout=60
+        )
+        await view.start(ctx)
+        await view.wait()
+
     @notes.command(name='remove', aliases=('delete',))
     @commands.cooldown(2, 5, commands.BucketType.user)
     async def notes_remove(
         self, ctx: Context, location: Location | None,
-        *, index: list[int] = index_converter()
+        *, index: converters.IndexRanges = index_converter()
     ):
         """Remove one or more notes.
 
@@ -373,7 +597,6 @@ notes delete server 3-8  (delete notes 3 through 8 for your current server)
 
 To see the indices for your notes, use the "notes" command."""
         location = cast(Location, location or Location(ctx.guild))
-        index: list[int]
 
         async with ctx.bot.db.connect() as conn:
             total = await query_note_count(conn, ctx.author.id, location.id)
@@ -397,18 +620,7 @@ To see the indices for your notes, use the "notes" command."""
 
         if await view.wait_for_confirmation():
             async with ctx.bot.db.connect(writing=True) as conn:
-                note_ids = [
-                    (row['note_id'],)
-                    async for row in yield_notes(
-                        conn, ctx.author.id, location.id,
-                        indices=index, only_ids=True
-                    )
-                ]
-
-                await conn.executemany(
-                    'DELETE FROM note WHERE note_id = ?',
-                    note_ids
-                )
+                await delete_notes(conn, ctx.author.id, location.id, index)
 
             await view.update(f'{note_str} successfully deleted!', color=view.YES)
         else:
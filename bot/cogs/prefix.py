@@ -2,13 +2,14 @@
 #  This Source Code Form is subject to the terms of the Mozilla Public
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+import functools
 import re
 import sqlite3
 
 import discord
 from discord.ext import commands
 
-from main import Context, TheGameBot
+from main import Context, PrefixMatcher, TheGameBot
 
 
 class Prefix(commands.Cog):
@@ -18,6 +19,7 @@ class Prefix(commands.Cog):
     def __init__(self, bot: TheGameBot):
         self.bot = bot
         self.cache: dict[int, str] = {}
+        self.matchers: dict[int, PrefixMatcher] = {}
         self.mention_prefix_cooldown = commands.CooldownMapping.from_cooldown(
             1, 15, commands.BucketType.member)
 
@@ -50,6 +52,33 @@ class Prefix(commands.Cog):
 
         return prefix
 
+    async def fetch_matcher(self, guild_id: int) -> PrefixMatcher:
+        """Returns the prefix matcher for a given guild.
+
+        Like :meth:`fetch_prefix()`, the matcher is only cached
+        if the guild's prefix could be determined.
+
+        """
+        matcher = self.matchers.get(guild_id)
+        if matcher is not None:
+            return matcher
+
+        prefix = await self.fetch_prefix(guild_id)
+        matcher = PrefixMatcher(self.bot.user.id, prefix)
+        if prefix is not None:
+            self.matchers[guild_id] = matcher
+
+        return matcher
+
+    @functools.cached_property
+    def mention_regex(self) -> re.Pattern:
+        """A pattern matching either form of the bot's mention.
+
+        This must not be accessed before the bot has logged in.
+
+        """
+        return re.compile(f'<@!?{self.bot.user.id}>')
+
     async def update_prefix(self, guild_id: int, prefix: str):
         """Updates the prefix for a given guild.
 
@@ -64,6 +93,7 @@ class Prefix(commands.Cog):
             )
 
         self.cache[guild_id] = prefix
+        self.matchers.pop(guild_id, None)
 
     @commands.Cog.listener('on_message')
     async def show_prefix_on_message(self, message: discord.Message):
@@ -72,7 +102,7 @@ class Prefix(commands.Cog):
                 or self.bot.user not in message.mentions):
             return
 
-        bot_mention = re.compile(f'<@!?{self.bot.user.id}>')
+        bot_mention = self.mention_regex
 
         # Check if the message content ONLY consists of the mention
         # and return otherwise
@@ -3,19 +3,21 @@
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at http://mozilla.org/MPL/2.0/.
 import asyncio
+import collections
+import dataclasses
 import datetime
-import functools
+import heapq
 import logging
-from typing import TypedDict, cast, Literal
+import random
+from typing import Collection, TypedDict, cast, Literal
 
-import asqlite
 from dateutil.relativedelta import relativedelta
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 
-from bot import converters, utils
-from main import TheGameBot
+from bot import converters, errors, utils
+from main import Context, TheGameBot
 
 logger = logging.getLogger('discord')
 
@@ -64,8 +66,8 @@ class ReminderIndexTransformer(app_commands.Transformer):
         return 1
 
     async def get_max_value(self, bot: TheGameBot, user_id: int):
-        async with bot.db.connect() as conn:
-            return await query_reminder_count(conn, user_id)
+        cog = cast(Reminders, bot.get_cog('reminder'))
+        return len(await cog.fetch_user_reminders(user_id))
 
     async def autocomplete(self, interaction: discord.Interaction, value: str):
         bot = cast(TheGameBot, interaction.client)
@@ -115,31 +117,64 @@ class ReminderEntry(PartialReminderEntry):
     reminder_id: int
 
 
+@dataclasses.dataclass
+class DeliveryJob:
+    """A group of due reminders waiting to be sent to one channel."""
+    channel_id: int
+    entries: list[ReminderEntry]
+    attempts: int = 0
+    last_error: str | None = None
+    reminder_ids: list[int] = dataclasses.field(init=False)
+    undeleted: list[ReminderEntry] = dataclasses.field(default_factory=list)
+    # Reminders that were sent or canceled but not yet deleted
+
+    def __post_init__(self):
+        self.reminder_ids = [entry['reminder_id'] for entry in self.entries]
+
+
+@dataclasses.dataclass
+class DeliveryMetrics:
+    """Counters describing the health of reminder delivery.
+
+    Lag is measured as the time a reminder was actually sent
+    minus its due time.
+
+    """
+    sent: int = 0
+    failures: int = 0
+    dead_lettered: int = 0
+    lag_samples: collections.deque[float] = dataclasses.field(
+        default_factory=lambda: collections.deque(maxlen=1000)
+    )
+
+    def record_lag(self, seconds: float):
+        self.lag_samples.append(seconds)
+
+    def lag_percentile(self, percent: float) -> float | None:
+        """Returns a percentile of the most recent delivery lags in seconds."""
+        if not self.lag_samples:
+            return None
+        samples = sorted(self.lag_samples)
+        i = round(percent / 100 * (len(samples) - 1))
+        return samples[i]
+
+
 def has_pending_reminder():
     """An application command check to ensure the user has one reminder."""
     async def predicate(interaction: discord.Interaction):
         client = cast(TheGameBot, interaction.client)
+        cog = cast(Reminders, client.get_cog('reminder'))
 
-        async with client.db.connect() as conn:
-            count = await query_reminder_count(conn, interaction.user.id)
-
-            if not count:
-                raise app_commands.AppCommandError(
-                    'You currently have no pending reminders.'
-                )
+        if not await cog.fetch_user_reminders(interaction.user.id):
+            raise app_commands.AppCommandError(
+                'You currently have no pending reminders.'
+            )
 
         return True
 
     return app_commands.check(predicate)
 
 
-async def query_reminder_count(conn: asqlite.Connection, user_id: int) -> int:
-    query = 'SELECT COUNT(*) AS length FROM reminder WHERE user_id = ?'
-    async with conn.execute(query, user_id) as c:
-        row = await c.fetchone()
-        return row['length']
-
-
 class Reminders(commands.GroupCog, name='reminder'):
     """Manage your reminders sent out by thegamebot."""
 
@@ -149,16 +184,94 @@ class Reminders(commands.GroupCog, name='reminder'):
 
     NEAR_DUE = datetime.timedelta(minutes=11)
     # NOTE: should be just a bit longer than task loop
+    OVERDUE_THRESHOLD = datetime.timedelta(minutes=1)
+    # Reminders sent later than this are marked as overdue
+
+    USER_CACHE_SIZE = 1000
+    # Number of users whose reminders are kept in memory
+
+    DELIVERY_WORKERS = 4
+    DELIVERY_MAX_ATTEMPTS = 5
+    # Default settings for the delivery queue
+    DELIVERY_BACKOFF_BASE = 5
+    DELIVERY_BACKOFF_MAX = 300
+    # Retry delays in seconds, doubling after each failed attempt
 
     def __init__(self, bot: TheGameBot):
         self.bot = bot
-        self.reminder_tasks = {}  # reminder_id: Task
+        self.reminder_heap: list[tuple[datetime.datetime, int]] = []
+        self.scheduled: dict[int, ReminderEntry] = {}  # reminder_id: entry
+        self.user_cache: collections.OrderedDict[int, list[ReminderEntry]] \
+            = collections.OrderedDict()
+
+        self.delivery_queue: asyncio.Queue[int] = asyncio.Queue()  # channel IDs
+        self.channel_jobs: dict[int, collections.deque[DeliveryJob]] = {}
+        self.queued: set[int] = set()  # reminder IDs waiting to be sent
+        self.retry_handles: dict[int, asyncio.TimerHandle] = {}  # channel_id: handle
+        self.metrics = DeliveryMetrics()
+
+        self.scheduler_wakeup = asyncio.Event()
+        self.workers: list[asyncio.Task] = []
+
+    async def cog_load(self):
+        async with self.bot.db.connect(writing=True) as conn:
+            await conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_reminder_due ON reminder (due)'
+            )
+            await conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_reminder_user_due '
+                'ON reminder (user_id, due)'
+            )
+            await conn.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS reminder_dead_letter (
+                    reminder_id INTEGER   PRIMARY KEY NOT NULL,
+                    user_id     INTEGER   NOT NULL
+                                          REFERENCES user (user_id) ON DELETE CASCADE,
+                    channel_id  INTEGER   NOT NULL,
+                    due         TIMESTAMP,
+                    content     TEXT      NOT NULL,
+                    attempts    INTEGER   NOT NULL,
+                    failed_at   TIMESTAMP NOT NULL,
+                    error       TEXT
+                )
+                '''
+            )
+
+        n_workers = self.get_setting('delivery_workers', self.DELIVERY_WORKERS)
+        self.max_attempts = self.get_setting(
+            'delivery_max_attempts', self.DELIVERY_MAX_ATTEMPTS
+        )
+        self.workers = [
+            asyncio.create_task(self._delivery_worker())
+            for _ in range(max(1, n_workers))
+        ]
+
+        self.scheduler_task = asyncio.create_task(self._run_scheduler())
         self.send_reminders.start()
 
     def cog_unload(self):
         self.send_reminders.cancel()
-        for task in self.reminder_tasks.values():
+        self.scheduler_task.cancel()
+        for task in self.workers:
             task.cancel()
+        for handle in self.retry_handles.values():
+            handle.cancel()
+
+    def get_setting(self, key: str, default):
+        """Gets a setting from the reminders section, or the default
+        if the setting or the Settings cog is unavailable.
+        """
+        try:
+            settings = self.bot.get_settings()
+        except errors.SettingsNotFound:
+            return default
+        return settings.get('reminders', key, default)
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of reminders waiting to be sent."""
+        return len(self.queued)
 
     async def add_reminder(self, entry: PartialReminderEntry):
         row = entry.copy()
@@ -169,34 +282,66 @@ class Reminders(commands.GroupCog, name='reminder'):
 
         # SQLite rowid is aliased as reminder_id, so we don't need an extra query
         reminder_id = await self.bot.db.add_row('reminder', row)
+        self.invalidate_user(entry['user_id'])
 
         entry = cast(ReminderEntry, entry)
         entry['reminder_id'] = reminder_id
 
         return self._check_reminder(entry)
 
+    async def fetch_user_reminders(self, user_id: int) -> list[ReminderEntry]:
+        """Returns a user's reminders ordered by due date.
+
+        The list is cached until one of the user's reminders are
+        added, removed, or delivered, and should not be mutated.
+
+        """
+        reminders = self.user_cache.get(user_id)
+        if reminders is not None:
+            self.user_cache.move_to_end(user_id)
+            return reminders
+
+        reminders = []
+        async with self.bot.db.connect() as conn:
+            query = (
+                'SELECT * FROM reminder WHERE user_id = ? '
+                'ORDER BY due, reminder_id'
+            )
+            async with conn.execute(query, user_id) as c:
+                while row := await c.fetchone():
+                    entry = cast(ReminderEntry, dict(row))
+                    entry['due'] = entry['due'].replace(tzinfo=datetime.timezone.utc)
+                    reminders.append(entry)
+
+        self.user_cache[user_id] = reminders
+        if len(self.user_cache) > self.USER_CACHE_SIZE:
+            self.user_cache.popitem(last=False)
+
+        return reminders
+
+    def invalidate_user(self, user_id: int):
+        """Clears the cached reminders of a user."""
+        self.user_cache.pop(user_id, None)
+
     def cancel_reminder(self, reminder_id: int):
-        task = self.reminder_tasks.pop(reminder_id, None)
-        if task is not None:
-            task.cancel()
+        # The heap entry is discarded once it is popped.
+        # Reminders already in the delivery queue are skipped by the
+        # existence check, as their job is shared with other
+        # reminders in the same channel.
+        self.scheduled.pop(reminder_id, None)
 
     @app_commands.command(name='list')
     @has_pending_reminder()
     async def _list(self, interaction: discord.Interaction):
         """View a list of your currently active reminders."""
         lines = []
-        async with self.bot.db.connect() as conn:
-            query = 'SELECT * FROM reminder WHERE user_id = ?'
-            async with conn.execute(query, interaction.user.id) as c:
-                i = 1
-                while row := await c.fetchone():
-                    due = row['due'].replace(tzinfo=datetime.timezone.utc)
-                    lines.append('{}. <#{}> {}: {}'.format(
-                        i, row['channel_id'],
-                        discord.utils.format_dt(due, 'R'),
-                        utils.truncate_message(row['content'], 40, max_lines=1)
-                    ))
-                    i += 1
+        reminders = await self.fetch_user_reminders(interaction.user.id)
+        for i, entry in enumerate(reminders, start=1):
+            lines.append('{}. <#{}> {}: {}'.format(
+                i, entry['channel_id'],
+                discord.utils.format_dt(entry['due'], 'R'),
+                utils.truncate_message(entry['content'], 40, max_lines=1)
+            ))
 
         embed = discord.Embed(
             color=self.bot.get_user_color(interaction.user),
@@ -217,12 +362,10 @@ class Reminders(commands.GroupCog, name='reminder'):
         index: app_commands.Transform[int, ReminderIndexTransformer]
     ):
         """Show the content and due date of a specific reminder."""
-        async with self.bot.db.connect() as conn:
-            query = 'SELECT * FROM reminder WHERE user_id = ? LIMIT 1 OFFSET ?'
-            async with conn.execute(query, interaction.user.id, index) as c:
-                row = await c.fetchone()
+        reminders = await self.fetch_user_reminders(interaction.user.id)
+        row = reminders[index]
 
-        due = row['due'].replace(tzinfo=datetime.timezone.utc)
+        due = row['due']
         embed = discord.Embed(
             title=f'Reminder #{index + 1:,d}',
             description=row['content'],
@@ -251,15 +394,14 @@ class Reminders(commands.GroupCog, name='reminder'):
         index: app_commands.Transform[int, ReminderIndexTransformer]
     ):
         """Remove one of your pending reminders."""
-        async with self.bot.db.connect() as conn:
-            query = 'SELECT reminder_id FROM reminder WHERE user_id = ? LIMIT 1 OFFSET ?'
-            async with conn.execute(query, interaction.user.id, index) as c:
-                reminder_id: int = (await c.fetchone())['reminder_id']
+        reminders = await self.fetch_user_reminders(interaction.user.id)
+        reminder_id = reminders[index]['reminder_id']
 
         await self.bot.db.delete_rows(
             'reminder', where={'reminder_id': reminder_id}
         )
 
+        self.invalidate_user(interaction.user.id)
         self.cancel_reminder(reminder_id)
 
         content = 'Successfully deleted your {} reminder!'.format(
@@ -280,8 +422,7 @@ class Reminders(commands.GroupCog, name='reminder'):
         content: app_commands.Transform[str, ReminderContentTransformer]
     ):
         """Create a reminder in the current channel."""
-        async with self.bot.db.connect() as conn:
-            count = await query_reminder_count(conn, interaction.user.id)
+        count = len(await self.fetch_user_reminders(interaction.user.id))
 
         if count >= self.MAXIMUM_REMINDERS:
             return await interaction.response.send_message(
@@ -347,11 +488,11 @@ class Reminders(commands.GroupCog, name='reminder'):
 
         # Check that there are any reminders in the channel to delete
         async with self.bot.db.connect() as conn:
-            query = f'SELECT reminder_id FROM reminder {where_conditions}'
+            query = f'SELECT reminder_id, user_id FROM reminder {where_conditions}'
             async with conn.execute(query, params) as c:
-                reminder_ids: list[int] = c.fetchall()
+                rows = await c.fetchall()
 
-        if not reminder_ids:
+        if not rows:
             subject = 'You have' if user_only else 'There are'
             return await interaction.response.send_message(
                 f'{subject} no reminders to delete in {channel_reference}!',
@@ -363,27 +504,29 @@ class Reminders(commands.GroupCog, name='reminder'):
             query = f'DELETE FROM reminder {where_conditions}'
             await conn.execute(query, params)
 
-        for i in reminder_ids:
-            self.cancel_reminder(i)
+        for row in rows:
+            self.invalidate_user(row['user_id'])
+            self.cancel_reminder(row['reminder_id'])
 
         content = 'Successfully cleared{your} {n} {reminders} from {ref}!'.format(
             your=' your' * user_only,
-            n=len(reminder_ids),
-            reminders=self.bot.inflector.plural('reminder', count),
+            n=len(rows),
+            reminders=self.bot.inflector.plural('reminder', len(rows)),
             ref=channel_reference
         )
 
         await interaction.response.send_message(content, ephemeral=True)
 
     def _check_reminder(self, entry: ReminderEntry, *, now=None):
-        """Starts an :class:`asyncio.Task` to handle sending a reminder
-        if the given reminder is nearing due.
+        """Pushes a reminder onto the scheduler's heap if the given
+        reminder is nearing due.
 
-        :returns bool: Indicates whether the task was created or not.
+        :returns bool: Indicates whether the reminder was scheduled or not.
 
         """
-        if entry['reminder_id'] in self.reminder_tasks:
-            # Task already exists; skip
+        reminder_id = entry['reminder_id']
+        if reminder_id in self.scheduled or reminder_id in self.queued:
+            # Already scheduled or being sent; skip
             return False
         elif now is None:
             now = discord.utils.utcnow()
@@ -391,117 +534,460 @@ class Reminders(commands.GroupCog, name='reminder'):
         td = entry['due'] - now
         is_soon = td < self.NEAR_DUE
         if is_soon:
-            self._create_reminder_task(td, entry)
+            self._schedule_reminder(entry)
+            logger.debug(
+                'Reminders: scheduled reminder {} '
+                'for {}, due in {}'.format(
+                    reminder_id, entry['user_id'], td
+                )
+            )
 
         return is_soon
 
-    def _create_reminder_task(self, td, entry: ReminderEntry):
-        """Adds a reminder task to the bot loop and logs it."""
-        reminder_id = entry['reminder_id']
-        task = self.bot.loop.create_task(self._reminder_coro(entry))
-        self.reminder_tasks[reminder_id] = task
-        task.add_done_callback(functools.partial(
-            self._reminder_coro_remove_task, reminder_id
-        ))
-
-        logger.debug(
-            'Reminders: created reminder task {} '
-            'for {}, due in {}'.format(
-                reminder_id, entry['user_id'], td
+    def _schedule_reminder(self, entry: ReminderEntry):
+        """Adds a reminder to the heap and wakes up the scheduler."""
+        self.scheduled[entry['reminder_id']] = entry
+        heapq.heappush(self.reminder_heap, (entry['due'], entry['reminder_id']))
+        self.scheduler_wakeup.set()
+
+    def _pop_due_reminders(self, now: datetime.datetime) -> list[ReminderEntry]:
+        """Pops every reminder from the heap that is due by the given time.
+
+        Reminders that were cancelled after being pushed are
+        discarded here rather than being removed from the heap.
+
+        """
+        heap = self.reminder_heap
+        entries = []
+        while heap and heap[0][0] <= now:
+            _, reminder_id = heapq.heappop(heap)
+            entry = self.scheduled.pop(reminder_id, None)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    async def _run_scheduler(self):
+        """Sleeps until the next reminder is due and queues
+        the reminders that are due for delivery.
+        """
+        await self.bot.wait_until_ready()
+
+        while True:
+            now = discord.utils.utcnow()
+            due = self._pop_due_reminders(now)
+            if due:
+                self._queue_deliveries(due)
+
+            self.scheduler_wakeup.clear()
+
+            timeout = None
+            if self.reminder_heap:
+                due = self.reminder_heap[0][0]
+                timeout = (due - discord.utils.utcnow()).total_seconds()
+
+            try:
+                await asyncio.wait_for(self.scheduler_wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _queue_deliveries(self, entries: list[ReminderEntry]) -> list[DeliveryJob]:
+        """Groups due reminders by channel and adds one delivery job
+        for each group to the delivery queue.
+        """
+        groups: dict[int, list[ReminderEntry]] = {}
+        for entry in entries:
+            groups.setdefault(entry['channel_id'], []).append(entry)
+
+        jobs = []
+        for channel_id, group in groups.items():
+            job = DeliveryJob(channel_id, group)
+            self.queued.update(job.reminder_ids)
+
+            # Only one worker may handle a channel at a time, so the
+            # channel is only queued if it has no other pending jobs
+            channel_jobs = self.channel_jobs.get(channel_id)
+            if channel_jobs is None:
+                channel_jobs = self.channel_jobs[channel_id] = collections.deque()
+                self.delivery_queue.put_nowait(channel_id)
+            channel_jobs.append(job)
+            jobs.append(job)
+
+            logger.debug(
+                'Reminders: queued {} reminder(s) for channel {}'.format(
+                    len(group), channel_id
+                )
             )
+
+        return jobs
+
+    def _get_retry_delay(self, attempts: int) -> float:
+        """Returns an exponential backoff delay with jitter."""
+        delay = min(
+            self.DELIVERY_BACKOFF_BASE * 2 ** (attempts - 1),
+            self.DELIVERY_BACKOFF_MAX
         )
+        return delay / 2 + random.uniform(0, delay / 2)
 
-        return task
+    def _retry_channel(self, channel_id: int):
+        self.retry_handles.pop(channel_id, None)
+        self.delivery_queue.put_nowait(channel_id)
 
-    def _reminder_coro_remove_task(self, reminder_id: int, task: asyncio.Task):
-        self.reminder_tasks.pop(reminder_id, None)
+    async def _delivery_worker(self):
+        """Takes channels from the delivery queue and sends their
+        jobs in order, backing off when a job fails.
+        """
+        while True:
+            channel_id = await self.delivery_queue.get()
+            jobs = self.channel_jobs[channel_id]
+            retrying = False
+            try:
+                while jobs and not retrying:
+                    job = jobs[0]
+                    try:
+                        retrying = await self._run_job(channel_id, job)
+                    finally:
+                        if not retrying:
+                            jobs.popleft()
+                            self.queued.difference_update(job.reminder_ids)
+            except Exception as e:
+                logger.exception(
+                    f'Reminders: unexpected error in delivery worker '
+                    f'for channel {channel_id}: {e}'
+                )
+            finally:
+                if not retrying:
+                    if jobs:
+                        # Interrupted before the channel was emptied;
+                        # queue it again so its remaining jobs aren't stuck
+                        self.delivery_queue.put_nowait(channel_id)
+                    else:
+                        del self.channel_jobs[channel_id]
+                self.delivery_queue.task_done()
+
+    async def _run_job(self, channel_id: int, job: DeliveryJob) -> bool:
+        """Attempts to deliver a job, dead-lettering it once it
+        has failed too many times.
+
+        :returns bool:
+            True if the job was kept for a retry, in which case the
+            channel stays reserved until the retry is due.
 
-    async def _reminder_coro(self, entry: ReminderEntry):
-        """Schedules a reminder to be sent to the user."""
-        async def remove_entry(log: str):
-            logger.debug(log)
-            await self.bot.db.delete_rows(
-                'reminder',
-                where={'reminder_id': reminder_id}
+        """
+        try:
+            finished = await self._deliver_reminders(job)
+        except Exception as e:
+            logger.exception(
+                f'Reminders: unexpected error while delivering '
+                f'to channel {channel_id}: {e}'
             )
+            job.last_error = repr(e)
+            finished = False
 
-        # Wait until the reminder is due
-        reminder_id = entry['reminder_id']
-        seconds = (entry['due'] - discord.utils.utcnow()).total_seconds()
-        await asyncio.sleep(seconds)
+        if finished:
+            return False
 
-        # Do some last-second checks before sending reminder
-        row = await self.bot.db.get_one(
-            'reminder', 'reminder_id',
-            where={'reminder_id': reminder_id}
+        job.attempts += 1
+        self.metrics.failures += 1
+        if job.attempts < self.max_attempts:
+            # Keep the channel reserved until the retry so
+            # later jobs cannot be sent out of order
+            loop = asyncio.get_running_loop()
+            delay = self._get_retry_delay(job.attempts)
+            self.retry_handles[channel_id] = loop.call_later(
+                delay, self._retry_channel, channel_id
+            )
+            return True
+
+        try:
+            await self._dead_letter(job)
+        except Exception as e:
+            logger.exception(
+                'Reminders: failed to dead-letter reminders {}: {}'.format(
+                    ', '.join([str(entry['reminder_id']) for entry in job.entries]),
+                    e
+                )
+            )
+            self._requeue_undeleted(job)
+
+        return False
+
+    def _requeue_undeleted(self, job: DeliveryJob):
+        """Queues a new job that only deletes the reminders that
+        a failed job already sent.
+
+        The job's other reminders are left in the database to be
+        picked up again by the next sweep, but reminders that were
+        already sent must stay queued so they aren't sent twice.
+
+        """
+        if not job.undeleted:
+            return
+
+        retry = DeliveryJob(job.channel_id, [])
+        retry.undeleted = job.undeleted
+        retry.reminder_ids = [entry['reminder_id'] for entry in job.undeleted]
+        job.undeleted = []
+
+        # Hand over the reminder IDs before the failed job releases them
+        handed_over = set(retry.reminder_ids)
+        job.reminder_ids = [n for n in job.reminder_ids if n not in handed_over]
+        self.channel_jobs[job.channel_id].append(retry)
+
+    async def _dead_letter(self, job: DeliveryJob):
+        """Moves the remaining reminders of a job that exceeded
+        the maximum number of attempts into the dead letter table.
+        """
+        if not job.entries and not job.undeleted:
+            return
+
+        ids = ', '.join([str(int(entry['reminder_id'])) for entry in job.entries])
+        # Reminders that were already sent only need to be deleted
+        all_ids = ', '.join([
+            str(int(entry['reminder_id']))
+            for entry in job.entries + job.undeleted
+        ])
+        failed_at = discord.utils.utcnow().replace(tzinfo=None)
+        async with self.bot.db.connect(writing=True) as conn:
+            async with conn.transaction():
+                if ids:
+                    await conn.execute(
+                        f'''
+                        INSERT OR REPLACE INTO reminder_dead_letter
+                            (reminder_id, user_id, channel_id, due,
+                             content, attempts, failed_at, error)
+                        SELECT reminder_id, user_id, channel_id, due,
+                               content, ?, ?, ?
+                        FROM reminder WHERE reminder_id IN ({ids})
+                        ''',
+                        job.attempts, failed_at, job.last_error
+                    )
+                await conn.execute(f'DELETE FROM reminder WHERE reminder_id IN ({all_ids})')
+
+        for user_id in {entry['user_id'] for entry in job.entries + job.undeleted}:
+            self.invalidate_user(user_id)
+
+        self.metrics.dead_lettered += len(job.entries)
+        logger.warning(
+            'Reminders: dead-lettered reminders {} after {} attempts'.format(
+                ', '.join([str(entry['reminder_id']) for entry in job.entries]),
+                job.attempts
+            )
         )
 
-        if row is None:
-            return await remove_entry(
-                f'Reminders: canceled reminder {reminder_id}: '
-                'reminder was deleted during wait'
+    async def delete_reminders(self, entries: Collection[ReminderEntry]):
+        """Deletes multiple reminders in a single statement."""
+        if not entries:
+            return
+
+        async with self.bot.db.connect(writing=True) as conn:
+            query = 'DELETE FROM reminder WHERE reminder_id IN ({})'.format(
+                ', '.join([str(int(entry['reminder_id'])) for entry in entries])
+            )
+            await conn.execute(query)
+
+        for user_id in {entry['user_id'] for entry in entries}:
+            self.invalidate_user(user_id)
+
+    async def query_existing_reminders(self, reminder_ids: Collection[int]) -> set[int]:
+        """Returns the subset of the given reminder IDs that still exist."""
+        async with self.bot.db.connect() as conn:
+            query = 'SELECT reminder_id FROM reminder WHERE reminder_id IN ({})'.format(
+                ', '.join([str(int(n)) for n in reminder_ids])
             )
+            async with conn.execute(query) as c:
+                return {row['reminder_id'] for row in await c.fetchall()}
 
-        channel = self.bot.get_channel(entry['channel_id'])
+    def format_reminder(self, entry: ReminderEntry, *, now: datetime.datetime) -> str:
+        """Formats a reminder as it should appear when sent."""
+        is_overdue = now - entry['due'] > self.OVERDUE_THRESHOLD
+        return '<@{mention}> **{due}{is_overdue}**\n{content}'.format(
+            mention=entry['user_id'],
+            due=discord.utils.format_dt(entry['due'], style='F'),
+            is_overdue=' (overdue)' * is_overdue,
+            content=entry['content']
+        )
+
+    async def _deliver_reminders(self, job: DeliveryJob) -> bool:
+        """Sends a group of due reminders to the same channel.
+
+        The channel and each distinct member are only resolved once,
+        and reminders are packed into as few messages as possible.
+        As reminders are sent or canceled, the job's entries are narrowed
+        down to the reminders that still need to be sent, so a retry
+        never sends the same reminder twice. Reminders that were handled
+        but could not be deleted are kept in `job.undeleted`, and only
+        their deletion is retried.
+
+        :returns bool: False if the job should be retried later.
+
+        """
+        def log_removed(reason: str, removed: list[ReminderEntry]):
+            for entry in removed:
+                logger.debug(
+                    f'Reminders: canceled reminder {entry["reminder_id"]}: {reason}'
+                )
+
+        if job.undeleted and not await self._delete_handled(job):
+            return False
+
+        # Do some last-second checks before sending reminders
+        entries = job.entries
+        if not entries:
+            return True
+        existing = await self.query_existing_reminders(
+            [entry['reminder_id'] for entry in entries]
+        )
+        log_removed(
+            'reminder was deleted during wait',
+            [entry for entry in entries if entry['reminder_id'] not in existing]
+        )
+        entries = job.entries = [
+            entry for entry in entries if entry['reminder_id'] in existing
+        ]
+        if not entries:
+            return True
+
+        channel = self.bot.get_channel(job.channel_id)
         if channel is None:
             # Might be a deleted channel but could also be a DM channel,
             # the latter being resolvable with fetch_channel()
             try:
-                channel = await self.bot.fetch_channel(entry['channel_id'])
+                channel = await self.bot.fetch_channel(job.channel_id)
             except (discord.NotFound, discord.Forbidden):
-                return await remove_entry(
-                    f'Reminders: canceled reminder {reminder_id}: '
-                    'channel no longer exists'
-                )
+                log_removed('channel no longer exists', entries)
+                job.undeleted.extend(entries)
+                job.entries = []
+                return await self._delete_handled(job)
+
+        guild = getattr(channel, 'guild', None)
+        if guild is not None:
+            # Check if each member is still in the guild
+            members = {}
+            for user_id in {entry['user_id'] for entry in entries}:
+                members[user_id] = await utils.getch_member(guild, user_id)
+
+            missing = [e for e in entries if members[e['user_id']] is None]
+            log_removed('member is no longer in the guild', missing)
+            job.undeleted.extend(missing)
+            entries = job.entries = [
+                e for e in entries if members[e['user_id']] is not None
+            ]
+
+        # Now we can try to send the reminders
+        finished = True
+        now = discord.utils.utcnow()
+        lines = [self.format_reminder(entry, now=now) for entry in entries]
+        for indices in utils.pack_lines(lines):
+            batch = [entries[i] for i in indices]
+            content = '\n'.join([lines[i] for i in indices])
+            batch_str = ', '.join([str(entry['reminder_id']) for entry in batch])
 
-        if getattr(channel, 'guild', None) is not None:
-            # Check if member is still in the guild
-            member = await utils.getch_member(channel.guild, entry['user_id'])
-            if member is None:
-                return await remove_entry(
-                    f'Reminders: canceled reminder {reminder_id}: '
-                    'member is no longer in the guild'
+            try:
+                await channel.send(content)
+            except discord.Forbidden as e:
+                logger.debug(
+                    f'Reminders: failed to send reminders {batch_str}: '
+                    f'was forbidden from sending: {e}'
+                )
+                # Remaining reminders would fail the same way
+                job.undeleted.extend(entries[indices[0]:])
+                job.entries = []
+                break
+            except discord.HTTPException as e:
+                # This may be a fault on server end, log this with higher
+                # severity and let the worker retry the rest later
+                logger.warning(
+                    f'Reminders: failed to send reminders {batch_str}: '
+                    f'HTTPException occurred: {e}'
                 )
+                job.entries = entries[indices[0]:]
+                job.last_error = str(e)
+                finished = False
+                break
+            else:
+                logger.debug(f'Reminders: successfully sent reminders {batch_str}')
+                job.undeleted.extend(batch)
+                job.entries = entries[indices[-1] + 1:]
 
-        # NOTE: multiple API calls could be made above if
-        # member/user left several reminders
+                sent_at = discord.utils.utcnow()
+                self.metrics.sent += len(batch)
+                for entry in batch:
+                    self.metrics.record_lag((sent_at - entry['due']).total_seconds())
 
-        description = '<@{mention}> **{due}{is_overdue}**\n{content}'.format(
-            mention=entry['user_id'],
-            due=discord.utils.format_dt(entry['due'], style='F'),
-            is_overdue=' (overdue)' * (seconds < 0),
-            content=entry['content']
-        )
+        deleted = await self._delete_handled(job)
+        return finished and deleted
+
+    async def _delete_handled(self, job: DeliveryJob) -> bool:
+        """Deletes the reminders a job has already sent or canceled.
 
-        # Now we can try to send the reminder
+        If this fails, the reminders stay in `job.undeleted` so the next
+        attempt can retry the deletion without sending them again.
+
+        :returns bool: True if the reminders were deleted.
+
+        """
         try:
-            await channel.send(description)
-        except discord.Forbidden as e:
-            await remove_entry(
-                f'Reminders: failed to send reminder {reminder_id}: '
-                f'was forbidden from sending: {e}'
-            )
-        except discord.HTTPException as e:
-            # This may be a fault on server end, log this with higher
-            # severity and allow the send_reminders loop to retry
+            await self.delete_reminders(job.undeleted)
+        except Exception as e:
             logger.warning(
-                f'Reminders: failed to send reminder {reminder_id}: '
-                f'HTTPException occurred: {e}'
+                'Reminders: failed to delete handled reminders {}: {!r}'.format(
+                    ', '.join([str(entry['reminder_id']) for entry in job.undeleted]),
+                    e
+                )
             )
-        else:
-            await remove_entry(f'Reminders: successfully sent reminder {reminder_id}')
+            job.last_error = repr(e)
+            return False
+
+        job.undeleted = []
+        return True
+
+    @commands.command(name='remindermetrics', hidden=True)
+    @commands.is_owner()
+    async def reminder_metrics(self, ctx: Context):
+        """Show the state of the reminder delivery queue."""
+        def format_lag(percent: float):
+            lag = self.metrics.lag_percentile(percent)
+            return 'N/A' if lag is None else f'{lag:.2f}s'
+
+        embed = discord.Embed(
+            color=ctx.bot.get_bot_color(),
+            title='Reminder delivery'
+        ).add_field(
+            name='Queue',
+            value='{:,} reminders in {:,} channels\n{:,} scheduled\n{} workers'.format(
+                self.queue_depth, len(self.channel_jobs),
+                len(self.scheduled), len(self.workers)
+            )
+        ).add_field(
+            name='Deliveries',
+            value='{:,} sent\n{:,} failed attempts\n{:,} dead-lettered'.format(
+                self.metrics.sent, self.metrics.failures,
+                self.metrics.dead_lettered
+            )
+        ).add_field(
+            name='Lag',
+            value='p50: {}\np95: {}\nmax: {}'.format(
+                format_lag(50), format_lag(95), format_lag(100)
+            )
+        )
+
+        await ctx.send(embed=embed)
 
     @tasks.loop(minutes=10)
     async def send_reminders(self):
-        """Periodically queries the database for reminders and
-        spins up reminder tasks as needed.
+        """Periodically queries the database for reminders that
+        are nearing due and schedules them as needed.
         """
         now = discord.utils.utcnow()
+        horizon = (now + self.NEAR_DUE).replace(tzinfo=None)
 
-        async for entry in self.bot.db.yield_rows('reminder'):
-            entry = cast(ReminderEntry, dict(entry))
-            entry['due'] = entry['due'].replace(tzinfo=datetime.timezone.utc)
-            self._check_reminder(entry, now=now)
+        async with self.bot.db.connect() as conn:
+            query = 'SELECT * FROM reminder WHERE due < ? ORDER BY due'
+            async with conn.execute(query, horizon) as c:
+                while row := await c.fetchone():
+                    entry = cast(ReminderEntry, dict(row))
+                    entry['due'] = entry['due'].replace(tzinfo=datetime.timezone.utc)
+                    self._check_reminder(entry, now=now)
 
     @send_reminders.before_loop
     async def before_send_reminders(self):
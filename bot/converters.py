@@ -3,9 +3,11 @@
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at http://mozilla.org/MPL/2.0/.
 import asyncio
+import bisect
 import datetime
+import itertools
 import re
-from typing import Optional, cast
+from typing import Iterable, Iterator, Optional, Sequence, cast
 
 import dateparser
 import discord
@@ -256,14 +258,71 @@ FutureDatetimeTransform = app_commands.Transform[
 ]
 
 
-class IndexConverter(commands.Converter[list[int]]):
-    """Convert an argument to a list of indices or a range.
+class IndexRanges(Sequence[int]):
+    """A sorted set of indices stored as disjoint ranges.
+
+    Overlapping and adjacent ranges are merged so that an argument
+    like "1-500, 2-999" is kept as a single range rather than
+    being expanded into every index it covers::
+
+        >>> IndexRanges([range(0, 3), range(2, 5), range(8, 9)])
+        IndexRanges([range(0, 5), range(8, 9)])
+
+    """
+    __slots__ = ('ranges', '_starts', '_offsets')
+
+    def __init__(self, ranges: Iterable[range]):
+        merged: list[range] = []
+        for r in sorted((r for r in ranges if r), key=lambda r: r.start):
+            if merged and r.start <= merged[-1].stop:
+                last = merged[-1]
+                merged[-1] = range(last.start, max(last.stop, r.stop))
+            else:
+                merged.append(r)
+
+        self.ranges: tuple[range, ...] = tuple(merged)
+        self._starts = [r.start for r in merged]
+        # Position of each range's first index within the whole sequence
+        self._offsets = list(itertools.accumulate(
+            (len(r) for r in merged), initial=0
+        ))
+
+    def __repr__(self):
+        return f'{type(self).__name__}({list(self.ranges)!r})'
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    def __iter__(self) -> Iterator[int]:
+        return itertools.chain.from_iterable(self.ranges)
+
+    def __contains__(self, n):
+        i = bisect.bisect_right(self._starts, n) - 1
+        return i >= 0 and n in self.ranges[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            raise TypeError(f'{type(self).__name__} does not support slicing')
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('index out of range')
+
+        n = bisect.bisect_right(self._offsets, i) - 1
+        return self.ranges[n][i - self._offsets[n]]
+
+
+class IndexConverter(commands.Converter[IndexRanges]):
+    """Convert an argument to a set of indices or ranges.
 
     Formats supported:
         1        # [0]
         1, 9, 4  # [0, 4, 8]; indices are sorted
         1-3      # [0, 1, 2]
 
+    The result is an :class:`IndexRanges` which stores each range
+    without materializing the indices inside it.
+
     Parameters
     ----------
     max_digits: int
@@ -275,8 +334,8 @@ class IndexConverter(commands.Converter[list[int]]):
     def __init__(self, *, max_digits: int = 3):
         self.max_length = max_digits
 
-    async def convert(self, ctx: Context, argument) -> list[int]:
-        indices = set()
+    async def convert(self, ctx: Context, argument) -> IndexRanges:
+        ranges = []
 
         for m in self.FORMAT_REGEX.finditer(argument):
             # ignore unreasonably high indices
@@ -294,10 +353,9 @@ class IndexConverter(commands.Converter[list[int]]):
                     f'than the start index (`{start}-{end}`).'
                 )
 
-            for i in range(start - 1, end):
-                indices.add(i)
+            ranges.append(range(start - 1, end))
 
-        if not indices:
+        if not ranges:
             raise commands.BadArgument('No indices were specified.')
 
-        return sorted(indices)
+        return IndexRanges(ranges)
@@ -88,6 +88,35 @@ def paginate_message(message: str, max_size: int = 2000) -> str:
         yield message[i:i + max_size]
 
 
+def pack_lines(
+        lines: Iterable[str], max_size: int = 2000, sep: str = '\n'
+) -> list[list[int]]:
+    """Group consecutive lines into as few messages as possible
+    without exceeding `max_size` characters per message.
+
+    Lines longer than `max_size` are placed in a message of their own.
+
+        >>> pack_lines(['foo', 'bar', 'baz'], 7)
+        [[0, 1], [2]]
+
+    :param lines: The lines to pack.
+    :param max_size: The maximum size per message.
+    :param sep: The separator that will be used to join the lines.
+    :returns: A list of line indices for each message.
+
+    """
+    messages: list[list[int]] = []
+    size = 0
+    for i, line in enumerate(lines):
+        if messages and size + len(sep) + len(line) <= max_size:
+            messages[-1].append(i)
+            size += len(sep) + len(line)
+        else:
+            messages.append([i])
+            size = len(line)
+    return messages
+
+
 def truncate_message(
         message: str, max_size: int = 2000, max_lines: Optional[int] = None,
         placeholder: str = '[...]') -> str:
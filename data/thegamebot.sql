@@ -58,6 +58,18 @@ CREATE TABLE guild (
 );
 
 
+CREATE TABLE member_check (
+    guild_id   INTEGER   NOT NULL
+                         REFERENCES guild (guild_id) ON DELETE CASCADE,
+    user_id    INTEGER   NOT NULL,
+    checked_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (
+        guild_id,
+        user_id
+    )
+);
+
+
 CREATE TABLE note (
     note_id       INTEGER   PRIMARY KEY
                             NOT NULL,
@@ -74,6 +86,39 @@ CREATE TABLE note (
 );
 
 
+CREATE VIRTUAL TABLE note_fts5 USING fts5 (
+    user_id UNINDEXED,
+    guild_id UNINDEXED,
+    content,
+    content=note,
+    content_rowid=note_id,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+-- INSERT INTO note_fts5 (note_fts5) VALUES ('rebuild');
+
+
+CREATE TRIGGER note_fts5_ai AFTER INSERT ON note BEGIN
+  INSERT INTO note_fts5
+    (rowid, user_id, guild_id, content) VALUES
+    (new.note_id, new.user_id, new.guild_id, new.content);
+END;
+CREATE TRIGGER note_fts5_ad AFTER DELETE ON note BEGIN
+  INSERT INTO note_fts5
+    (note_fts5, rowid, user_id, guild_id, content) VALUES
+    ('delete', old.note_id, old.user_id, old.guild_id, old.content);
+END;
+CREATE TRIGGER note_fts5_au
+AFTER UPDATE OF note_id, user_id, guild_id, content ON note
+BEGIN
+  INSERT INTO note_fts5
+    (note_fts5, rowid, user_id, guild_id, content) VALUES
+    ('delete', old.note_id, old.user_id, old.guild_id, old.content);
+  INSERT INTO note_fts5
+    (rowid, user_id, guild_id, content) VALUES
+    (new.note_id, new.user_id, new.guild_id, new.content);
+END;
+
+
 CREATE TABLE reminder (
     reminder_id INTEGER   PRIMARY KEY AUTOINCREMENT
                           NOT NULL,
@@ -89,6 +134,20 @@ CREATE TABLE reminder (
 );
 
 
+CREATE TABLE reminder_dead_letter (
+    reminder_id INTEGER   PRIMARY KEY
+                          NOT NULL,
+    user_id     INTEGER   NOT NULL
+                          REFERENCES user (user_id) ON DELETE CASCADE,
+    channel_id  INTEGER   NOT NULL,
+    due         TIMESTAMP,
+    content     TEXT      NOT NULL,
+    attempts    INTEGER   NOT NULL,
+    failed_at   TIMESTAMP NOT NULL,
+    error       TEXT
+);
+
+
 CREATE TABLE tag (
     guild_id   INTEGER        NOT NULL,
     tag_name   VARCHAR (50)   NOT NULL,
@@ -221,6 +280,11 @@ CREATE INDEX ix_reminder_channels ON reminder (
 );
 
 
+CREATE INDEX ix_reminder_due ON reminder (
+    due
+);
+
+
 CREATE INDEX ix_reminder_user_channel ON reminder (
     user_id,
     channel_id
@@ -232,6 +296,12 @@ CREATE INDEX ix_reminder_users ON reminder (
 );
 
 
+CREATE INDEX ix_reminder_user_due ON reminder (
+    user_id,
+    due
+);
+
+
 CREATE INDEX ix_tag_alias_name ON tag_alias (
     guild_id,
     tag_name
@@ -249,6 +319,12 @@ CREATE INDEX ix_tag_guild ON tag (
 );
 
 
+CREATE INDEX ix_tag_guild_user ON tag (
+    guild_id,
+    user_id
+);
+
+
 CREATE INDEX ix_tag_user ON tag (
     user_id,
     guild_id
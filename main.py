@@ -7,6 +7,7 @@ import asyncio
 import collections
 import datetime
 import logging
+import multiprocessing
 import os
 import pathlib
 import sqlite3
@@ -55,13 +56,16 @@ logger = logging.getLogger('discord')
 logger.handlers.clear()  # fixes duplicate logs from stream handler
 logger.setLevel(logging.INFO)
 
-file_handler = logging.FileHandler(
-    filename='discord.log', encoding='utf-8', mode='w'
-)
-file_handler.setFormatter(
-    logging.Formatter('%(asctime)s:%(levelname)s:%(name)s: %(message)s')
-)
-logger.addHandler(file_handler)
+# Spawned worker processes (e.g. for graph rendering) re-import this
+# module and must not truncate the bot's log file
+if multiprocessing.parent_process() is None:
+    file_handler = logging.FileHandler(
+        filename='discord.log', encoding='utf-8', mode='w'
+    )
+    file_handler.setFormatter(
+        logging.Formatter('%(asctime)s:%(levelname)s:%(name)s: %(message)s')
+    )
+    logger.addHandler(file_handler)
 
 stream_handler = logging.StreamHandler()
 stream_handler.setLevel(logging.WARNING)
@@ -76,6 +80,40 @@ class UserWithTimezone(typing.TypedDict):
     timezone: str
 
 
+class PrefixMatcher:
+    """A precomputed set of prefixes that a message can be invoked with.
+
+    The mention prefixes are placed first to match the order
+    returned by :func:`commands.when_mentioned_or()`.
+
+    Attributes
+    ----------
+    prefix: The custom prefix this matcher was built with, if any.
+    prefixes: The full list of prefixes, including the mention forms.
+        This list should not be mutated.
+
+    """
+    __slots__ = ('prefix', 'prefixes', '_prefix_tuple')
+
+    def __init__(self, user_id: int, prefix: str | None):
+        self.prefix = prefix
+        self.prefixes = [f'<@{user_id}> ', f'<@!{user_id}> ']
+        if prefix is not None:
+            self.prefixes.append(prefix)
+        self._prefix_tuple = tuple(self.prefixes)
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.prefixes)
+
+    def matches(self, content: str) -> bool:
+        """Checks if the given content starts with one of the prefixes.
+
+        Messages failing this check cannot possibly invoke a command.
+
+        """
+        return content.startswith(self._prefix_tuple)
+
+
 class TheGameBot(commands.Bot):
     """
 
@@ -95,7 +133,8 @@ class TheGameBot(commands.Bot):
         self.db = database.Database(self.dbpool, self.DATABASE_MAIN_FILE)
         self.inflector = inflect.engine()
 
-        self.dbevents_cleaned_up = False
+        self._default_prefix_matcher: PrefixMatcher | None = None
+
         self.info_bootup_time = 0
         self.info_processed_commands = collections.defaultdict(int)
         self.session = aiohttp.ClientSession()
@@ -162,19 +201,45 @@ class TheGameBot(commands.Bot):
 
         return settings.get('general', 'default_prefix', None)
 
-    async def get_prefix(self, message) -> list[str] | str | None:
-        def wrap(*prefixes: str):
-            if not prefixes or prefixes[0] is None:
-                return commands.when_mentioned(self, message)
-            return commands.when_mentioned_or(*prefixes)(self, message)
+    def get_default_prefix_matcher(self) -> PrefixMatcher:
+        """Returns the prefix matcher for the default prefix.
+
+        The matcher is rebuilt whenever the default prefix changes.
 
+        """
+        prefix = self.get_default_prefix()
+        matcher = self._default_prefix_matcher
+        if matcher is None or matcher.prefix != prefix:
+            matcher = PrefixMatcher(self.user.id, prefix)
+            self._default_prefix_matcher = matcher
+        return matcher
+
+    async def get_prefix_matcher(self, message) -> PrefixMatcher:
+        """Returns the prefix matcher applicable to a given message."""
         if message.guild is None:
-            return wrap(self.get_default_prefix())
+            return self.get_default_prefix_matcher()
 
         cog = self.get_cog('Prefix')
         if cog is None:
-            return wrap(self.get_default_prefix())
-        return wrap(await cog.fetch_prefix(message.guild.id))
+            return self.get_default_prefix_matcher()
+        return await cog.fetch_matcher(message.guild.id)
+
+    async def get_prefix(self, message) -> list[str]:
+        matcher = await self.get_prefix_matcher(message)
+        return list(matcher.prefixes)
+
+    async def process_commands(self, message):
+        if message.author.bot:
+            return
+
+        # Reject messages without a prefix before
+        # the context has to be constructed
+        matcher = await self.get_prefix_matcher(message)
+        if not matcher.matches(message.content):
+            return
+
+        ctx = await self.get_context(message)
+        await self.invoke(ctx)
 
     def get_settings(self) -> "bot.cogs.settings.Settings":
         """ Retrieves the Settings cog.